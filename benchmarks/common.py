@@ -0,0 +1,213 @@
+"""
+Shared machinery for the benchmarks: running cases in fresh processes,
+measuring peak memory, and storing and comparing results between commits.
+"""
+
+import json
+import platform
+import resource
+import subprocess
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+RESULTS_DIRECTORY = Path(__file__).parent / "results"
+
+
+def peak_rss() -> int:
+    """
+    Peak resident set size of this process, in bytes.
+    """
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    # Linux reports kilobytes, macOS bytes.
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def timed(function: Callable[[], Any], repeat: int = 1) -> float:
+    """
+    Minimum wall-clock time, in seconds, of ``repeat`` calls to ``function``.
+    """
+
+    times = []
+
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+
+    return min(times)
+
+
+def run_isolated(function: Callable[..., Dict[str, Any]], *args) -> Dict[str, Any]:
+    """
+    Runs ``function(*args)`` in a fresh (spawned) process, so that its peak
+    RSS, which is added to the returned dictionary, is not polluted by
+    earlier cases or the data generation.
+    """
+
+    with ProcessPoolExecutor(max_workers=1, mp_context=get_context("spawn")) as pool:
+        return pool.submit(measure_peak_rss, function, *args).result()
+
+
+def measure_peak_rss(function: Callable[..., Dict[str, Any]], *args) -> Dict[str, Any]:
+    result = function(*args)
+    result["peak_rss"] = peak_rss()
+
+    return result
+
+
+def current_commit() -> str:
+    """
+    The current git commit (with a ``-dirty`` suffix for uncommitted
+    changes), or ``unknown`` outside of a repository.
+    """
+
+    def git(*args: str) -> str:
+        return subprocess.run(
+            ["git", *args],
+            cwd=Path(__file__).parent,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+
+    try:
+        commit = git("rev-parse", "--short", "HEAD")
+        dirty = git("status", "--porcelain", "--untracked-files=no", "--", "..")
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+    return f"{commit}-dirty" if dirty else commit
+
+
+def store_results(
+    suite: str, results: List[Dict[str, Any]], directory: Optional[Path] = None
+) -> Path:
+    """
+    Writes the results of a suite to ``{directory}/{suite}/{commit}.json``,
+    along with a description of the machine, and returns the filename.
+    """
+
+    commit = current_commit()
+    directory = Path(directory or RESULTS_DIRECTORY) / suite
+    directory.mkdir(parents=True, exist_ok=True)
+
+    filename = directory / f"{commit}.json"
+
+    with open(filename, "w") as handle:
+        json.dump(
+            dict(
+                suite=suite,
+                commit=commit,
+                date=time.strftime(r"%Y-%m-%dT%H:%M:%S"),
+                machine=dict(
+                    node=platform.node(),
+                    processor=platform.processor(),
+                    python=platform.python_version(),
+                ),
+                results=results,
+            ),
+            handle,
+            indent=2,
+        )
+
+    return filename
+
+
+def load_results(filename: Path) -> Dict[str, Any]:
+    with open(filename, "r") as handle:
+        return json.load(handle)
+
+
+def is_measurement(key: str) -> bool:
+    return key.endswith("_time") or key == "peak_rss"
+
+
+def result_key(result: Dict[str, Any]) -> str:
+    """
+    Identifies a result by all of its entries that are not measurements.
+    """
+
+    return json.dumps(
+        {key: value for key, value in result.items() if not is_measurement(key)},
+        sort_keys=True,
+    )
+
+
+def compare_results(
+    baseline: Dict[str, Any],
+    current: Dict[str, Any],
+    threshold: float = 0.2,
+    measurement: str = "wall_time",
+) -> List[Dict[str, Any]]:
+    """
+    Compares matching results from two stored result files.
+
+    Parameters
+    ----------
+
+    baseline, current: Dict[str, Any]
+        Results, as read by :func:`load_results`.
+
+    threshold: float
+        Fractional increase over the baseline above which a result is
+        marked as a regression.
+
+    measurement: str
+        Which measurement to compare (``wall_time`` or ``peak_rss``).
+
+    Returns
+    -------
+
+    comparison: List[Dict[str, Any]]
+        For each result in both files, the case, both measurements, their
+        ratio, and whether it passes.
+    """
+
+    baseline_results = {result_key(result): result for result in baseline["results"]}
+
+    comparison = []
+
+    for result in current["results"]:
+        key = result_key(result)
+
+        if key not in baseline_results:
+            continue
+
+        before = baseline_results[key][measurement]
+        after = result[measurement]
+        ratio = after / before if before > 0 else 1.0
+
+        comparison.append(
+            dict(
+                case=json.loads(key),
+                baseline=before,
+                current=after,
+                ratio=ratio,
+                passed=ratio <= 1.0 + threshold,
+            )
+        )
+
+    return comparison
+
+
+def print_comparison(comparison: List[Dict[str, Any]]) -> bool:
+    """
+    Prints a comparison table, and returns whether all results passed.
+    """
+
+    for item in comparison:
+        case = ", ".join(f"{key}={value}" for key, value in item["case"].items())
+        status = "ok" if item["passed"] else "REGRESSION"
+
+        print(
+            f"{status:>10}  {item['ratio']:6.2f}x  "
+            f"{item['baseline']:.4g} -> {item['current']:.4g}  {case}"
+        )
+
+    return all(item["passed"] for item in comparison)
@@ -0,0 +1,46 @@
+"""
+Compares two stored benchmark result files, e.g. from before and after a
+change, and exits with an error if any case regressed.
+
+Usage::
+
+    python benchmarks/compare.py results/end_to_end/abc1234.json \
+        results/end_to_end/def5678.json --threshold 0.2
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+from common import compare_results, load_results, print_comparison
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("baseline", type=Path)
+    parser.add_argument("current", type=Path)
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.2,
+        help="Fractional slow-down above which a case is a regression.",
+    )
+    parser.add_argument(
+        "--measurement", default="wall_time", choices=["wall_time", "peak_rss"]
+    )
+    args = parser.parse_args()
+
+    passed = print_comparison(
+        compare_results(
+            load_results(args.baseline),
+            load_results(args.current),
+            threshold=args.threshold,
+            measurement=args.measurement,
+        )
+    )
+
+    sys.exit(0 if passed else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,267 @@
+"""
+End-to-end benchmarks: full :class:`PagePlotRunner` runs, and reads through
+each of the IO backends, on synthetic catalogues of increasing size.
+
+Every case runs in a fresh process to measure its peak RSS. Results are
+stored in ``benchmarks/results/end_to_end/{commit}.json``; compare two of
+these with ``python benchmarks/compare.py``.
+
+Usage (with pageplot installed)::
+
+    python benchmarks/end_to_end.py --sizes 1e4 1e5 1e6 1e7
+"""
+
+import argparse
+import json
+import shutil
+import tempfile
+from pathlib import Path
+from typing import Any, Dict, List
+
+from common import run_isolated, store_results, timed
+from generators import (
+    generate_arepo_subfind,
+    generate_multi_snapshot,
+    generate_snapshot,
+)
+
+# Plots run on the snapshots; every data-heavy built-in extension is used.
+SNAPSHOT_PLOTS = {
+    "density_temperature": {
+        "x": "PartType0/Density cm**-3",
+        "y": "PartType0/Temperature K",
+        "two_dimensional_histogram": {
+            "limits_x": ["1e-6 cm**-3", "1e2 cm**-3"],
+            "limits_y": ["1e1 K", "1e8 K"],
+            "spacing_x": "log",
+            "spacing_y": "log",
+            "bins": 128,
+            "norm": "log",
+        },
+        "median_line": {
+            "limits": ["1e-6 cm**-3", "1e2 cm**-3"],
+            "spacing": "log",
+            "bins": 20,
+        },
+        "scale_axes": {"scale_x": "log", "scale_y": "log"},
+        "metadata": {"title": "Density-Temperature", "section": "Gas"},
+    },
+    "hot_gas_density_temperature": {
+        "x": "PartType0/Density cm**-3",
+        "y": "PartType0/Temperature K",
+        "mask": "PartType0/Temperature K > 1e5 K",
+        "mean_line": {
+            "limits": ["1e-6 cm**-3", "1e2 cm**-3"],
+            "spacing": "log",
+            "bins": 20,
+        },
+        "scale_axes": {"scale_x": "log", "scale_y": "log"},
+        "metadata": {"title": "Hot Gas", "section": "Gas"},
+    },
+    "gas_mass_function": {
+        "x": "PartType0/Masses Solar_Mass",
+        "y_units": "Mpc**-3",
+        "mass_function": {
+            "limits": ["1e6 Solar_Mass", "1e10 Solar_Mass"],
+            "box_volume": "15625 Mpc**3",
+            "bins": 20,
+        },
+        "scale_axes": {"scale_x": "log", "scale_y": "log"},
+        "metadata": {"title": "Gas Mass Function", "section": "Gas"},
+    },
+}
+
+AREPO_PLOTS = {
+    "stellar_mass_black_hole_mass": {
+        "x": "Subhalo/SubhaloMassInRadType[:, 4]",
+        "y": "Subhalo/SubhaloBHMass",
+        "x_units": "Solar_Mass",
+        "y_units": "Solar_Mass",
+        "two_dimensional_histogram": {
+            "limits_x": ["1e7 Solar_Mass", "1e12 Solar_Mass"],
+            "limits_y": ["1e7 Solar_Mass", "1e12 Solar_Mass"],
+            "spacing_x": "log",
+            "spacing_y": "log",
+            "bins": 128,
+            "norm": "log",
+        },
+        "median_line": {
+            "limits": ["1e7 Solar_Mass", "1e12 Solar_Mass"],
+            "spacing": "log",
+            "bins": 20,
+        },
+        "scale_axes": {"scale_x": "log", "scale_y": "log"},
+        "metadata": {"title": "Stellar Mass-Black Hole Mass", "section": "Galaxies"},
+    },
+    "subhalo_mass_function": {
+        "x": "Subhalo/SubhaloMass",
+        "x_units": "Solar_Mass",
+        "y_units": "Mpc**-3",
+        "mass_function": {"limits": ["1e8 Solar_Mass", "1e13 Solar_Mass"], "bins": 20},
+        "scale_axes": {"scale_x": "log", "scale_y": "log"},
+        "metadata": {"title": "Subhalo Mass Function", "section": "Galaxies"},
+    },
+}
+
+# Column read in the IO backend benchmarks.
+READ_PATHS = {
+    "hdf5": "PartType0/Temperature K",
+    "multi": "PartType0/Temperature K",
+    "arepo_subfind": "Subhalo/SubhaloMassType[:, 4]",
+}
+
+
+def open_data(backend: str, filenames: List[str]):
+    if backend == "hdf5":
+        from pageplot.io.h5py import IOHDF5
+
+        return IOHDF5(filename=filenames[0])
+    elif backend == "arepo_subfind":
+        from pageplot.io.areposubfind import IOAREPOSubFind
+
+        return IOAREPOSubFind(filename=filenames[0])
+    else:
+        from pageplot.io.h5py import IOHDF5, MetadataHDF5
+        from pageplot.io.multi import MultiIOSpecification
+
+        return MultiIOSpecification(
+            filenames=[Path(filename) for filename in filenames],
+            base_data_spec=IOHDF5,
+            base_metadata_spec=MetadataHDF5,
+        )
+
+
+def read_case(backend: str, filenames: List[str], rows: int) -> Dict[str, Any]:
+    """
+    Times reading a single column (cold, then warm) through a backend.
+    """
+
+    data = open_data(backend, filenames)
+    path = READ_PATHS[backend]
+
+    cold = timed(lambda: data.data_from_string(path))
+    warm = timed(lambda: data.data_from_string(path), repeat=3)
+
+    return dict(
+        benchmark="read",
+        backend=backend,
+        rows=rows,
+        wall_time=warm,
+        cold_wall_time=cold,
+    )
+
+
+def runner_case(
+    backend: str, filenames: List[str], rows: int, directory: str
+) -> Dict[str, Any]:
+    """
+    Times a full run: creating the figures, and the webpage.
+    """
+
+    # Imported up-front so that the (one-off) import time is not measured.
+    import matplotlib.figure
+
+    from pageplot.runner import PagePlotRunner
+
+    directory = Path(directory)
+    output_path = directory / f"output_{backend}_{rows}"
+    output_path.mkdir(exist_ok=True)
+
+    config_filename = directory / "config.json"
+    plot_filename = directory / f"plots_{backend}.json"
+
+    with open(config_filename, "w") as handle:
+        json.dump({}, handle)
+
+    with open(plot_filename, "w") as handle:
+        json.dump(AREPO_PLOTS if backend == "arepo_subfind" else SNAPSHOT_PLOTS, handle)
+
+    def run():
+        runner = PagePlotRunner(
+            config_filename=config_filename,
+            data=open_data(backend, filenames),
+            plot_filenames=[plot_filename],
+            output_path=output_path,
+        )
+        runner.create_figures()
+        runner.create_webpage()
+
+        return runner
+
+    wall_time = timed(run)
+
+    return dict(benchmark="runner", backend=backend, rows=rows, wall_time=wall_time)
+
+
+def generate(backend: str, rows: int, directory: Path) -> List[str]:
+    """
+    Generates the catalogue for a backend and size.
+    """
+
+    directory = directory / f"{backend}_{rows}"
+
+    if backend == "hdf5":
+        directory.mkdir(parents=True, exist_ok=True)
+        filenames = [generate_snapshot(directory / "snapshot.hdf5", rows)]
+    elif backend == "arepo_subfind":
+        filenames = [generate_arepo_subfind(directory, rows)]
+    else:
+        filenames = generate_multi_snapshot(directory, rows)
+
+    return [str(filename) for filename in filenames]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "--sizes",
+        nargs="+",
+        type=float,
+        default=[1e4, 1e5, 1e6],
+        help="Number of rows in the generated catalogues (10^4 to 10^9).",
+    )
+    parser.add_argument(
+        "--backends",
+        nargs="+",
+        default=list(READ_PATHS.keys()),
+        choices=list(READ_PATHS.keys()),
+    )
+    parser.add_argument(
+        "--scratch",
+        type=Path,
+        default=None,
+        help="Directory for the generated catalogues. Kept if given, "
+        "otherwise a temporary directory is used and removed.",
+    )
+    parser.add_argument("--results", type=Path, default=None)
+    args = parser.parse_args()
+
+    scratch = args.scratch or Path(tempfile.mkdtemp(prefix="pageplot_benchmark_"))
+    scratch.mkdir(parents=True, exist_ok=True)
+
+    results = []
+
+    try:
+        for rows in [int(size) for size in args.sizes]:
+            for backend in args.backends:
+                filenames = generate(backend, rows, scratch)
+
+                for result in [
+                    run_isolated(read_case, backend, filenames, rows),
+                    run_isolated(runner_case, backend, filenames, rows, str(scratch)),
+                ]:
+                    print(
+                        f"{result['benchmark']:>8} {backend:>14} {rows:>12d} rows: "
+                        f"{result['wall_time']:8.3f} s, "
+                        f"{result['peak_rss'] / 1024**2:8.1f} MB peak RSS"
+                    )
+                    results.append(result)
+    finally:
+        if args.scratch is None:
+            shutil.rmtree(scratch)
+
+    print(f"Results written to {store_results('end_to_end', results, args.results)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+"""
+Generators for synthetic, but realistically shaped, input catalogues.
+
+All datasets are written in chunks, so that catalogues far larger than the
+available memory (up to ~10^9 rows) can be generated. The random numbers
+are seeded, so the same size always gives the same files.
+"""
+
+from pathlib import Path
+from typing import Callable, List, Tuple
+
+import h5py
+import numpy as np
+
+# Rows generated and written at a time.
+CHUNK_ROWS = 2**20
+
+# Code units of the generated AREPO catalogues, as in Illustris/TNG.
+AREPO_PARAMETERS = {
+    "UnitLength_in_cm": 3.085678e21,
+    "UnitMass_in_g": 1.989e43,
+    "UnitVelocity_in_cm_per_s": 1e5,
+}
+
+AREPO_HEADER = {
+    "Time": 1.0,
+    "Redshift": 0.0,
+    "HubbleParam": 0.6774,
+    "BoxSize": 35000.0,
+}
+
+
+def write_chunked(
+    handle: h5py.Group,
+    name: str,
+    rows: int,
+    generate: Callable[[np.random.Generator, int], np.ndarray],
+    rng: np.random.Generator,
+    shape: Tuple[int, ...] = (),
+    dtype: type = np.float64,
+):
+    """
+    Creates the dataset ``name`` with ``rows`` rows (of ``shape``), filled
+    ``CHUNK_ROWS`` at a time from ``generate(rng, number_of_rows)``.
+    """
+
+    dataset = handle.create_dataset(name, shape=(rows, *shape), dtype=dtype)
+
+    for start in range(0, rows, CHUNK_ROWS):
+        stop = min(start + CHUNK_ROWS, rows)
+        dataset[start:stop] = generate(rng, stop - start)
+
+    return
+
+
+def lognormal(mean: float, sigma: float, shape: Tuple[int, ...] = ()):
+    """
+    Generator of values whose base-10 logarithm is normally distributed.
+    """
+
+    def generate(rng: np.random.Generator, rows: int) -> np.ndarray:
+        return 10.0 ** rng.normal(mean, sigma, size=(rows, *shape))
+
+    return generate
+
+
+def generate_snapshot(filename: Path, rows: int, seed: int = 0) -> Path:
+    """
+    Single HDF5 snapshot of gas particles, read with
+    :class:`pageplot.io.h5py.IOHDF5`. Masses are in Solar_Mass, temperatures
+    in K, densities in cm**-3, and coordinates in kpc.
+    """
+
+    rng = np.random.default_rng(seed)
+
+    with h5py.File(filename, "w") as handle:
+        group = handle.create_group("PartType0")
+
+        write_chunked(group, "Masses", rows, lognormal(8.0, 0.5), rng)
+        write_chunked(group, "Temperature", rows, lognormal(4.5, 1.0), rng)
+        write_chunked(group, "Density", rows, lognormal(-2.0, 1.5), rng)
+        write_chunked(
+            group,
+            "Coordinates",
+            rows,
+            lambda rng, rows: rng.uniform(0.0, 25000.0, size=(rows, 3)),
+            rng,
+            shape=(3,),
+        )
+
+    return Path(filename)
+
+
+def generate_arepo_subfind(
+    directory: Path,
+    rows: int,
+    number_of_files: int = 4,
+    empty_files: int = 1,
+    seed: int = 0,
+) -> Path:
+    """
+    Multi-file AREPO SubFind catalogue, read with
+    :class:`pageplot.io.areposubfind.IOAREPOSubFind`. Subhaloes are split
+    evenly between the files, apart from ``empty_files`` files (never the
+    first, which holds the metadata used by pageplot) that have headers but
+    no subhalo datasets. Includes the two dimensional ``*Type`` datasets.
+
+    Returns the filename of the first file.
+    """
+
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+
+    rng = np.random.default_rng(seed)
+
+    empty = set(range(1, 1 + empty_files))
+    full = [index for index in range(number_of_files) if index not in empty]
+    rows_in_file = np.diff(np.linspace(0, rows, len(full) + 1).astype(int))
+
+    for index in range(number_of_files):
+        with h5py.File(directory / f"fof_subhalo_tab_000.{index}.hdf5", "w") as handle:
+            handle.create_group("Header").attrs.update(AREPO_HEADER)
+            handle.create_group("Parameters").attrs.update(AREPO_PARAMETERS)
+
+            if index in empty:
+                continue
+
+            file_rows = rows_in_file[full.index(index)]
+            group = handle.create_group("Subhalo")
+
+            for name in ["SubhaloMass", "SubhaloBHMass", "SubhaloSFR"]:
+                write_chunked(group, name, file_rows, lognormal(0.0, 1.0), rng)
+
+            for name in ["SubhaloMassType", "SubhaloMassInRadType"]:
+                write_chunked(
+                    group, name, file_rows, lognormal(-1.0, 1.0, (6,)), rng, shape=(6,)
+                )
+
+            write_chunked(
+                group, "SubhaloHalfmassRad", file_rows, lognormal(0.5, 0.3), rng
+            )
+
+    return directory / "fof_subhalo_tab_000.0.hdf5"
+
+
+def generate_multi_snapshot(
+    directory: Path, rows: int, number_of_files: int = 4, seed: int = 0
+) -> List[Path]:
+    """
+    Set of snapshots (as from :func:`generate_snapshot`), with ``rows``
+    particles in total, for use with
+    :class:`pageplot.io.multi.MultiIOSpecification`.
+    """
+
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+
+    rows_in_file = np.diff(np.linspace(0, rows, number_of_files + 1).astype(int))
+
+    return [
+        generate_snapshot(directory / f"snapshot_{index}.hdf5", file_rows, seed + index)
+        for index, file_rows in enumerate(rows_in_file)
+    ]
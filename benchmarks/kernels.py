@@ -0,0 +1,305 @@
+"""
+Microbenchmarks of the compute kernels of the built-in extensions: the
+``preprocess`` of the median line, mean line, two dimensional histogram,
+and mass function extensions, and the ``blit`` (including drawing) of the
+scatter extension. Each is measured across the number of points, the
+number of bins, and linear or log spacing.
+
+Results are stored in ``benchmarks/results/kernels/{commit}.json``, and
+scaling plots (made with pageplot itself) in ``--output``. With
+``--check``, each case is compared against the stored baseline, and the
+script fails if any case is slower than the baseline by more than
+``--threshold``. Baselines are machine-specific, so create one with
+``--update-baseline`` before making changes.
+
+Usage (with pageplot installed)::
+
+    python benchmarks/kernels.py --sizes 1e3 1e4 1e5 1e6 --update-baseline
+    # ... make changes ...
+    python benchmarks/kernels.py --sizes 1e3 1e4 1e5 1e6 --check
+"""
+
+import argparse
+import json
+import shutil
+import sys
+from pathlib import Path
+from typing import Any, Dict, Iterator, List
+
+import h5py
+import numpy as np
+import unyt
+
+from common import (
+    compare_results,
+    load_results,
+    print_comparison,
+    store_results,
+    timed,
+)
+
+BASELINE = Path(__file__).parent / "baselines" / "kernels.json"
+
+# Limits of the generated data for each spacing.
+LIMITS = {"linear": [0.0, 1.0], "log": [1e-3, 1e3]}
+
+# The attribute holding the result of the preprocess of each kernel.
+OUTPUTS = {
+    "median_line": "values",
+    "mean_line": "values",
+    "two_dimensional_histogram": "grid",
+    "mass_function": "values",
+}
+
+
+def generate_data(rows: int, spacing: str, seed: int = 0):
+    """
+    Points uniformly distributed within the limits (in log space for log
+    spacing), with a y that is correlated with x, so that every bin is
+    populated.
+    """
+
+    rng = np.random.default_rng(seed)
+
+    if spacing == "linear":
+        x = rng.uniform(*LIMITS["linear"], size=rows)
+        y = x + rng.normal(0.0, 0.1, size=rows)
+    else:
+        log_limits = np.log10(LIMITS["log"])
+        x = 10.0 ** rng.uniform(*log_limits, size=rows)
+        y = x * 10.0 ** rng.normal(0.0, 0.3, size=rows)
+
+    return (
+        unyt.unyt_array(x, "Solar_Mass", name="x"),
+        unyt.unyt_array(y, "kpc", name="y"),
+    )
+
+
+def make_extension(kernel: str, bins: int, spacing: str, x, y):
+    """
+    Creates the extension for a kernel, on the given data.
+    """
+
+    from pageplot.config import GlobalConfig
+    from pageplot.extensions import built_in_extensions
+
+    limits = [f"{limit} Solar_Mass" for limit in LIMITS[spacing]]
+
+    parameters = {
+        "median_line": dict(limits=limits, bins=bins, spacing=spacing),
+        "mean_line": dict(limits=limits, bins=bins, spacing=spacing),
+        "two_dimensional_histogram": dict(
+            limits_x=limits,
+            limits_y=[f"{limit} kpc" for limit in LIMITS[spacing]],
+            bins=bins,
+            spacing_x=spacing,
+            spacing_y=spacing,
+        ),
+        # Mass functions are always log-spaced (so need positive limits); we
+        # use the spacing to choose between the fixed and adaptive bins
+        # instead.
+        "mass_function": dict(
+            limits=[f"{limit} Solar_Mass" for limit in LIMITS["log"]],
+            bins=bins,
+            adaptive=spacing == "log",
+            box_volume="1 Mpc**3",
+        ),
+        "scatter": dict(),
+    }[kernel]
+
+    return built_in_extensions[kernel](
+        name=kernel,
+        config=GlobalConfig(),
+        metadata=None,
+        x=x,
+        y=None if kernel == "mass_function" else y,
+        x_units=unyt.unyt_quantity(1.0, "Solar_Mass"),
+        y_units=unyt.unyt_quantity(
+            1.0, "Mpc**-3" if kernel == "mass_function" else "kpc"
+        ),
+        **parameters,
+    )
+
+
+def run_kernel(kernel: str, rows: int, bins: int, spacing: str) -> Dict[str, Any]:
+    x, y = generate_data(rows, "log" if kernel == "mass_function" else spacing)
+    extension = make_extension(kernel, bins, spacing, x, y)
+
+    # Repeat fast cases more, to beat down the noise.
+    repeat = int(np.clip(1e6 / rows, 1, 5))
+
+    if kernel == "scatter":
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+        from matplotlib.figure import Figure
+
+        def run():
+            fig = Figure()
+            FigureCanvasAgg(fig)
+            axes = fig.add_subplot()
+            extension.blit(fig=fig, axes=axes)
+            fig.canvas.draw()
+
+    else:
+        run = extension.preprocess
+
+        # Make sure that the case measures some actual work.
+        run()
+        output = np.asarray(getattr(extension, OUTPUTS[kernel]), dtype=np.float64)
+        assert np.isfinite(output).any() and output.any(), (
+            f"Empty output for {kernel} with {rows} rows, {bins} bins, and "
+            f"{spacing} spacing."
+        )
+
+    return dict(
+        kernel=kernel,
+        rows=rows,
+        bins=bins,
+        spacing=spacing,
+        wall_time=timed(run, repeat=repeat),
+    )
+
+
+def cases(sizes: List[int], bins: List[int], kernels: List[str]) -> Iterator[tuple]:
+    for kernel in kernels:
+        for spacing in ["linear", "log"]:
+            # Binning is irrelevant for scatter plots.
+            for number_of_bins in [bins[0]] if kernel == "scatter" else bins:
+                for rows in sizes:
+                    yield kernel, rows, number_of_bins, spacing
+
+
+def series_name(result: Dict[str, Any]) -> str:
+    return f"{result['kernel']}_{result['spacing']}_{result['bins']}"
+
+
+def make_scaling_plots(results: List[Dict[str, Any]], output_path: Path):
+    """
+    Plots the wall time against the number of points for each series of
+    results, using pageplot, with a webpage linking them together.
+    """
+
+    from pageplot.io.h5py import IOHDF5
+    from pageplot.runner import PagePlotRunner
+
+    output_path.mkdir(parents=True, exist_ok=True)
+
+    data_filename = output_path / "kernels.hdf5"
+    config_filename = output_path / "config.json"
+    plot_filename = output_path / "plots.json"
+
+    series: Dict[str, List[Dict[str, Any]]] = {}
+
+    for result in results:
+        series.setdefault(series_name(result), []).append(result)
+
+    plots = {}
+
+    with h5py.File(data_filename, "w") as handle:
+        for name, items in series.items():
+            group = handle.create_group(name)
+            group.create_dataset("rows", data=[item["rows"] for item in items])
+            group.create_dataset(
+                "wall_time", data=[item["wall_time"] for item in items]
+            )
+
+            kernel = items[0]["kernel"]
+
+            plots[f"scaling_{name}"] = {
+                "x": f"{name}/rows dimensionless",
+                "y": f"{name}/wall_time s",
+                "scatter": {},
+                "scale_axes": {"scale_x": "log", "scale_y": "log"},
+                "metadata": {
+                    "title": f"{kernel} ({items[0]['spacing']}, {items[0]['bins']} bins)",
+                    "caption": "Wall time against the number of points.",
+                    "section": kernel,
+                },
+            }
+
+    with open(config_filename, "w") as handle:
+        json.dump({}, handle)
+
+    with open(plot_filename, "w") as handle:
+        json.dump(plots, handle)
+
+    runner = PagePlotRunner(
+        config_filename=config_filename,
+        data=IOHDF5(filename=data_filename),
+        plot_filenames=[plot_filename],
+        output_path=output_path,
+    )
+    runner.create_figures()
+    runner.create_webpage()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "--sizes",
+        nargs="+",
+        type=float,
+        default=[1e3, 1e4, 1e5, 1e6],
+        help="Numbers of points (10^3 to 10^9).",
+    )
+    parser.add_argument("--bins", nargs="+", type=int, default=[10, 100])
+    parser.add_argument(
+        "--kernels",
+        nargs="+",
+        default=[
+            "median_line",
+            "mean_line",
+            "two_dimensional_histogram",
+            "mass_function",
+            "scatter",
+        ],
+    )
+    parser.add_argument("--output", type=Path, default=Path("kernel_benchmarks"))
+    parser.add_argument("--results", type=Path, default=None)
+    parser.add_argument("--baseline", type=Path, default=BASELINE)
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.2,
+        help="Fractional slow-down against the baseline that fails --check.",
+    )
+    parser.add_argument("--check", action="store_true")
+    parser.add_argument("--update-baseline", action="store_true")
+    args = parser.parse_args()
+
+    results = []
+
+    for kernel, rows, bins, spacing in cases(
+        [int(size) for size in args.sizes], args.bins, args.kernels
+    ):
+        result = run_kernel(kernel, rows, bins, spacing)
+        print(
+            f"{kernel:>26} {spacing:>6} {bins:>5d} bins {rows:>12d} rows: "
+            f"{result['wall_time']:10.5f} s"
+        )
+        results.append(result)
+
+    filename = store_results("kernels", results, args.results)
+    print(f"Results written to {filename}")
+
+    make_scaling_plots(results, args.output)
+    print(f"Scaling plots written to {args.output}")
+
+    if args.update_baseline:
+        args.baseline.parent.mkdir(parents=True, exist_ok=True)
+        shutil.copy(filename, args.baseline)
+        print(f"Baseline updated at {args.baseline}")
+
+    if args.check:
+        passed = print_comparison(
+            compare_results(
+                load_results(args.baseline),
+                load_results(filename),
+                threshold=args.threshold,
+            )
+        )
+
+        sys.exit(0 if passed else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""
+Benchmarks the native mass functions of ``pageplot.extensions.mass_function``
+against the ``velociraptor.tools.mass_functions`` implementation that they
+replace, for fixed and adaptive bins across the number of points and bins,
+and checks that both give identical results.
+
+Results are stored in ``benchmarks/results/mass_functions/{commit}.json``.
+
+Usage (with pageplot and velociraptor installed)::
+
+    python benchmarks/mass_functions.py --sizes 1e3 1e4 1e5 1e6
+"""
+
+import argparse
+import sys
+import warnings
+from typing import Any, Dict
+
+import numpy as np
+import unyt
+
+from common import store_results, timed
+
+LIMITS = [1e-3, 1e3]
+
+
+def generate_masses(rows: int, seed: int = 0) -> unyt.unyt_array:
+    """
+    A log-normal distribution of masses, so that the adaptive bins at the
+    ends of the range need widening.
+    """
+
+    rng = np.random.default_rng(seed)
+
+    return unyt.unyt_array(10.0 ** rng.normal(0.0, 1.0, size=rows), "Solar_Mass")
+
+
+def run_case(rows: int, bins: int, adaptive: bool) -> Dict[str, Any]:
+    from velociraptor.tools.mass_functions import (
+        create_adaptive_mass_function,
+        create_mass_function,
+    )
+
+    from pageplot.extensions.mass_function import (
+        MassFunctionCounts,
+        adaptive_mass_function,
+        fixed_mass_function,
+    )
+
+    masses = generate_masses(rows)
+    lowest_mass, highest_mass = [unyt.unyt_quantity(x, "Solar_Mass") for x in LIMITS]
+    box_volume = unyt.unyt_quantity(100.0, "Mpc**3")
+
+    def native():
+        counts = MassFunctionCounts.from_masses(
+            masses.value, *LIMITS, bins=bins, keep_masses=adaptive
+        )
+
+        if adaptive:
+            return adaptive_mass_function(
+                counts, box_volume.value, base_n_bins=bins, minimum_in_bin=3
+            )
+
+        return fixed_mass_function(counts, box_volume.value, minimum_in_bin=3)
+
+    def velociraptor():
+        common = dict(
+            masses=masses,
+            lowest_mass=lowest_mass.copy(),
+            highest_mass=highest_mass.copy(),
+            box_volume=box_volume,
+            minimum_in_bin=3,
+            return_bin_edges=True,
+        )
+
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+
+            if adaptive:
+                return create_adaptive_mass_function(**common, base_n_bins=bins)
+
+            return create_mass_function(**common, n_bins=bins)
+
+    identical = all(
+        np.array_equal(np.asarray(expected), actual)
+        for expected, actual in zip(velociraptor(), native())
+    )
+
+    repeat = int(np.clip(1e6 / rows, 1, 5))
+
+    return dict(
+        kernel="adaptive" if adaptive else "fixed",
+        rows=rows,
+        bins=bins,
+        native_time=timed(native, repeat=repeat),
+        velociraptor_time=timed(velociraptor, repeat=repeat),
+        identical=identical,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--sizes", nargs="+", type=float, default=[1e3, 1e4, 1e5, 1e6])
+    parser.add_argument("--bins", nargs="+", type=int, default=[10, 100])
+    parser.add_argument("--results", default=None)
+    args = parser.parse_args()
+
+    results = []
+
+    for adaptive in [False, True]:
+        for bins in args.bins:
+            for rows in [int(size) for size in args.sizes]:
+                result = run_case(rows, bins, adaptive)
+                print(
+                    f"{result['kernel']:>8} {bins:>5d} bins {rows:>12d} rows: "
+                    f"{result['native_time']:10.5f} s native, "
+                    f"{result['velociraptor_time']:10.5f} s velociraptor "
+                    f"({result['velociraptor_time'] / result['native_time']:7.1f}x)"
+                    f"{'' if result['identical'] else ' DIFFERENT RESULTS'}"
+                )
+                results.append(result)
+
+    filename = store_results("mass_functions", results, args.results)
+    print(f"Results written to {filename}")
+
+    sys.exit(0 if all(result["identical"] for result in results) else 1)
+
+
+if __name__ == "__main__":
+    main()
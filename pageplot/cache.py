@@ -0,0 +1,163 @@
+"""
+Persistent on-disk cache for the results of extension pre-processing.
+
+The expensive part of creating a figure is usually the ``preprocess`` step
+of the extensions (binning, histograms, mass functions), but its output is
+tiny. Here those outputs are stored on disk, keyed by a hash of everything
+that can change them: the extension parameters, the output units, the
+strings describing the input columns and mask, and a fingerprint of the
+data file(s) themselves.
+"""
+
+import hashlib
+import json
+import os
+from pathlib import Path
+from tempfile import NamedTemporaryFile
+from typing import Any, Dict, Optional
+
+import attr
+import numpy as np
+import unyt
+
+
+@attr.s(auto_attribs=True)
+class PreprocessCache:
+    """
+    Disk cache of pre-processed extension state, stored as one compressed
+    ``.npz`` file per entry. Entries are evicted, least recently used first,
+    once the total size of the cache exceeds ``max_size``.
+
+    Parameters
+    ----------
+
+    path: Path
+        Directory to store the cache in. Created if it does not exist, and
+        can safely be shared between many concurrent runs.
+
+    max_size: int, optional
+        Maximal size of the cache on disk in bytes. Defaults to 1 GB.
+    """
+
+    path: Path = attr.ib(converter=Path)
+    max_size: int = attr.ib(default=1024**3, converter=int)
+
+    def __attrs_post_init__(self):
+        self.path.mkdir(parents=True, exist_ok=True)
+
+    @staticmethod
+    def key(**parts: Any) -> str:
+        """
+        Creates the cache key from any number of (JSON-able, or convertable
+        to string) parts that uniquely define the pre-processed data.
+        """
+
+        encoded = json.dumps(parts, sort_keys=True, default=str)
+
+        return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+    def filename(self, key: str) -> Path:
+        return self.path / f"{key}.npz"
+
+    def load(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Loads the state associated with ``key``, returning ``None`` if
+        there is no (readable) entry.
+        """
+
+        filename = self.filename(key)
+
+        try:
+            with np.load(filename, allow_pickle=False) as handle:
+                description = json.loads(str(handle["__description__"]))
+
+                state = {}
+
+                for name, item in description.items():
+                    if "value" in item:
+                        state[name] = item["value"]
+                    elif item["units"] is None:
+                        state[name] = handle[name]
+                    else:
+                        state[name] = unyt.unyt_array(
+                            handle[name], item["units"], name=item["name"]
+                        )
+        except (OSError, KeyError, ValueError):
+            # Missing, or partially written by a process that died.
+            return None
+
+        # Mark as recently used for the eviction policy.
+        try:
+            os.utime(filename)
+        except OSError:
+            pass
+
+        return state
+
+    def store(self, key: str, state: Dict[str, Any]):
+        """
+        Stores ``state`` (a dictionary of unyt arrays, numpy arrays, or
+        JSON-serializable values) under ``key``, and evicts old entries
+        if required.
+        """
+
+        arrays = {}
+        description = {}
+
+        for name, value in state.items():
+            if isinstance(value, unyt.unyt_array):
+                arrays[name] = value.d
+                description[name] = {
+                    "units": str(value.units),
+                    "name": getattr(value, "name", None),
+                }
+            elif isinstance(value, np.ndarray):
+                arrays[name] = value
+                description[name] = {"units": None}
+            else:
+                description[name] = {"value": value}
+
+        arrays["__description__"] = np.array(json.dumps(description))
+
+        # Write to a temporary file and move, so that concurrent readers
+        # never see a partially written entry.
+        with NamedTemporaryFile(dir=self.path, suffix=".tmp", delete=False) as handle:
+            np.savez_compressed(handle, **arrays)
+
+        os.replace(handle.name, self.filename(key))
+
+        self.evict()
+
+        return
+
+    def evict(self):
+        """
+        Removes the least recently used entries until the cache fits
+        within ``max_size``.
+        """
+
+        entries = []
+
+        for entry in os.scandir(self.path):
+            if entry.name.endswith(".npz"):
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+
+        total_size = sum(size for _, size, _ in entries)
+
+        for _, size, path in sorted(entries):
+            if total_size <= self.max_size:
+                break
+
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+            total_size -= size
+
+        return
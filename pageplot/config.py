@@ -4,13 +4,18 @@ full run of PlotPage.
 """
 
 from pathlib import Path
-from typing import Any, Dict, Optional
+from typing import TYPE_CHECKING, Any, Dict, Optional, Tuple
 
 import attr
 import unyt
-from matplotlib.pyplot import style
 
+from pageplot.cache import PreprocessCache
 from pageplot.configextension import ConfigExtension
+from pageplot.figures import FigureTemplate
+
+if TYPE_CHECKING:
+    from matplotlib.axes import Axes
+    from matplotlib.figure import Figure
 
 
 @attr.s(auto_attribs=True)
@@ -37,6 +42,34 @@ class GlobalConfig:
     extensions: Dict[str, Dict[str, Any]]
         Config extension data. Additional extensions may be passed to
         the ``run_extensions`` method.
+
+    preprocess_cache_path: Path, optional
+        Directory for the on-disk cache of extension pre-processing
+        results. Re-running a plot (or another plot) with identical
+        extension parameters and input data re-uses the stored result
+        instead of re-binning. No caching is performed if this is not set.
+
+    preprocess_cache_size: int, optional
+        Maximal size of the pre-processing cache in bytes. The least
+        recently used entries are removed beyond this. Defaults to 1 GB.
+
+    png_compression: int, optional
+        zlib compression level (0-9) of PNG figures. Lower levels are much
+        faster to write, but give larger files. Defaults to 6.
+
+    webp_lossless: bool, optional
+        Write WebP figures (with a ``webp`` file extension) losslessly.
+        Defaults to True.
+
+    dpi: float, optional
+        Resolution of the figures. Defaults to the ``savefig.dpi`` of the
+        stylesheet.
+
+    thumbnail_width: int, optional
+        If given, a thumbnail of each figure of this width (in pixels) is
+        written alongside it, as ``{name}_thumbnail.{extension}`` (a PNG for
+        vector formats), and used on the webpage; the full resolution
+        figures are then only loaded when clicked on.
     """
 
     stylesheet: Optional[Path] = None
@@ -46,9 +79,30 @@ class GlobalConfig:
 
     extensions: Dict[str, Dict[str, Any]] = {}
 
+    preprocess_cache_path: Optional[Path] = None
+    preprocess_cache_size: int = attr.ib(default=1024**3, converter=int)
+
+    png_compression: int = attr.ib(
+        default=6, converter=int, validator=attr.validators.in_(range(10))
+    )
+    webp_lossless: bool = True
+    dpi: Optional[float] = attr.ib(
+        default=None, converter=attr.converters.optional(float)
+    )
+    thumbnail_width: Optional[int] = attr.ib(
+        default=None, converter=attr.converters.optional(int)
+    )
+
+    preprocess_cache: Optional[PreprocessCache] = attr.ib(init=False, default=None)
+    figure_template: Optional[FigureTemplate] = attr.ib(
+        init=False, default=None, repr=False, eq=False
+    )
+
     def __attrs_post_init__(self):
         # Use the stylesheet
         if self.stylesheet is not None:
+            from matplotlib import style
+
             style.use(self.stylesheet)
 
         # Should we be using unyt support?
@@ -58,6 +112,23 @@ class GlobalConfig:
         else:
             unyt.matplotlib_support.disable()
 
+        if self.preprocess_cache_path is not None:
+            self.preprocess_cache = PreprocessCache(
+                path=self.preprocess_cache_path, max_size=self.preprocess_cache_size
+            )
+
+    def create_figure(self) -> Tuple["Figure", "Axes"]:
+        """
+        Creates a new, empty, figure and axes in the style of the stylesheet,
+        without using pyplot. The styled template is built on first use, and
+        cloned for every subsequent figure.
+        """
+
+        if self.figure_template is None:
+            self.figure_template = FigureTemplate()
+
+        return self.figure_template.create()
+
     @unyt_label_style.validator
     def _check_valid_label_style(self, _, value):
         if value not in ["[]", "()", "/"]:
@@ -70,6 +141,10 @@ class GlobalConfig:
         Sets up the internal extensions and affixes them to the
         object. Allows for additional extensions to be ran.
 
+        Registered extensions (built in, or from plugins) that are not
+        given any configuration in ``extensions`` are only imported and
+        created when they are first accessed.
+
         Parameters
         ----------
 
@@ -79,14 +154,39 @@ class GlobalConfig:
             after any internal extensions.
         """
 
-        from pageplot.extensions import built_in_config_extensions
+        from pageplot.plugins import config_extension_registry
 
         if additional_extensions is None:
             additional_extensions = {}
 
-        combined_extensions = {**built_in_config_extensions, **additional_extensions}
+        registered_extensions = config_extension_registry()
 
-        for name, Extension in combined_extensions.items():
+        for name in self.extensions.keys():
+            if name in registered_extensions and name not in additional_extensions:
+                setattr(
+                    self, name, registered_extensions[name](**self.extensions[name])
+                )
+
+        for name, Extension in additional_extensions.items():
             setattr(self, name, Extension(**self.extensions.get(name, {})))
 
         return
+
+    def __getattr__(self, name: str) -> ConfigExtension:
+        # Only called when normal attribute lookup fails; creates registered
+        # configuration extensions on first access.
+        from pageplot.plugins import config_extension_registry
+
+        registered_extensions = config_extension_registry()
+
+        if name.startswith("_") or name not in registered_extensions:
+            raise AttributeError(
+                f"{type(self).__name__!r} object has no attribute {name!r}"
+            )
+
+        extension = registered_extensions[name](
+            **self.__dict__.get("extensions", {}).get(name, {})
+        )
+        setattr(self, name, extension)
+
+        return extension
@@ -22,3 +22,10 @@ class PagePlotMissingMetadataError(Exception):
         self.obj = (obj,)
         self.message = message
         super().__init__(self.message)
+
+
+class PagePlotWriteError(Exception):
+    def __init__(self, failures, message):
+        self.failures = failures
+        self.message = message
+        super().__init__(self.message)
@@ -3,16 +3,18 @@ Model for extensions that perform plotting and
 data production duties.
 """
 
-from typing import Any, Dict, Optional
+from typing import TYPE_CHECKING, Any, ClassVar, Dict, Iterator, Optional, Tuple
 
 import attr
-import matplotlib.pyplot as plt
 import unyt
-from attr.setters import convert
 
 from pageplot.config import GlobalConfig
 from pageplot.io.spec import MetadataSpecification
 
+if TYPE_CHECKING:
+    from matplotlib.axes import Axes
+    from matplotlib.figure import Figure
+
 
 @attr.s(auto_attribs=True)
 class PlotExtension:
@@ -31,6 +33,17 @@ class PlotExtension:
     ``serialize``, which serializes the data to a dictionary for
     writing to disk.
 
+    ``additional_outputs``, which produces any files to write alongside
+    the figure (e.g. image tiles).
+
+    Extensions that list the attributes set by ``preprocess`` in
+    ``preprocess_state`` can have those results restored from the
+    :class:`PreprocessCache` instead of re-computing them. Extensions that
+    never touch the x, y, and z data should set ``requires_data`` to
+    ``False`` so that they do not trigger any reads, and those that draw
+    the data itself (rather than only their pre-processed results) should
+    set ``blit_requires_data`` to ``True``.
+
     Parameters
     ----------
 
@@ -72,6 +85,14 @@ class PlotExtension:
     y_units: unyt.unyt_quantity = unyt.dimensionless
     z_units: unyt.unyt_quantity = unyt.dimensionless
 
+    # Attributes created by ``preprocess`` that fully describe its result.
+    preprocess_state: ClassVar[Tuple[str, ...]] = ()
+    # Whether the x, y, and z data are used at all.
+    requires_data: ClassVar[bool] = True
+    # Whether ``blit`` uses the x, y, and z data, so that they must be read
+    # even when the ``preprocess_state`` is restored.
+    blit_requires_data: ClassVar[bool] = False
+
     # You should load the data from your JSON configuration here,
     # for example:
     # nbins: int = 25
@@ -91,14 +112,14 @@ class PlotExtension:
 
         return
 
-    def blit(self, fig: plt.Figure, axes: plt.Axes):
+    def blit(self, fig: "Figure", axes: "Axes"):
         """
         Your (one and only) chance to directly affect the figure.
 
-        fig: plt.Figure
+        fig: Figure
             The figure object associated with this matplotlib plot.
 
-        axes: plt.Axes
+        axes: Axes
             The axes to draw on for this matplotlib plot.
         """
 
@@ -112,3 +133,33 @@ class PlotExtension:
         """
 
         return None
+
+    def additional_outputs(self) -> Iterator[Tuple[str, bytes]]:
+        """
+        Files to write alongside the figure, as pairs of their names and
+        contents. These are written (through the output sink) by the
+        :class:`PlotModel`, prefixed by the names of the plot and the
+        extension; see :meth:`PlotModel.write_additional_outputs`.
+        Generating them lazily keeps only one in memory at a time.
+        """
+
+        return iter(())
+
+    def get_preprocess_state(self) -> Dict[str, Any]:
+        """
+        Returns the attributes listed in ``preprocess_state``, for storage
+        in the pre-processing cache.
+        """
+
+        return {name: getattr(self, name) for name in self.preprocess_state}
+
+    def set_preprocess_state(self, state: Dict[str, Any]):
+        """
+        Restores the state returned by ``get_preprocess_state``, taking
+        the place of a call to ``preprocess``.
+        """
+
+        for name in self.preprocess_state:
+            setattr(self, name, state[name])
+
+        return
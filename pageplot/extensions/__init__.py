@@ -1,41 +1,90 @@
 """
 Built in extensions.
+
+Extensions are resolved lazily from a name-to-module registry, so that
+only the modules (and heavy third-party dependencies, like velociraptor)
+of the extensions that are actually used are ever imported.
 """
 
-from pageplot.extensions.mean_line import MeanLineExtension
-from pageplot.extensions.metadata import MetadataExtension
-from pageplot.extensions.legend import LegendExtension
-from pageplot.extensions.velociraptor_data import (
-    VelociraptorDataConfigExtension,
-    VelociraptorDataExtension,
+from importlib import import_module
+from typing import Dict, Iterator, Mapping, Type
+
+
+class LazyExtensionRegistry(Mapping):
+    """
+    Ordered mapping between extension names and extension classes. The
+    classes are specified as ``"module:ClassName"`` strings, and are only
+    imported on first access.
+
+    Parameters
+    ----------
+
+    locations: Dict[str, str]
+        Ordered dictionary of extension names to ``"module:ClassName"``
+        import locations.
+    """
+
+    def __init__(self, locations: Dict[str, str]):
+        self.locations = locations
+        self.loaded: Dict[str, Type] = {}
+
+    def __getitem__(self, name: str) -> Type:
+        if name not in self.loaded:
+            module, _, attribute = self.locations[name].partition(":")
+            self.loaded[name] = getattr(import_module(module), attribute)
+
+        return self.loaded[name]
+
+    def __contains__(self, name) -> bool:
+        # Mapping's default implementation would import the extension.
+        return name in self.locations
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.locations)
+
+    def __len__(self) -> int:
+        return len(self.locations)
+
+
+built_in_extensions = LazyExtensionRegistry(
+    {
+        "scatter": "pageplot.extensions.scatter:ScatterExtension",
+        "two_dimensional_histogram": "pageplot.extensions.two_dimensional_histogram:TwoDimensionalHistogramExtension",
+        # Ensure that 'background' items are performed before 'foreground'
+        # items to avoid zorder clashes.
+        "mass_function": "pageplot.extensions.mass_function:MassFunctionExtension",
+        "median_line": "pageplot.extensions.median_line:MedianLineExtension",
+        "mean_line": "pageplot.extensions.mean_line:MeanLineExtension",
+        "velociraptor_data": "pageplot.extensions.velociraptor_data:VelociraptorDataExtension",
+        # Finally, put 'global' extensions, like the ones that
+        # change plot limits and so on.
+        "scale_axes": "pageplot.extensions.scale_axes:ScaleAxesExtension",
+        "axes_limits": "pageplot.extensions.axes_limits:AxesLimitsExtension",
+        "legend": "pageplot.extensions.legend:LegendExtension",
+        "metadata": "pageplot.extensions.metadata:MetadataExtension",
+    }
 )
-from pageplot.extensions.scatter import ScatterExtension
-from pageplot.extensions.median_line import MedianLineExtension
-from pageplot.extensions.two_dimensional_histogram import (
-    TwoDimensionalHistogramExtension,
+
+
+built_in_config_extensions = LazyExtensionRegistry(
+    {
+        "velociraptor_data": "pageplot.extensions.velociraptor_data:VelociraptorDataConfigExtension",
+    }
 )
-from pageplot.extensions.mass_function import MassFunctionExtension
-from pageplot.extensions.scale_axes import ScaleAxesExtension
-from pageplot.extensions.axes_limits import AxesLimitsExtension
-
-built_in_extensions = {
-    "scatter": ScatterExtension,
-    "two_dimensional_histogram": TwoDimensionalHistogramExtension,
-    # Ensure that 'background' items are performed before 'foreground'
-    # items to avoid zorder clashes.
-    "mass_function": MassFunctionExtension,
-    "median_line": MedianLineExtension,
-    "mean_line": MeanLineExtension,
-    "velociraptor_data": VelociraptorDataExtension,
-    # Finally, put 'global' extensions, like the ones that
-    # change plot limits and so on.
-    "scale_axes": ScaleAxesExtension,
-    "axes_limits": AxesLimitsExtension,
-    "legend": LegendExtension,
-    "metadata": MetadataExtension,
-}
 
 
-built_in_config_extensions = {
-    "velociraptor_data": VelociraptorDataConfigExtension,
+# Allow for e.g. ``from pageplot.extensions import ScatterExtension``.
+_class_locations = {
+    location.partition(":")[2]: location
+    for registry in [built_in_extensions, built_in_config_extensions]
+    for location in registry.locations.values()
 }
+
+
+def __getattr__(name: str):
+    try:
+        module, _, attribute = _class_locations[name].partition(":")
+    except KeyError:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    return getattr(import_module(module), attribute)
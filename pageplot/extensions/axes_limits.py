@@ -4,11 +4,12 @@ as well as being used to set the units on those
 axes.
 """
 
-from typing import List, Union
+from typing import Any, ClassVar, Dict, List, Union
 
 import attr
 import unyt
-from matplotlib.pyplot import Axes, Figure
+from matplotlib.axes import Axes
+from matplotlib.figure import Figure
 
 from pageplot.exceptions import PagePlotParserError
 from pageplot.extensionmodel import PlotExtension
@@ -22,6 +23,8 @@ class AxesLimitsExtension(PlotExtension):
     figure will be displayed in.
     """
 
+    requires_data: ClassVar[bool] = False
+
     limits_x: List[Union[str, unyt.unyt_quantity, unyt.unyt_array, None]] = attr.ib(
         default=[None, None], converter=quantity_list_validator
     )
@@ -43,3 +46,16 @@ class AxesLimitsExtension(PlotExtension):
         #         + "limits at the end of your JSON, and verify that your data is not "
         #         + "empty.",
         #     )
+
+    def serialize(self) -> Dict[str, Any]:
+        """
+        The limits, in the output units of the plot where they are given.
+        """
+
+        def convert(limits, units):
+            return [None if limit is None else limit.to(units) for limit in limits]
+
+        return {
+            "limits_x": convert(self.limits_x, self.x_units.units),
+            "limits_y": convert(self.limits_y, self.y_units.units),
+        }
@@ -2,12 +2,217 @@
 Styling of the legend. Overwrites stylesheet behaviours.
 """
 
-from typing import Optional, Union
+from typing import ClassVar, List, Optional, Union
 
 import attr
-from matplotlib.pyplot import Axes, Figure
+import numpy as np
+from matplotlib.axes import Axes
+from matplotlib.collections import Collection, QuadMesh
+from matplotlib.figure import Figure
+from matplotlib.legend import Legend
+from matplotlib.lines import Line2D
+from matplotlib.patches import Patch
+from matplotlib.spines import Spine
 
 from pageplot.extensionmodel import PlotExtension
+from pageplot.extensions.scatter import ScatterDensityImage
+
+# Locations in the order that matplotlib tries them for ``loc="best"``, with
+# the (x, y) fractions of the free space at which the legend is anchored.
+LOCATIONS = {
+    "upper right": (1.0, 1.0),
+    "upper left": (0.0, 1.0),
+    "lower left": (0.0, 0.0),
+    "lower right": (1.0, 0.0),
+    "right": (1.0, 0.5),
+    "center left": (0.0, 0.5),
+    "center right": (1.0, 0.5),
+    "lower center": (0.5, 0.0),
+    "upper center": (0.5, 1.0),
+    "center": (0.5, 0.5),
+}
+
+# Maximal number of points sampled from any one artist.
+MAXIMAL_SAMPLES = 16384
+
+
+def sample_points(points: np.ndarray) -> np.ndarray:
+    """
+    Evenly strided sample of at most ``MAXIMAL_SAMPLES`` of the points.
+    """
+
+    stride = max(len(points) // MAXIMAL_SAMPLES, 1)
+
+    return points[::stride]
+
+
+def sample_segments(points: np.ndarray, resolution: int) -> np.ndarray:
+    """
+    Points along the line segments joining the given (axes fraction) points,
+    spaced by at most one cell of a grid with ``resolution`` cells per axis.
+    """
+
+    points = points[np.isfinite(points).all(axis=1)]
+
+    if len(points) < 2:
+        return points
+
+    start = points[:-1]
+    offset = points[1:] - start
+
+    steps = np.ceil(np.hypot(*offset.T) * resolution).astype(np.int64) + 1
+    # Segments far outside of the axes do not need to be followed closely.
+    steps = np.minimum(steps, 4 * resolution)
+
+    segment = np.repeat(np.arange(len(start)), steps)
+    first = np.repeat(np.cumsum(steps) - steps, steps)
+    fraction = (np.arange(len(segment)) - first) / np.repeat(
+        np.maximum(steps - 1, 1), steps
+    )
+
+    return start[segment] + offset[segment] * fraction[:, None]
+
+
+def occupancy_grid(axes: Axes, resolution: int) -> np.ndarray:
+    """
+    Coarse (``resolution`` by ``resolution``) grid, in axes fractions, of how
+    crowded each part of the axes is: every drawn point counts towards its
+    cell (weighted to account for subsampling), and lines and the edges of
+    shaded regions count along their length. Backgrounds (histograms) are
+    ignored, as they are with matplotlib's own ``loc="best"``.
+    """
+
+    # Apply any pending autoscaling, so that the data are mapped through the
+    # final view limits (as they are when drawn), rather than the stale ones.
+    axes.autoscale_view()
+
+    to_axes = axes.transAxes.inverted()
+    samples: List[np.ndarray] = []
+    weights: List[np.ndarray] = []
+
+    def add(points: np.ndarray, weight: float = 1.0):
+        samples.append(points)
+        weights.append(np.full(len(points), weight))
+
+    for artist in axes.get_children():
+        if not artist.get_visible():
+            continue
+
+        if isinstance(artist, Line2D):
+            points = (artist.get_transform() + to_axes).transform(artist.get_xydata())
+
+            add(sample_segments(points, resolution))
+        elif isinstance(artist, ScatterDensityImage):
+            points = sample_points(artist.points)
+
+            add(
+                (axes.transData + to_axes).transform(points),
+                len(artist.points) / max(len(points), 1),
+            )
+        elif isinstance(artist, Patch) and not isinstance(artist, Spine):
+            path = artist.get_transform().transform_path(artist.get_path())
+
+            add(sample_segments(to_axes.transform(path.vertices), resolution))
+        elif isinstance(artist, Collection) and not isinstance(artist, QuadMesh):
+            offsets = artist.get_offsets()
+
+            if len(offsets) > 1:
+                points = sample_points(np.asarray(offsets, dtype=np.float64))
+
+                add(
+                    (artist.get_offset_transform() + to_axes).transform(points),
+                    len(offsets) / max(len(points), 1),
+                )
+            else:
+                transform = artist.get_transform() + to_axes
+
+                for path in artist.get_paths():
+                    add(sample_segments(transform.transform(path.vertices), resolution))
+
+    grid = np.zeros((resolution, resolution))
+
+    if not samples:
+        return grid
+
+    points = np.concatenate(samples)
+    weight = np.concatenate(weights)
+
+    with np.errstate(invalid="ignore"):
+        cells = np.floor(points * resolution)
+
+    inside = np.isfinite(cells).all(axis=1) & (cells >= 0).all(axis=1)
+    inside &= (cells < resolution).all(axis=1)
+    cells = cells[inside].astype(np.int64)
+
+    grid += np.bincount(
+        cells[:, 1] * resolution + cells[:, 0],
+        weights=weight[inside],
+        minlength=resolution * resolution,
+    ).reshape(resolution, resolution)
+
+    return grid
+
+
+def best_location(axes: Axes, legend: Legend, resolution: int = 128) -> str:
+    """
+    Finds the least crowded location for the legend, the equivalent of
+    matplotlib's ``loc="best"``, but from the occupancy grid of the axes
+    (see :func:`occupancy_grid`) rather than by testing every vertex of every
+    artist against the legend box, which is very slow for large scatter plots.
+    """
+
+    grid = occupancy_grid(axes, resolution)
+
+    # Summed area table, for the total in any block of cells.
+    table = np.zeros((resolution + 1, resolution + 1))
+    table[1:, 1:] = grid.cumsum(axis=0).cumsum(axis=1)
+
+    legend_box = legend.get_window_extent()
+    axes_box = axes.bbox
+
+    width = legend_box.width / axes_box.width
+    height = legend_box.height / axes_box.height
+
+    pad = legend.borderaxespad * legend.prop.get_size_in_points() * axes.figure.dpi / 72
+    pad_x = pad / axes_box.width
+    pad_y = pad / axes_box.height
+
+    def to_cell(fraction: float) -> int:
+        return int(np.clip(round(fraction * resolution), 0, resolution))
+
+    best, lowest = "upper right", np.inf
+
+    for name, (anchor_x, anchor_y) in LOCATIONS.items():
+        x0 = pad_x + anchor_x * (1.0 - 2.0 * pad_x - width)
+        y0 = pad_y + anchor_y * (1.0 - 2.0 * pad_y - height)
+
+        left, right = to_cell(x0), to_cell(x0 + width)
+        bottom, top = to_cell(y0), to_cell(y0 + height)
+
+        badness = (
+            table[top, right]
+            - table[bottom, right]
+            - table[top, left]
+            + table[bottom, left]
+        )
+
+        # Ties go to the first location, as with matplotlib.
+        if badness < lowest:
+            best, lowest = name, badness
+
+    return best
+
+
+def set_location(legend: Legend, location: str):
+    """
+    Moves an existing legend to the given location.
+    """
+
+    if hasattr(legend, "set_loc"):
+        legend.set_loc(location)
+    else:
+        # Matplotlib before 3.8 has no public setter.
+        legend._loc = Legend.codes[location]
 
 
 @attr.s(auto_attribs=True)
@@ -15,15 +220,42 @@ class LegendExtension(PlotExtension):
     """
     Adds a legend to the plot, with basic styling
     options.
+
+    Parameters
+    ----------
+
+    on: bool, optional
+        Whether to show the legend. Defaults to True.
+
+    frame_on: bool, optional
+        Override for the stylesheet's choice of legend frame.
+
+    loc: Union[str, int], optional
+        Location of the legend, as for matplotlib. The default, ``best``,
+        places the legend in the least crowded location, found from a coarse
+        occupancy grid of the axes, and is fast even with millions of points.
+
+    exact_best: bool, optional
+        Use matplotlib's own (exact, but slow for large plots) placement for
+        ``loc="best"`` instead. Defaults to False.
     """
 
+    requires_data: ClassVar[bool] = False
+
     on: bool = True
     frame_on: Optional[bool] = None
     loc: Union[str, int] = "best"
+    exact_best: bool = False
 
     def blit(self, fig: Figure, axes: Axes):
         if self.on:
-            axes.legend(
-                frameon=self.frame_on,
-                loc=self.loc,
-            )
+            if self.loc != "best" or self.exact_best:
+                axes.legend(
+                    frameon=self.frame_on,
+                    loc=self.loc,
+                )
+
+                return
+
+            legend = axes.legend(frameon=self.frame_on, loc="upper right")
+            set_location(legend, best_location(axes, legend))
@@ -1,17 +1,21 @@
 """
 Basic mass function extension.
+
+The mass functions are calculated natively (rather than with
+``velociraptor.tools.mass_functions``, whose results they reproduce) from
+:class:`MassFunctionCounts`: the masses within the limits are sorted once,
+and both the fixed and adaptive bins are then found by binary search.
+Counts can be made for each part of the data (e.g. each file of a
+multi-file catalogue) separately and merged.
 """
 
-from typing import Any, Callable, Dict, List, Union
+from typing import Any, Callable, ClassVar, Dict, List, Optional, Tuple, Union
 
 import attr
 import numpy as np
 import unyt
-from matplotlib.pyplot import Axes, Figure
-from velociraptor.tools.mass_functions import (
-    create_adaptive_mass_function,
-    create_mass_function,
-)
+from matplotlib.axes import Axes
+from matplotlib.figure import Figure
 
 from pageplot.exceptions import (
     PagePlotIncompatbleExtension,
@@ -23,8 +27,289 @@ from pageplot.validators import (
     quantity_list_validator,
 )
 
-# This should be removed in later versions as this dependency is _not_ necessary
-# as the code should be moved over to this library anyway.
+# Name of the mass function values, as velociraptor gives them.
+MASS_FUNCTION_LABEL = r"d$n(M_{})$/d$\log_{10}M_{}$"
+
+
+@attr.s(auto_attribs=True)
+class MassFunctionCounts:
+    """
+    Counts of masses in (fixed, log-spaced) bins, and the sorted masses
+    within the limits, from which mass functions are made (see
+    :func:`fixed_mass_function` and :func:`adaptive_mass_function`).
+
+    Counts of parts of the data can be made separately (with
+    :meth:`from_masses`) and merged (with :meth:`merge`, or ``+``); the
+    result is the same as counting all of the data at once.
+
+    Parameters
+    ----------
+
+    limits: Tuple[float, float]
+        The lowest and highest masses included.
+
+    edges: np.ndarray
+        Edges of the fixed bins, equally spaced in log mass between the
+        limits.
+
+    counts: np.ndarray
+        Number of masses in each fixed bin (the last of which includes its
+        right edge, as ``np.histogram``).
+
+    sorted_masses: np.ndarray, optional
+        The masses within the limits, sorted; needed for adaptive bins.
+    """
+
+    limits: Tuple[float, float]
+    edges: np.ndarray
+    counts: np.ndarray
+    sorted_masses: Optional[np.ndarray] = None
+
+    @classmethod
+    def from_masses(
+        cls,
+        masses: np.ndarray,
+        lowest_mass: float,
+        highest_mass: float,
+        bins: int,
+        keep_masses: bool = True,
+    ) -> "MassFunctionCounts":
+        """
+        Counts the masses (all in the same units as the limits) in ``bins``
+        bins equally spaced in log mass.
+
+        Parameters
+        ----------
+
+        masses: np.ndarray
+            Masses to count.
+
+        lowest_mass, highest_mass: float
+            Limits of the bins.
+
+        bins: int
+            Number of fixed bins.
+
+        keep_masses: bool, optional
+            Keep the sorted masses, as needed for adaptive bins. Defaults to
+            ``True``.
+        """
+
+        masses = np.asarray(masses)
+
+        edges = np.logspace(np.log10(lowest_mass), np.log10(highest_mass), bins + 1)
+
+        if not keep_masses:
+            # Fixed bins alone do not need the masses sorted as a whole.
+            return cls(
+                limits=(lowest_mass, highest_mass),
+                edges=edges,
+                counts=np.histogram(masses, edges)[0],
+            )
+
+        # The only sort of the masses; everything else is a binary search.
+        sorted_masses = np.sort(
+            masses[(masses >= lowest_mass) & (masses <= highest_mass)]
+        )
+
+        return cls(
+            limits=(lowest_mass, highest_mass),
+            edges=edges,
+            counts=sorted_counts(sorted_masses, edges),
+            sorted_masses=sorted_masses,
+        )
+
+    def merge(self, other: "MassFunctionCounts") -> "MassFunctionCounts":
+        """
+        Combines the counts of two parts of the data, which must have been
+        counted in the same bins.
+        """
+
+        if self.limits != other.limits or not np.array_equal(self.edges, other.edges):
+            raise ValueError("Only counts in the same bins can be merged.")
+
+        if self.sorted_masses is None or other.sorted_masses is None:
+            sorted_masses = None
+        else:
+            # Sorting two sorted runs with the (timsort) stable sort is a
+            # linear time merge.
+            sorted_masses = np.sort(
+                np.concatenate([self.sorted_masses, other.sorted_masses]),
+                kind="stable",
+            )
+
+        return MassFunctionCounts(
+            limits=self.limits,
+            edges=self.edges,
+            counts=self.counts + other.counts,
+            sorted_masses=sorted_masses,
+        )
+
+    def __add__(self, other: "MassFunctionCounts") -> "MassFunctionCounts":
+        return self.merge(other)
+
+
+def sorted_counts(sorted_values: np.ndarray, edges: np.ndarray) -> np.ndarray:
+    """
+    Histogram of already sorted values, with the same (half-open, apart from
+    the last) bins as ``np.histogram``, by binary search of the edges.
+    """
+
+    positions = np.concatenate(
+        [
+            np.searchsorted(sorted_values, edges[:-1], side="left"),
+            np.searchsorted(sorted_values, edges[-1:], side="right"),
+        ]
+    )
+
+    return np.diff(positions)
+
+
+def fixed_mass_function(
+    counts: MassFunctionCounts, box_volume: float, minimum_in_bin: int = 3
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Mass function in the fixed bins of the counts, normalised per unit log
+    mass and per unit (box) volume, with Poisson errors. Bins with fewer than
+    ``minimum_in_bin`` masses are left out.
+
+    Returns
+    -------
+
+    centers, values, errors: np.ndarray
+        The (linear) centers of the valid bins, and the mass function and its
+        errors in them.
+
+    edges: np.ndarray
+        All of the bin edges (including those of invalid bins).
+    """
+
+    edges = counts.edges
+    normalization = 1.0 / ((np.log10(edges[1]) - np.log10(edges[0])) * box_volume)
+
+    valid = counts.counts >= minimum_in_bin
+    centers = 0.5 * (edges[1:] + edges[:-1])
+
+    return (
+        centers[valid],
+        (counts.counts * normalization)[valid],
+        (np.sqrt(counts.counts) * normalization)[valid],
+        edges,
+    )
+
+
+def adaptive_mass_function(
+    counts: MassFunctionCounts,
+    box_volume: float,
+    base_n_bins: int = 25,
+    minimum_in_bin: int = 3,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Mass function in adaptive bins: at least ``(log10(highest) -
+    log10(lowest)) / base_n_bins`` wide in log mass, and widened until they
+    hold more than ``minimum_in_bin`` masses, normalised per unit log mass
+    and per unit (box) volume, with Poisson errors.
+
+    This reproduces ``velociraptor.tools.mass_functions``'s
+    ``create_adaptive_mass_function`` exactly, including its treatment of
+    the final bin (merged into the one before if it would hold only one
+    mass) and its medians (which include the final mass of the previous
+    bin), but each bin edge is found by binary search of the sorted masses
+    rather than by walking through them.
+
+    Returns
+    -------
+
+    centers, values, errors: np.ndarray
+        The median masses of the bins, and the mass function and its errors
+        in them.
+
+    edges: np.ndarray
+        The left and right edges of each bin, as a 2 by N array.
+    """
+
+    lowest_mass, highest_mass = counts.limits
+    log_masses = np.log10(counts.sorted_masses)
+    # Comparisons against the (float64) edges, as for numpy scalars.
+    search_masses = log_masses.astype(np.float64, copy=False)
+    number = len(log_masses)
+
+    width = (np.log10(highest_mass) - np.log10(lowest_mass)) / base_n_bins
+
+    def median(start: int, stop: int):
+        # As np.median, but the masses are already sorted.
+        length = stop - start
+        middle = start + (length - 1) // 2
+
+        return np.mean(log_masses[middle : start + length // 2 + 1])
+
+    lefts = [np.log10(lowest_mass)]
+    rights = []
+    medians = []
+    number_in_bin = []
+
+    # Index of the first mass in the current bin, and of the first mass
+    # included in its median.
+    first = 0
+    median_start = 0
+
+    while True:
+        # Bins end at the first mass beyond the minimum width, once they
+        # hold more than minimum_in_bin masses.
+        last = max(
+            int(np.searchsorted(search_masses, lefts[-1] + width, side="left")),
+            first + minimum_in_bin,
+        )
+
+        if last >= number:
+            break
+
+        medians.append(median(median_start, last + 1))
+
+        if last + 1 < number:
+            edge = 0.5 * (log_masses[last + 1] + log_masses[last])
+        else:
+            edge = log_masses[last]
+
+        rights.append(edge)
+        lefts.append(edge)
+        number_in_bin.append(last - first + 1)
+
+        first = last + 1
+        median_start = last
+
+    remaining = number - first
+
+    if remaining > 1:
+        rights.append(log_masses[-1])
+        medians.append(median(median_start, number))
+        number_in_bin.append(remaining)
+    elif remaining == 1:
+        if rights:
+            # Extend the previous bin (otherwise its error is consistent with
+            # zero).
+            rights[-1] = log_masses[-1]
+            number_in_bin[-1] += 1
+            medians[-1] = median(number - number_in_bin[-1], number)
+            lefts = lefts[:-1]
+        else:
+            rights.append(log_masses[-1])
+            number_in_bin.append(1)
+            medians.append(log_masses[-1])
+    else:
+        lefts = lefts[:-1]
+
+    widths = np.array(
+        [right - left for right, left in zip(rights, lefts)], dtype=np.float64
+    )
+    number_in_bin = np.array(number_in_bin, dtype=np.float64)
+
+    return (
+        np.array([10**median for median in medians], dtype=np.float64),
+        number_in_bin / (widths * box_volume),
+        np.sqrt(number_in_bin) / (widths * box_volume),
+        10 ** np.array([lefts, rights], dtype=np.float64).reshape(2, -1),
+    )
 
 
 @attr.s(auto_attribs=True)
@@ -78,6 +363,13 @@ class MassFunctionExtension(PlotExtension):
     box_volume: Union[unyt.unyt_quantity, str, None] = None
 
     # Internals
+    preprocess_state: ClassVar[Tuple[str, ...]] = (
+        "edges",
+        "centers",
+        "values",
+        "errors",
+    )
+
     edges: unyt.unyt_array = attr.ib(init=False)
     centers: unyt.unyt_array = attr.ib(init=False)
     values: unyt.unyt_array = attr.ib(init=False)
@@ -112,23 +404,34 @@ class MassFunctionExtension(PlotExtension):
                 + "calculate their own y values (essentially a renormalised histogram). ",
             )
 
-        common = dict(
-            masses=self.x,
-            lowest_mass=self.limits[0].to(self.x.units),
-            highest_mass=self.limits[1].to(self.x.units),
-            box_volume=self.box_volume,
-            minimum_in_bin=self.minimum_in_bin,
-            return_bin_edges=True,
+        counts = MassFunctionCounts.from_masses(
+            masses=self.x.value,
+            lowest_mass=self.limits[0].to_value(self.x.units),
+            highest_mass=self.limits[1].to_value(self.x.units),
+            bins=self.bins,
+            keep_masses=self.adaptive,
         )
 
-        func = create_adaptive_mass_function if self.adaptive else create_mass_function
-
         if self.adaptive:
-            attrs = {**common, "base_n_bins": self.bins}
+            centers, values, errors, edges = adaptive_mass_function(
+                counts,
+                box_volume=self.box_volume.value,
+                base_n_bins=self.bins,
+                minimum_in_bin=self.minimum_in_bin,
+            )
         else:
-            attrs = {**common, "n_bins": self.bins}
+            centers, values, errors, edges = fixed_mass_function(
+                counts,
+                box_volume=self.box_volume.value,
+                minimum_in_bin=self.minimum_in_bin,
+            )
+
+        volume_units = 1 / self.box_volume.units
 
-        self.centers, self.values, self.errors, self.edges = func(**attrs)
+        self.centers = unyt.unyt_array(centers, self.x.units, name=self.x.name)
+        self.edges = unyt.unyt_array(edges, self.x.units)
+        self.values = unyt.unyt_array(values, volume_units, name=MASS_FUNCTION_LABEL)
+        self.errors = unyt.unyt_array(errors, volume_units)
 
         self.centers.convert_to_units(self.x_units)
         self.edges.convert_to_units(self.x_units)
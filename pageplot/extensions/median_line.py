@@ -3,12 +3,13 @@ Basic median line extension.
 """
 
 import math
-from typing import Any, Callable, Dict, List, Union
+from typing import Any, Callable, ClassVar, Dict, List, Tuple, Union
 
 import attr
 import numpy as np
 import unyt
-from matplotlib.pyplot import Axes, Figure
+from matplotlib.axes import Axes
+from matplotlib.figure import Figure
 
 from pageplot.exceptions import PagePlotIncompatbleExtension
 from pageplot.extensionmodel import PlotExtension
@@ -66,6 +67,13 @@ class MedianLineExtension(PlotExtension):
     )
 
     # Internals
+    preprocess_state: ClassVar[Tuple[str, ...]] = (
+        "edges",
+        "centers",
+        "values",
+        "errors",
+    )
+
     edges: unyt.unyt_array = None
     centers: unyt.unyt_array = None
     values: unyt.unyt_array = None
@@ -3,10 +3,11 @@ Metadata (basically takes in stuff from the json and puts it out
 in the final files).
 """
 
-from typing import Optional, Union
+from typing import ClassVar, Optional, Union
 
 import attr
-from matplotlib.pyplot import Axes, Figure
+from matplotlib.axes import Axes
+from matplotlib.figure import Figure
 
 from pageplot.extensionmodel import PlotExtension
 
@@ -33,6 +34,8 @@ class MetadataExtension(PlotExtension):
         The section to display this figure in on the webpage.
     """
 
+    requires_data: ClassVar[bool] = False
+
     comment: Optional[str] = attr.ib(
         default=None, converter=attr.converters.default_if_none("")
     )
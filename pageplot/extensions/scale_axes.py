@@ -2,8 +2,11 @@
 Basic extension to scale axes.
 """
 
+from typing import ClassVar
+
 import attr
-from matplotlib.pyplot import Axes, Figure
+from matplotlib.axes import Axes
+from matplotlib.figure import Figure
 
 from pageplot.extensionmodel import PlotExtension
 
@@ -32,6 +35,8 @@ class ScaleAxesExtension(PlotExtension):
         The base to use in the case of a "log" axis.
     """
 
+    requires_data: ClassVar[bool] = False
+
     # Scale in x (e.g. log) and base
     scale_x: str = "linear"
     base_x: float = attr.ib(default=10.0, converter=float)
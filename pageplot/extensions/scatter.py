@@ -2,24 +2,275 @@
 Basic scatter plot extension.
 """
 
+from typing import ClassVar, Optional, Tuple
+
 import attr
-from matplotlib.pyplot import Axes, Figure
+import numpy as np
+from matplotlib.axes import Axes
+from matplotlib.colors import LogNorm, Normalize
+from matplotlib.figure import Figure
+from matplotlib.image import AxesImage
 
 from pageplot.exceptions import PagePlotIncompatbleExtension
 from pageplot.extensionmodel import PlotExtension
 
 
+def pixel_counts(x: np.ndarray, y: np.ndarray, width: int, height: int) -> np.ndarray:
+    """
+    Counts the points (given as axes fractions, from 0 to 1) falling in
+    each pixel of a ``height`` by ``width`` grid. Points outside of the
+    axes are ignored.
+    """
+
+    column = np.floor(x * width)
+    row = np.floor(y * height)
+
+    inside = (column >= 0) & (column < width) & (row >= 0) & (row < height)
+
+    pixels = row[inside].astype(np.int64) * width + column[inside].astype(np.int64)
+
+    return np.bincount(pixels, minlength=width * height).reshape(height, width)
+
+
+def occupancy_cells(values: np.ndarray, bins: int, spacing: str) -> np.ndarray:
+    """
+    Index, from 0 to ``bins - 1``, of the cell each value falls in, with
+    cells spanning the (finite) range of the values. Values that cannot be
+    placed (non-finite, or non-positive with log spacing) are given -1.
+    """
+
+    values = np.asarray(values, dtype=np.float64)
+
+    if spacing == "log":
+        with np.errstate(divide="ignore", invalid="ignore"):
+            values = np.log10(values)
+
+    valid = np.isfinite(values)
+    cells = np.full(values.shape, -1, dtype=np.int64)
+
+    if not valid.any():
+        return cells
+
+    low = values[valid].min()
+    width = (values[valid].max() - low) / bins
+
+    if width > 0:
+        cells[valid] = np.minimum((values[valid] - low) / width, bins - 1)
+    else:
+        cells[valid] = 0
+
+    return cells
+
+
+def water_fill(counts: np.ndarray, budget: int, rng: np.random.Generator):
+    """
+    Number of points to keep from each cell, given the number of points in
+    them, such that the total is ``budget``. Every cell keeps up to the same
+    cap, so sparse cells keep all of their points and dense cells are cut
+    down to the cap; the remainder is given to randomly chosen dense cells.
+    """
+
+    if counts.sum() <= budget:
+        return counts.copy()
+
+    # Largest cap that fits in the budget.
+    low, high = 0, int(counts.max())
+
+    while low < high:
+        cap = (low + high + 1) // 2
+
+        if np.minimum(counts, cap).sum() <= budget:
+            low = cap
+        else:
+            high = cap - 1
+
+    quotas = np.minimum(counts, low)
+
+    remainder = budget - quotas.sum()
+    dense = np.flatnonzero(counts > low)
+    quotas[rng.choice(dense, size=remainder, replace=False)] += 1
+
+    return quotas
+
+
+def stratified_sample(
+    x: np.ndarray,
+    y: np.ndarray,
+    max_points: int,
+    bins: int = 64,
+    spacing_x: str = "linear",
+    spacing_y: str = "linear",
+    seed: int = 0,
+) -> np.ndarray:
+    """
+    Indices (sorted) of at most ``max_points`` of the points, sampled
+    uniformly within each cell of a ``bins`` by ``bins`` occupancy grid
+    over the x-y plane. Points in sparse cells, such as outliers in the
+    tails of the distribution, are all kept, whereas dense cells are
+    thinned out. Points that cannot be placed on the grid are dropped.
+
+    The sampling is seeded, so the same inputs always give the same points.
+    """
+
+    rng = np.random.default_rng(seed)
+
+    cells_x = occupancy_cells(x, bins, spacing_x)
+    cells_y = occupancy_cells(y, bins, spacing_y)
+    placed = np.flatnonzero((cells_x >= 0) & (cells_y >= 0))
+    cells = cells_y[placed] * bins + cells_x[placed]
+
+    counts = np.bincount(cells, minlength=bins * bins)
+    quotas = water_fill(counts, max_points, rng)
+
+    # Shuffle within each cell, then keep the first ``quota`` points of it.
+    order = np.lexsort((rng.random(len(cells)), cells))
+    sorted_cells = cells[order]
+    rank = np.arange(len(cells)) - (np.cumsum(counts) - counts)[sorted_cells]
+
+    return np.sort(placed[order[rank < quotas[sorted_cells]]])
+
+
+class ScatterDensityImage(AxesImage):
+    """
+    Image of the number of points in each output pixel. The points are
+    binned at draw time, to the size of the axes in the output (so
+    accounting for the figure size and DPI), and in the current axes
+    limits and scales.
+
+    Parameters
+    ----------
+
+    axes: Axes
+        The axes to draw on.
+
+    x, y: np.ndarray
+        The points, in data co-ordinates.
+
+    Notes
+    -----
+
+    Additional keyword arguments (e.g. ``cmap`` and ``norm``) are passed
+    to :class:`AxesImage`.
+    """
+
+    def __init__(self, axes: Axes, x: np.ndarray, y: np.ndarray, **kwargs):
+        super().__init__(
+            axes, origin="lower", interpolation="nearest", extent=(0, 1, 0, 1), **kwargs
+        )
+
+        self.points = np.column_stack([x, y])
+        self.set_transform(axes.transAxes)
+        self.set_data(np.ma.masked_all((1, 1)))
+
+    def make_image(self, renderer, magnification=1.0, unsampled=False):
+        bbox = self.axes.bbox
+        width = max(int(round(bbox.width * magnification)), 1)
+        height = max(int(round(bbox.height * magnification)), 1)
+
+        fractions = (self.axes.transData - self.axes.transAxes).transform(self.points)
+
+        counts = pixel_counts(fractions[:, 0], fractions[:, 1], width, height)
+        counts = np.ma.masked_equal(counts, 0)
+
+        self.set_data(counts)
+
+        if counts.count() > 0:
+            self.norm.autoscale(counts)
+
+        return super().make_image(renderer, magnification, unsampled)
+
+
 @attr.s(auto_attribs=True)
 class ScatterExtension(PlotExtension):
     """
     Include this if you would like the background to be
     a scatter plot. Note that this data is not serialized as
     it is of unpredictable size.
+
+    Parameters
+    ----------
+
+    display_as: str, optional
+        How to show the points: ``points`` draws every point, ``raster``
+        draws a single image of the number of points in each output pixel
+        (so the rendering cost and file size do not depend on the number
+        of points), and ``auto`` uses ``raster`` only when there are more
+        than ``raster_threshold`` points. Default: auto.
+
+    raster_threshold: int, optional
+        Number of points above which ``auto`` switches to ``raster``.
+        Default: 10^6.
+
+    norm: str, optional
+        Normalisation of the colour map in raster mode. Can be linear or log.
+        Defaults to log.
+
+    cmap: str, optional
+        Override for the colour map used in raster mode.
+
+    max_points: int, optional
+        Maximal number of points to show. Larger datasets are subsampled
+        on a grid of ``subsample_bins`` cells in each dimension (in the
+        ``spacing_x`` and ``spacing_y`` spacings, linear or log), keeping
+        every point in sparse cells and sampling dense cells uniformly, so
+        that outliers survive. Default: no subsampling.
+
+    seed: int, optional
+        Seed for the subsampling, so that the same points are always shown.
+        Default: 0.
     """
 
+    display_as: str = attr.ib(
+        default="auto", validator=attr.validators.in_(["auto", "points", "raster"])
+    )
+    raster_threshold: int = attr.ib(default=1_000_000, converter=int)
+    norm: str = attr.ib(default="log", validator=attr.validators.in_(["linear", "log"]))
+    cmap: Optional[str] = None
+    max_points: Optional[int] = attr.ib(
+        default=None, converter=attr.converters.optional(int)
+    )
+    subsample_bins: int = attr.ib(default=64, converter=int)
+    spacing_x: str = attr.ib(
+        default="linear", validator=attr.validators.in_(["linear", "log"])
+    )
+    spacing_y: str = attr.ib(
+        default="linear", validator=attr.validators.in_(["linear", "log"])
+    )
+    seed: int = attr.ib(default=0, converter=int)
+
+    # Internals
+    preprocess_state: ClassVar[Tuple[str, ...]] = ("selected",)
+    blit_requires_data: ClassVar[bool] = True
+
+    selected: Optional[np.ndarray] = attr.ib(init=False, default=None)
+
+    def preprocess(self):
+        """
+        Chooses the points to show, if there are more than ``max_points``.
+        """
+
+        if self.y is None or self.max_points is None:
+            return
+
+        if len(self.x) <= self.max_points:
+            return
+
+        self.selected = stratified_sample(
+            self.x.to(self.x_units).value,
+            self.y.to(self.y_units).value,
+            max_points=self.max_points,
+            bins=self.subsample_bins,
+            spacing_x=self.spacing_x,
+            spacing_y=self.spacing_y,
+            seed=self.seed,
+        )
+
+        return
+
     def blit(self, fig: Figure, axes: Axes):
         """
-        Essentially a pass-through for ``axes.scatter``.
+        Essentially a pass-through for ``axes.scatter``, or a rasterised
+        equivalent for large numbers of points.
         """
 
         if self.y is None:
@@ -27,6 +278,44 @@ class ScatterExtension(PlotExtension):
                 self.y, "Unable to create a scatter plot without two dimensional data"
             )
 
-        axes.scatter(self.x.to(self.x_units), self.y.to(self.y_units))
+        x = self.x.to(self.x_units)
+        y = self.y.to(self.y_units)
+
+        if self.selected is not None:
+            x = x[self.selected]
+            y = y[self.selected]
+
+        raster = self.display_as == "raster" or (
+            self.display_as == "auto" and len(x) > self.raster_threshold
+        )
+
+        if not raster:
+            axes.scatter(x, y)
+
+            return
+
+        # Register the units with the axes, as scatter would, for the labels.
+        axes.xaxis.update_units(x)
+        axes.yaxis.update_units(y)
+
+        x = np.asarray(axes.convert_xunits(x), dtype=np.float64)
+        y = np.asarray(axes.convert_yunits(y), dtype=np.float64)
+
+        image = ScatterDensityImage(
+            axes,
+            x,
+            y,
+            cmap=self.cmap,
+            norm=Normalize() if self.norm == "linear" else LogNorm(),
+        )
+        image.set_clip_path(axes.patch)
+        axes.add_image(image)
+
+        # The image is in axes co-ordinates, so does not set the limits.
+        finite = np.isfinite(x) & np.isfinite(y)
+
+        if finite.any():
+            axes.update_datalim(np.column_stack([x[finite], y[finite]]))
+            axes.autoscale_view()
 
         return
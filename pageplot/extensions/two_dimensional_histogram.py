@@ -2,26 +2,238 @@
 Basic histogram plot extension.
 """
 
+import io
 import math
-from typing import List, Optional, Union
+from typing import Any, ClassVar, Dict, Iterator, List, Optional, Tuple, Union
 
 import attr
+import matplotlib
 import numpy as np
 import unyt
-from matplotlib.colors import LogNorm, Normalize
-from matplotlib.pyplot import Axes, Figure
+from matplotlib.axes import Axes
+from matplotlib.colors import Colormap, LogNorm, Normalize
+from matplotlib.figure import Figure
+from matplotlib.image import AxesImage
+from matplotlib.scale import InvertedLogTransform
+from matplotlib.transforms import IdentityTransform, blended_transform_factory
 
 from pageplot.exceptions import PagePlotIncompatbleExtension
 from pageplot.extensionmodel import PlotExtension
 from pageplot.validators import quantity_list_validator
 
 
+def regular_spacing(edges: np.ndarray) -> Optional[str]:
+    """
+    The spacing (``linear`` or ``log``) in which the bin edges are evenly
+    spaced, or ``None`` if they are irregular.
+    """
+
+    if len(edges) < 2:
+        return None
+
+    if np.allclose(np.diff(edges), edges[1] - edges[0], rtol=1e-6, atol=0.0):
+        return "linear"
+
+    if (edges > 0).all():
+        log_edges = np.log10(edges)
+
+        if np.allclose(
+            np.diff(log_edges), log_edges[1] - log_edges[0], rtol=1e-6, atol=0.0
+        ):
+            return "log"
+
+    return None
+
+
+def count_dtype(maximum: int) -> type:
+    """
+    Smallest unsigned integer type (of 32 or 64 bits) able to hold counts
+    up to ``maximum``.
+    """
+
+    return np.uint32 if maximum <= np.iinfo(np.uint32).max else np.uint64
+
+
+def bin_indices(values: np.ndarray, edges: np.ndarray, spacing: str) -> np.ndarray:
+    """
+    Index of the bin, between the regular (in ``spacing``) ``edges``, that
+    each value falls in, or -1 for values outside of the edges. As in
+    ``np.histogram``, bins are half-open apart from the last, which includes
+    its right edge.
+    """
+
+    values = np.asarray(values, dtype=np.float64)
+    edges = np.asarray(edges, dtype=np.float64)
+    number_of_bins = len(edges) - 1
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        if spacing == "log":
+            position = np.log10(values)
+            low, high = np.log10(edges[[0, -1]])
+        else:
+            position = values
+            low, high = edges[[0, -1]]
+
+        inside = (values >= edges[0]) & (values <= edges[-1])
+
+        indices = np.floor((position - low) * (number_of_bins / (high - low)))
+
+    indices = np.clip(np.where(inside, indices, 0), 0, number_of_bins - 1).astype(
+        np.int64
+    )
+
+    # The direct calculation can be off by one due to rounding, so correct
+    # against the edges themselves, as np.histogram does.
+    indices -= values < edges[indices]
+    indices += (values >= edges[indices + 1]) & (indices != number_of_bins - 1)
+
+    indices[~inside] = -1
+
+    return indices
+
+
+def histogram_counts(
+    x: np.ndarray,
+    y: np.ndarray,
+    x_edges: np.ndarray,
+    y_edges: np.ndarray,
+    spacing_x: str,
+    spacing_y: str,
+) -> np.ndarray:
+    """
+    Two dimensional histogram of ``x`` and ``y`` in the regular (in
+    ``spacing_x`` and ``spacing_y``) edges, with the same counts as
+    ``np.histogram2d(x, y, [x_edges, y_edges])[0].T``, but calculated in a
+    single pass with integer counts rather than floats.
+    """
+
+    x_indices = bin_indices(x, x_edges, spacing_x)
+    y_indices = bin_indices(y, y_edges, spacing_y)
+
+    bins_x = len(x_edges) - 1
+    bins_y = len(y_edges) - 1
+
+    valid = (x_indices >= 0) & (y_indices >= 0)
+
+    counts = np.bincount(
+        y_indices[valid] * bins_x + x_indices[valid], minlength=bins_x * bins_y
+    )
+
+    return counts.astype(count_dtype(counts.max())).reshape(bins_y, bins_x)
+
+
+def coarsen(
+    grid: np.ndarray, x_edges: np.ndarray, y_edges: np.ndarray
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Sums each 2x2 block of cells of the grid (with the final row and column
+    left unpaired for odd sizes), returning the new grid and its edges.
+    """
+
+    rows = np.arange(0, grid.shape[0], 2)
+    columns = np.arange(0, grid.shape[1], 2)
+
+    coarse = np.add.reduceat(
+        np.add.reduceat(grid, rows, axis=0, dtype=np.uint64), columns, axis=1
+    )
+
+    return (
+        coarse.astype(count_dtype(coarse.max(initial=0))),
+        x_edges[np.append(columns, grid.shape[1])],
+        y_edges[np.append(rows, grid.shape[0])],
+    )
+
+
+def tile_levels(shape: Tuple[int, int], tile_size: int) -> int:
+    """
+    Number of levels of a tile pyramid of a grid of ``shape``: the full
+    resolution grid, and then each coarsening (see :func:`coarsen`) of it
+    until it fits in a single tile.
+    """
+
+    rows, columns = shape
+    levels = 1
+
+    while max(rows, columns) > tile_size:
+        rows, columns = (rows + 1) // 2, (columns + 1) // 2
+        levels += 1
+
+    return levels
+
+
+def cells_per_coarse_cell(size: int, level: int) -> np.ndarray:
+    """
+    Number of full resolution cells, along an axis of ``size`` cells, in
+    each cell at ``level`` of the pyramid (the last may be short).
+    """
+
+    span = 2**level
+    cells = np.full((size + span - 1) // span, span, dtype=np.int64)
+    cells[-1] = size - span * (len(cells) - 1)
+
+    return cells
+
+
+def histogram_tiles(
+    grid: np.ndarray, tile_size: int, norm: Normalize, cmap: Colormap
+) -> Iterator[Tuple[int, int, int, np.ndarray]]:
+    """
+    Colours the grid as a tile pyramid, from the full resolution grid
+    (level 0) through successive coarsenings (see :func:`coarsen`) until it
+    fits in one tile.
+
+    Coarse cells are coloured by the mean count of the full resolution cells
+    that they cover, so that all levels share a colour scale (``norm``,
+    which should already be scaled). Cells that can not be shown with the
+    norm (empty cells for a log norm) are transparent.
+
+    Yields
+    ------
+
+    level, column, row: int
+        Position of the tile in the pyramid; row 0 is at the lowest y.
+
+    tile: np.ndarray
+        RGBA image of the tile, of at most ``tile_size`` square, with its
+        first row at the lowest y.
+    """
+
+    rows, columns = grid.shape
+
+    for level in range(tile_levels(grid.shape, tile_size)):
+        if level > 0:
+            grid, _, _ = coarsen(
+                grid, np.arange(grid.shape[1] + 1), np.arange(grid.shape[0] + 1)
+            )
+
+        cells_y = cells_per_coarse_cell(rows, level)
+        cells_x = cells_per_coarse_cell(columns, level)
+
+        for row in range(0, grid.shape[0], tile_size):
+            for column in range(0, grid.shape[1], tile_size):
+                counts = grid[row : row + tile_size, column : column + tile_size]
+                density = counts / np.outer(
+                    cells_y[row : row + tile_size], cells_x[column : column + tile_size]
+                )
+
+                if isinstance(norm, LogNorm):
+                    density = np.ma.masked_less_equal(density, 0.0)
+
+                yield (
+                    level,
+                    column // tile_size,
+                    row // tile_size,
+                    cmap(norm(density), bytes=True),
+                )
+
+
 @attr.s(auto_attribs=True)
 class TwoDimensionalHistogramExtension(PlotExtension):
     """
-    A two dimensional background histogram for the figure. Note that this rasterises
-    the output from matplotlib's pcolormesh function, as generally the non-raster
-    versions are not sustainable.
+    A two dimensional background histogram for the figure. This is always
+    rasterised, as generally the non-raster versions are not sustainable: grids
+    that are regular in linear or log space are drawn as a single image, and
+    irregular grids with matplotlib's pcolormesh function.
 
     Parameters
     ----------
@@ -35,8 +247,12 @@ class TwoDimensionalHistogramExtension(PlotExtension):
         given using the usual syntax of e.g. ``["1e0 Msun", "1e10 Msun"]``.
 
     bins: int, optional
-        The number of bins in each dimension to use (always the same in both
-        dimensions)
+        The number of bins in each dimension to use, unless overridden by
+        ``bins_x`` or ``bins_y``. Defaults to 10.
+
+    bins_x, bins_y: int, optional
+        The number of bins along the x and y axes respectively, for
+        non-square grids.
 
     spacing_x: str, optional
         Spacing between bins in the x-direction. Can be linear, or log. Defaults
@@ -53,6 +269,30 @@ class TwoDimensionalHistogramExtension(PlotExtension):
     cmap: str, optional
         Override for the choice of colour map used in the stylesheet.
 
+    pyramid_levels: int, optional
+        Number of successively coarsened (by summing 2x2 blocks of cells)
+        copies of the grid to include in the serialized data, so that
+        consumers can pick a resolution without the particle data. Defaults
+        to 0. Ignored with ``tile_size``.
+
+    tile_size: int, optional
+        Also write the grid as a deep-zoom pyramid of PNG tiles of this many
+        cells on a side (e.g. 256), for the webpage to load as it is zoomed
+        into, rather than one enormous image. Defaults to ``None``, writing
+        no tiles.
+
+    Notes
+    -----
+
+    Counts are stored as unsigned integers (32 bit, or 64 bit when a cell
+    holds more than 2^32 points), so high resolution grids (e.g. 4096^2)
+    are practical.
+
+    With ``tile_size``, very high resolution grids (e.g. 8192^2) can be
+    explored on the webpage: the tiles (see :func:`histogram_tiles`) are
+    built once, from the counts, and the serialized data then only holds a
+    description of them (under ``tiles``) rather than the grid itself (or
+    any pyramid of it).
     """
 
     limits_x: List[Union[unyt.unyt_quantity, unyt.unyt_array]] = attr.ib(
@@ -62,6 +302,12 @@ class TwoDimensionalHistogramExtension(PlotExtension):
         default=None, converter=quantity_list_validator
     )
     bins: int = attr.ib(default=10, converter=int)
+    bins_x: Optional[int] = attr.ib(
+        default=None, converter=attr.converters.optional(int)
+    )
+    bins_y: Optional[int] = attr.ib(
+        default=None, converter=attr.converters.optional(int)
+    )
     spacing_x: str = attr.ib(
         default="linear", validator=attr.validators.in_(["linear", "log"])
     )
@@ -72,8 +318,14 @@ class TwoDimensionalHistogramExtension(PlotExtension):
         default="linear", validator=attr.validators.in_(["linear", "log"])
     )
     cmap: Optional[str] = None
+    pyramid_levels: int = attr.ib(default=0, converter=int)
+    tile_size: Optional[int] = attr.ib(
+        default=None, converter=attr.converters.optional(int)
+    )
 
     # Internals
+    preprocess_state: ClassVar[Tuple[str, ...]] = ("x_edges", "y_edges", "grid")
+
     x_edges: unyt.unyt_array = attr.ib(init=False)
     y_edges: unyt.unyt_array = attr.ib(init=False)
     grid: unyt.unyt_array = attr.ib(init=False)
@@ -83,18 +335,27 @@ class TwoDimensionalHistogramExtension(PlotExtension):
         Pre-process data to enable saving out.
         """
 
+        if self.y is None:
+            raise PagePlotIncompatbleExtension(
+                self.y,
+                "Unable to create a hsistogram plot without two dimensional data",
+            )
+
+        bins_x = self.bins if self.bins_x is None else self.bins_x
+        bins_y = self.bins if self.bins_y is None else self.bins_y
+
         if self.spacing_x == "linear":
-            raw_bin_edges_x = np.linspace(*self.limits_x[:2], self.bins)
+            raw_bin_edges_x = np.linspace(*self.limits_x[:2], bins_x + 1)
         else:
             raw_bin_edges_x = np.logspace(
-                *[math.log10(x) for x in self.limits_x[:2]], self.bins
+                *[math.log10(x) for x in self.limits_x[:2]], bins_x + 1
             )
 
         if self.spacing_y == "linear":
-            raw_bin_edges_y = np.linspace(*self.limits_y[:2], self.bins)
+            raw_bin_edges_y = np.linspace(*self.limits_y[:2], bins_y + 1)
         else:
             raw_bin_edges_y = np.logspace(
-                *[math.log10(y) for y in self.limits_y[:2]], self.bins
+                *[math.log10(y) for y in self.limits_y[:2]], bins_y + 1
             )
 
         self.x_edges = unyt.unyt_array(
@@ -104,13 +365,16 @@ class TwoDimensionalHistogramExtension(PlotExtension):
             raw_bin_edges_y, self.limits_y[0].units, name=self.y.name
         )
 
-        H, *_ = np.histogram2d(
-            x=self.x,
-            y=self.y,
-            bins=[self.x_edges.to(self.x.units), self.y_edges.to(self.y.units)],
+        counts = histogram_counts(
+            x=self.x.value,
+            y=self.y.value,
+            x_edges=self.x_edges.to(self.x.units).value,
+            y_edges=self.y_edges.to(self.y.units).value,
+            spacing_x=self.spacing_x,
+            spacing_y=self.spacing_y,
         )
 
-        self.grid = unyt.unyt_array(H.T, None)
+        self.grid = unyt.unyt_array(counts, None)
 
         return
 
@@ -119,27 +383,145 @@ class TwoDimensionalHistogramExtension(PlotExtension):
         Essentially a pass-through for ``axes.scatter``.
         """
 
-        if self.y is None:
-            raise PagePlotIncompatbleExtension(
-                self.y,
-                "Unable to create a hsistogram plot without two dimensional data",
+        grid = self.grid.astype(np.float64).to_value(self.z_units)
+
+        if self.norm == "linear":
+            norm = Normalize()
+        else:
+            norm = LogNorm()
+            # Empty cells can not be shown on a log scale (and otherwise lead to
+            # an invalid vmin).
+            grid = np.ma.masked_less_equal(grid, 0.0)
+
+        x_edges = self.x_edges.to(self.x_units)
+        y_edges = self.y_edges.to(self.y_units)
+
+        # Register the units with the axes, as pcolormesh would, for the labels.
+        axes.xaxis.update_units(x_edges)
+        axes.yaxis.update_units(y_edges)
+
+        raw_x_edges = np.asarray(axes.convert_xunits(x_edges), dtype=np.float64)
+        raw_y_edges = np.asarray(axes.convert_yunits(y_edges), dtype=np.float64)
+
+        spacing_x = regular_spacing(raw_x_edges)
+        spacing_y = regular_spacing(raw_y_edges)
+
+        if spacing_x is None or spacing_y is None:
+            axes.pcolormesh(
+                x_edges, y_edges, grid, norm=norm, cmap=self.cmap, rasterized=True
+            )
+        else:
+            self.blit_image(
+                axes, raw_x_edges, raw_y_edges, grid, norm, spacing_x, spacing_y
             )
 
-        norm = Normalize() if self.norm == "linear" else LogNorm()
+        return
 
-        axes.pcolormesh(
-            self.x_edges.to(self.x_units),
-            self.y_edges.to(self.y_units),
-            self.grid.to(self.z_units),
-            norm=norm,
+    def blit_image(
+        self,
+        axes: Axes,
+        x_edges: np.ndarray,
+        y_edges: np.ndarray,
+        grid: np.ndarray,
+        norm: Normalize,
+        spacing_x: str,
+        spacing_y: str,
+    ):
+        """
+        Draws a grid that is regular in the given spacings as a single image,
+        which is much faster to draw (and smaller on disk) than a pcolormesh.
+
+        The image lives in the space in which the bins are regular (i.e. log10
+        of the data for log spacing), and is mapped to data co-ordinates by its
+        transform, so it is correct whatever the scales of the axes.
+        """
+
+        def to_image_space(edges, spacing):
+            if spacing == "log":
+                return (
+                    np.log10([edges[0], edges[-1]]),
+                    InvertedLogTransform(10),
+                )
+
+            return [edges[0], edges[-1]], IdentityTransform()
+
+        extent_x, transform_x = to_image_space(x_edges, spacing_x)
+        extent_y, transform_y = to_image_space(y_edges, spacing_y)
+
+        image = AxesImage(
+            axes,
             cmap=self.cmap,
-            rasterized=True,
+            norm=norm,
+            interpolation="nearest",
+            origin="lower",
+            extent=(*extent_x, *extent_y),
         )
+        image.set_data(grid)
+        image.set_transform(
+            blended_transform_factory(transform_x, transform_y) + axes.transData
+        )
+        image.set_clip_path(axes.patch)
+
+        # Images do not take part in autoscaling, so we must register the
+        # limits ourselves; like pcolormesh, with no margins.
+        image.sticky_edges.x[:] = [x_edges.min(), x_edges.max()]
+        image.sticky_edges.y[:] = [y_edges.min(), y_edges.max()]
+
+        axes.add_image(image)
+        axes.update_datalim(
+            [[x_edges.min(), y_edges.min()], [x_edges.max(), y_edges.max()]]
+        )
+        axes.autoscale_view()
 
         return
 
-    def serialize(self):
-        return {
+    def tile_norm(self) -> Normalize:
+        """
+        Colour scale of the tiles, fixed by the full resolution grid so that
+        it is shared by every level.
+        """
+
+        grid = self.grid.value
+
+        if self.norm == "linear":
+            return Normalize(vmin=grid.min(initial=0), vmax=grid.max(initial=0))
+
+        filled = grid[grid > 0]
+
+        if filled.size == 0:
+            return LogNorm(vmin=1.0, vmax=1.0)
+
+        return LogNorm(vmin=filled.min(), vmax=filled.max())
+
+    def additional_outputs(self) -> Iterator[Tuple[str, bytes]]:
+        """
+        The tile pyramid, as ``tile_{level}_{column}_{row}.png`` files, if
+        ``tile_size`` is set.
+        """
+
+        if self.tile_size is None:
+            return
+
+        from PIL import Image
+
+        cmap = matplotlib.colormaps[self.cmap or matplotlib.rcParams["image.cmap"]]
+
+        for level, column, row, tile in histogram_tiles(
+            self.grid.value, self.tile_size, self.tile_norm(), cmap
+        ):
+            buffer = io.BytesIO()
+            # Images are stored from the top down.
+            Image.fromarray(tile[::-1]).save(
+                buffer, format="PNG", compress_level=self.config.png_compression
+            )
+
+            yield f"tile_{level}_{column}_{row}.png", buffer.getvalue()
+
+    def serialize(self) -> Dict[str, Any]:
+        if self.tile_size is not None:
+            return self.serialize_tiles()
+
+        serialized = {
             "x_edges": self.x_edges,
             "y_edges": self.y_edges,
             "grid": self.grid,
@@ -148,3 +530,52 @@ class TwoDimensionalHistogramExtension(PlotExtension):
                 "comment": "Edges and grid can be directly plotted with pcolormesh."
             },
         }
+
+        if self.pyramid_levels > 0:
+            pyramid = []
+            grid, x_edges, y_edges = self.grid.value, self.x_edges, self.y_edges
+
+            for _ in range(self.pyramid_levels):
+                grid, x_edges, y_edges = coarsen(grid, x_edges, y_edges)
+                pyramid.append(
+                    {
+                        "x_edges": x_edges,
+                        "y_edges": y_edges,
+                        "grid": unyt.unyt_array(grid, None),
+                    }
+                )
+
+            serialized["pyramid"] = pyramid
+            serialized["metadata"][
+                "pyramid"
+            ] = "Each level of the pyramid sums 2x2 blocks of cells of the one before."
+
+        return serialized
+
+    def serialize_tiles(self) -> Dict[str, Any]:
+        """
+        Serialized data describing the tiles (see ``additional_outputs``),
+        which take the place of the grid, as that is far too large.
+        """
+
+        norm = self.tile_norm()
+
+        return {
+            "x_edges": self.x_edges,
+            "y_edges": self.y_edges,
+            "norm": self.norm,
+            "tiles": {
+                "tile_size": self.tile_size,
+                "levels": tile_levels(self.grid.shape, self.tile_size),
+                "filename": "tile_{level}_{column}_{row}.png",
+                "vmin": float(norm.vmin),
+                "vmax": float(norm.vmax),
+            },
+            "metadata": {
+                "comment": "The grid is written as image tiles alongside the figure.",
+                "tiles": (
+                    "Tiles of level n cover 2^n by 2^n cells of the grid, coloured "
+                    "by their mean count; column and row 0 are at the lowest x and y."
+                ),
+            },
+        }
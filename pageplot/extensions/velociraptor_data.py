@@ -1,20 +1,337 @@
 """
 Velociraptor comparison data plotting extension.
+
+The same observational data files are usually shown on many plots (and for
+every snapshot of a sweep), so they are only read once per process: the
+:class:`ObservationCache` holds each file, and each selection of its data
+by redshift bracket. A small on-disk :class:`RedshiftIndex` of the redshifts
+covered by each file, kept next to the data, means that files which can
+not overlap with a bracket are skipped without being opened at all.
 """
 
+import copy
+import json
+import os
+import threading
 from pathlib import Path
-from typing import List
+from tempfile import NamedTemporaryFile
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple, Union
 
 import attr
 import numpy as np
-from matplotlib.pyplot import Axes, Figure
-from velociraptor.observations import load_observations
-from velociraptor.observations.objects import ObservationalData
+import unyt
 
 from pageplot.configextension import ConfigExtension
 from pageplot.exceptions import PagePlotIncompatbleExtension
 from pageplot.extensionmodel import PlotExtension
 
+# This module also holds the (always loaded) configuration extension, so
+# matplotlib and velociraptor are only imported once they are needed.
+if TYPE_CHECKING:
+    from matplotlib.axes import Axes
+    from matplotlib.figure import Figure
+    from velociraptor.observations.objects import (
+        MultiRedshiftObservationalData,
+        ObservationalData,
+    )
+
+RedshiftBracket = Tuple[float, float]
+
+
+def overlaps(lower: float, upper: float, redshift_bracket: RedshiftBracket) -> bool:
+    """
+    Whether data covering the redshifts ``lower`` to ``upper`` overlaps
+    with the bracket, by the (inclusive) test of
+    ``velociraptor.observations.load_observations``.
+    """
+
+    bracket_lower, bracket_upper = redshift_bracket
+
+    return (
+        (lower <= bracket_lower and bracket_lower <= upper)
+        or (lower <= bracket_upper and bracket_upper <= upper)
+        or (bracket_lower <= lower and upper <= bracket_upper)
+    )
+
+
+@attr.s(auto_attribs=True)
+class RedshiftIndex:
+    """
+    On-disk (JSON) index of the redshift ranges covered by the datasets in
+    each observational data file, keyed by filename and invalidated by the
+    modification time of the file. It is filled in as files are read.
+
+    Parameters
+    ----------
+
+    filename: Path
+        Filename of the index. Nothing is written if its directory is not
+        writeable.
+    """
+
+    filename: Path = attr.ib(converter=Path)
+
+    entries: Dict[str, Dict[str, Any]] = attr.ib(init=False, factory=dict)
+
+    def __attrs_post_init__(self):
+        self.entries = self.read()
+
+    def read(self) -> Dict[str, Dict[str, Any]]:
+        try:
+            with open(self.filename, "r") as handle:
+                return json.load(handle)
+        except (OSError, ValueError):
+            return {}
+
+    def key(self, filename: Path) -> str:
+        try:
+            return str(filename.relative_to(self.filename.parent.resolve()))
+        except ValueError:
+            return str(filename)
+
+    def coverage(
+        self, filename: Path, modified: int
+    ) -> Optional[List[RedshiftBracket]]:
+        """
+        The redshift ranges covered by the (resolved) ``filename``, or
+        ``None`` if it is not in the index, or has since been modified.
+        """
+
+        entry = self.entries.get(self.key(filename))
+
+        if entry is None or entry["modified"] != modified:
+            return None
+
+        return [tuple(redshifts) for redshifts in entry["redshifts"]]
+
+    def record(self, filename: Path, modified: int, coverage: List[RedshiftBracket]):
+        """
+        Adds the redshift ranges covered by a file to the index, and writes
+        it out (merged with any entries written by other processes since it
+        was read).
+        """
+
+        self.entries[self.key(filename)] = {
+            "modified": modified,
+            "redshifts": [[float(lower), float(upper)] for lower, upper in coverage],
+        }
+
+        self.entries = {**self.read(), **self.entries}
+
+        # Write to a temporary file and move, so that concurrent readers
+        # never see a partially written index.
+        try:
+            with NamedTemporaryFile(
+                "w", dir=self.filename.parent, suffix=".tmp", delete=False
+            ) as handle:
+                json.dump(self.entries, handle, indent=1, sort_keys=True)
+
+            os.replace(handle.name, self.filename)
+        except OSError:
+            pass
+
+        return
+
+
+def freeze(observation: "ObservationalData") -> "ObservationalData":
+    """
+    Makes the arrays of an observation read-only, as it is shared between
+    all of the plots that use it.
+    """
+
+    for name in ["x", "y", "x_scatter", "y_scatter"]:
+        array = getattr(observation, name, None)
+
+        if array is not None:
+            array.flags.writeable = False
+
+    return observation
+
+
+def converted_observation(
+    observation: "ObservationalData",
+    x_units: Union[unyt.unyt_quantity, unyt.Unit],
+    y_units: Union[unyt.unyt_quantity, unyt.Unit],
+) -> "ObservationalData":
+    """
+    A copy of a (shared, read-only) observation with its values and scatter
+    converted to the units of the axes.
+    """
+
+    converted = copy.copy(observation)
+
+    converted.x = observation.x.to(x_units)
+    converted.y = observation.y.to(y_units)
+    converted.x_units = converted.x.units
+    converted.y_units = converted.y.units
+
+    if observation.x_scatter is not None:
+        converted.x_scatter = observation.x_scatter.to(converted.x_units)
+
+    if observation.y_scatter is not None:
+        converted.y_scatter = observation.y_scatter.to(converted.y_units)
+
+    return converted
+
+
+@attr.s(auto_attribs=True)
+class ObservationCache:
+    """
+    Process-wide cache of observational data, returning the same (immutable)
+    observations for the same file, modification time, and redshift
+    bracket. Use the module's ``observation_cache`` instance.
+    """
+
+    files: Dict[
+        Tuple[str, int],
+        Union["ObservationalData", "MultiRedshiftObservationalData"],
+    ] = attr.ib(factory=dict)
+    selections: Dict[
+        Tuple[str, int, RedshiftBracket], Tuple["ObservationalData", ...]
+    ] = attr.ib(factory=dict)
+    indices: Dict[Path, RedshiftIndex] = attr.ib(factory=dict)
+
+    lock: threading.RLock = attr.ib(factory=threading.RLock, repr=False)
+
+    def index(self, filename: Path) -> RedshiftIndex:
+        if filename not in self.indices:
+            self.indices[filename] = RedshiftIndex(filename=filename)
+
+        return self.indices[filename]
+
+    def read(
+        self, filename: Path, key: Tuple[str, int]
+    ) -> Union["ObservationalData", "MultiRedshiftObservationalData"]:
+        """
+        Reads (or fetches) a single or multiple redshift data file, as
+        ``load_observations`` would.
+        """
+
+        if key in self.files:
+            return self.files[key]
+
+        from velociraptor.exceptions import ObservationalDataError
+        from velociraptor.observations.objects import (
+            MultiRedshiftObservationalData,
+            ObservationalData,
+        )
+
+        try:
+            data = MultiRedshiftObservationalData()
+            data.load(filename)
+
+            for dataset in data.datasets:
+                freeze(dataset)
+        except ObservationalDataError:
+            data = ObservationalData()
+            data.load(filename)
+            freeze(data)
+
+        # Drop any earlier versions of the file.
+        for stale in [other for other in self.files if other[0] == key[0]]:
+            del self.files[stale]
+
+        self.files[key] = data
+
+        return data
+
+    def load(
+        self,
+        filenames: List[Path],
+        redshift_bracket: RedshiftBracket,
+        index_filename: Optional[Path] = None,
+    ) -> List["ObservationalData"]:
+        """
+        The observations in the files that overlap with the redshift bracket,
+        as ``velociraptor.observations.load_observations``. These are shared,
+        so must not be modified; see :func:`converted_observation`.
+
+        Parameters
+        ----------
+
+        filenames: List[Path]
+            Observational data files to read.
+
+        redshift_bracket: Tuple[float, float]
+            Lower and upper redshifts.
+
+        index_filename: Path, optional
+            Filename of the :class:`RedshiftIndex` to use to skip files that
+            do not overlap with the bracket.
+        """
+
+        from velociraptor.observations.objects import MultiRedshiftObservationalData
+
+        bracket = tuple(float(redshift) for redshift in redshift_bracket)
+        observations = []
+
+        with self.lock:
+            index = None if index_filename is None else self.index(index_filename)
+
+            for filename in filenames:
+                resolved = Path(filename).resolve()
+                modified = os.stat(resolved).st_mtime_ns
+                key = (str(resolved), modified, bracket)
+
+                if key not in self.selections:
+                    coverage = (
+                        None if index is None else index.coverage(resolved, modified)
+                    )
+
+                    if coverage is not None and not any(
+                        overlaps(lower, upper, bracket) for lower, upper in coverage
+                    ):
+                        self.selections[key] = ()
+                        continue
+
+                    data = self.read(filename, key[:2])
+
+                    if isinstance(data, MultiRedshiftObservationalData):
+                        datasets = data.datasets
+                        selection = data.get_datasets_overlapping_with(
+                            redshifts=list(bracket)
+                        )
+                    else:
+                        datasets = [data]
+                        selection = [
+                            dataset
+                            for dataset in datasets
+                            if overlaps(
+                                dataset.redshift_lower, dataset.redshift_upper, bracket
+                            )
+                        ]
+
+                    if index is not None and coverage is None:
+                        index.record(
+                            resolved,
+                            modified,
+                            [
+                                (dataset.redshift_lower, dataset.redshift_upper)
+                                for dataset in datasets
+                            ],
+                        )
+
+                    self.selections[key] = tuple(selection)
+
+                observations.extend(self.selections[key])
+
+        return observations
+
+    def clear(self):
+        """
+        Drops all of the cached data (but not the on-disk indices).
+        """
+
+        with self.lock:
+            self.files.clear()
+            self.selections.clear()
+            self.indices.clear()
+
+        return
+
+
+observation_cache = ObservationCache()
+
 
 @attr.s(auto_attribs=True)
 class VelociraptorDataConfigExtension(ConfigExtension):
@@ -28,11 +345,25 @@ class VelociraptorDataConfigExtension(ConfigExtension):
         The data path where the observational data is stored.
         Helpful so you only need one copy of the observational
         data repository.
+
+    index_filename: str, optional
+        Filename, within ``data_path``, of the index of the redshifts
+        covered by each data file (see :class:`RedshiftIndex`). Set to
+        ``None`` to not use an index. Defaults to
+        ``.pageplot_redshift_index.json``.
     """
 
     data_path: Path = attr.ib(default=Path("."), converter=Path)
+    index_filename: Optional[str] = ".pageplot_redshift_index.json"
     registration_name: str = "velociraptor_data"
 
+    @property
+    def index_path(self) -> Optional[Path]:
+        if self.index_filename is None:
+            return None
+
+        return self.data_path / self.index_filename
+
 
 @attr.s(auto_attribs=True)
 class VelociraptorDataExtension(PlotExtension):
@@ -57,11 +388,12 @@ class VelociraptorDataExtension(PlotExtension):
     # Specify a custom scale factor range to load data within
     scale_factor_bracket_width: float = attr.ib(default=0.1, converter=float)
 
-    observations: List[ObservationalData] = attr.ib(init=False)
+    observations: List["ObservationalData"] = attr.ib(init=False)
 
     def preprocess(self):
         """
-        Loads the data files in.
+        Loads the data files in (once per process; see
+        :class:`ObservationCache`).
         """
 
         bracket_high = np.mean(self.metadata.a) - self.scale_factor_bracket_width
@@ -69,24 +401,25 @@ class VelociraptorDataExtension(PlotExtension):
 
         redshift_bracket = [1.0 / a - 1.0 for a in [bracket_low, bracket_high]]
 
-        self.observations = load_observations(
+        self.observations = observation_cache.load(
             filenames=[
                 self.config.velociraptor_data.data_path / file for file in self.files
             ],
             redshift_bracket=redshift_bracket,
+            index_filename=self.config.velociraptor_data.index_path,
         )
 
         return
 
-    def blit(self, fig: Figure, axes: Axes):
+    def blit(self, fig: "Figure", axes: "Axes"):
         """
         Plots the data files that were read in preprocess on given axes.
         """
 
         for observation in self.observations:
-            observation.x.convert_to_units(self.x_units)
-            observation.y.convert_to_units(self.y_units)
-            observation.plot_on_axes(axes=axes)
+            converted_observation(
+                observation, x_units=self.x_units, y_units=self.y_units
+            ).plot_on_axes(axes=axes)
 
         return
 
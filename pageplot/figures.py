@@ -0,0 +1,56 @@
+"""
+Construction of figures without pyplot.
+
+Figures are created as plain :class:`matplotlib.figure.Figure` objects with
+an Agg canvas, so they are never registered with pyplot's global figure
+manager; they are safe to create in threads and worker processes, and are
+freed as soon as they are no longer referenced.
+"""
+
+import pickle
+from typing import TYPE_CHECKING, Tuple
+
+import attr
+
+if TYPE_CHECKING:
+    from matplotlib.axes import Axes
+    from matplotlib.figure import Figure
+
+
+@attr.s(auto_attribs=True)
+class FigureTemplate:
+    """
+    An empty, styled, figure and axes, built once and cloned for each plot.
+
+    Building the axes (with their ticks, spines, and labels) is most of the
+    cost of creating a figure; un-pickling a copy of a pristine template is
+    several times faster.
+
+    Notes
+    -----
+
+    The style is that of the matplotlib ``rcParams`` when the template is
+    created, i.e. after the :class:`GlobalConfig` has applied its stylesheet.
+    """
+
+    template: bytes = attr.ib(init=False, repr=False)
+
+    def __attrs_post_init__(self):
+        from matplotlib.figure import Figure
+
+        figure = Figure()
+        figure.add_subplot()
+
+        self.template = pickle.dumps(figure)
+
+    def create(self) -> Tuple["Figure", "Axes"]:
+        """
+        Creates a new figure and axes, attached to an Agg canvas.
+        """
+
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+        figure = pickle.loads(self.template)
+        FigureCanvasAgg(figure)
+
+        return figure, figure.axes[0]
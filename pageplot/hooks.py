@@ -0,0 +1,264 @@
+"""
+Hooks that are called before and after each stage of plot creation, used
+to attach profilers to individual plots without editing library code.
+
+Hooks are passed to :class:`PagePlotRunner` (or :class:`PlotContainer`) as a
+list. Without any hooks, no hook code is run at all.
+
+The stages are:
+
++ ``plot``, around the whole of each plot (``before_plot``, ``after_plot``),
++ ``preprocess``, ``restore`` (from the pre-processing cache), and ``blit``,
+  for each extension (``before_extension``, ``after_extension``),
++ ``get_mask`` and ``calculation_from_string`` when reading data
+  (``before_read``, ``after_read``, passed the mask text or calculation),
++ ``save`` (``before_save``, ``after_save``),
+
+as well as ``associate_data``, ``setup_figures``, and ``finalize``, which
+are only passed to the generic ``before_stage`` and ``after_stage``.
+"""
+
+import cProfile
+import json
+import os
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, ContextManager, Dict, Iterator, List, Optional
+
+import attr
+
+EXTENSION_STAGES = ["preprocess", "restore", "blit"]
+READ_STAGES = ["get_mask", "calculation_from_string"]
+
+
+@attr.s(auto_attribs=True)
+class StageHook:
+    """
+    Base class for hooks. All methods do nothing; override the ones that
+    you need. ``before_stage`` and ``after_stage`` are called for every
+    stage, and by default dispatch to the more specific methods.
+    """
+
+    def before_stage(self, stage: str, plot: str, detail: Optional[str]):
+        if stage == "plot":
+            self.before_plot(plot=plot)
+        elif stage in EXTENSION_STAGES:
+            self.before_extension(plot=plot, extension=detail, stage=stage)
+        elif stage in READ_STAGES:
+            self.before_read(plot=plot, calculate=detail)
+        elif stage == "save":
+            self.before_save(plot=plot, filename=detail)
+
+    def after_stage(self, stage: str, plot: str, detail: Optional[str]):
+        if stage == "plot":
+            self.after_plot(plot=plot)
+        elif stage in EXTENSION_STAGES:
+            self.after_extension(plot=plot, extension=detail, stage=stage)
+        elif stage in READ_STAGES:
+            self.after_read(plot=plot, calculate=detail)
+        elif stage == "save":
+            self.after_save(plot=plot, filename=detail)
+
+    def before_plot(self, plot: str):
+        pass
+
+    def after_plot(self, plot: str):
+        pass
+
+    def before_extension(self, plot: str, extension: str, stage: str):
+        pass
+
+    def after_extension(self, plot: str, extension: str, stage: str):
+        pass
+
+    def before_read(self, plot: str, calculate: Optional[str]):
+        pass
+
+    def after_read(self, plot: str, calculate: Optional[str]):
+        pass
+
+    def before_save(self, plot: str, filename: str):
+        pass
+
+    def after_save(self, plot: str, filename: str):
+        pass
+
+    def close(self):
+        """
+        Called once all plots have been created.
+        """
+        pass
+
+
+@contextmanager
+def hooked_stage(
+    hooks: List[StageHook],
+    context: ContextManager[Any],
+    stage: str,
+    plot: str,
+    detail: Optional[str] = None,
+) -> Iterator[Any]:
+    """
+    Calls ``before_stage`` on all ``hooks``, enters ``context`` (e.g. the
+    instrumentation of the stage), and then calls ``after_stage`` in
+    reverse order.
+    """
+
+    for hook in hooks:
+        hook.before_stage(stage=stage, plot=plot, detail=detail)
+
+    try:
+        with context as record:
+            yield record
+    finally:
+        for hook in reversed(hooks):
+            hook.after_stage(stage=stage, plot=plot, detail=detail)
+
+
+@attr.s(auto_attribs=True)
+class SelectedPlotsHook(StageHook):
+    """
+    Base class for hooks that only act on selected plots.
+
+    Parameters
+    ----------
+
+    plots: List[str], optional
+        Names of the plots to act on. By default, all plots.
+    """
+
+    plots: Optional[List[str]] = None
+
+    def selected(self, plot: str) -> bool:
+        return self.plots is None or plot in self.plots
+
+
+@attr.s(auto_attribs=True)
+class CProfileHook(SelectedPlotsHook):
+    """
+    Profiles each selected plot with ``cProfile``, writing the stats to
+    ``{output_path}/{plot}.prof`` (readable with ``pstats`` or snakeviz).
+
+    Parameters
+    ----------
+
+    plots: List[str], optional
+        Names of the plots to profile. By default, all plots.
+
+    output_path: Path
+        Directory to write the profiles to.
+    """
+
+    output_path: Path = attr.ib(default=Path("."), converter=Path)
+
+    profiles: Dict[str, cProfile.Profile] = attr.ib(init=False, factory=dict)
+
+    def before_plot(self, plot: str):
+        if self.selected(plot):
+            self.profiles[plot] = cProfile.Profile()
+            self.profiles[plot].enable()
+
+    def after_plot(self, plot: str):
+        if plot in self.profiles:
+            profile = self.profiles.pop(plot)
+            profile.disable()
+            profile.dump_stats(self.output_path / f"{plot}.prof")
+
+
+@attr.s(auto_attribs=True)
+class TracemallocHook(SelectedPlotsHook):
+    """
+    Traces memory allocations of each selected plot with ``tracemalloc``,
+    writing a snapshot taken at the end of the plot to
+    ``{output_path}/{plot}.tracemalloc`` (readable with
+    ``tracemalloc.Snapshot.load``). The peak traced memory of each plot is
+    stored in ``peaks``.
+
+    Parameters
+    ----------
+
+    plots: List[str], optional
+        Names of the plots to trace. By default, all plots.
+
+    output_path: Path
+        Directory to write the snapshots to.
+
+    frames: int
+        Number of frames of traceback to store for each allocation.
+    """
+
+    output_path: Path = attr.ib(default=Path("."), converter=Path)
+    frames: int = 1
+
+    peaks: Dict[str, int] = attr.ib(init=False, factory=dict)
+    started: bool = attr.ib(init=False, default=False)
+
+    def before_plot(self, plot: str):
+        if self.selected(plot):
+            # Only stop tracing at the end if we were the ones to start it.
+            self.started = not tracemalloc.is_tracing()
+
+            if self.started:
+                tracemalloc.start(self.frames)
+
+            tracemalloc.reset_peak()
+
+    def after_plot(self, plot: str):
+        if self.selected(plot):
+            tracemalloc.take_snapshot().dump(
+                str(self.output_path / f"{plot}.tracemalloc")
+            )
+            self.peaks[plot] = tracemalloc.get_traced_memory()[1]
+
+            if self.started:
+                tracemalloc.stop()
+
+
+@attr.s(auto_attribs=True)
+class ChromeTraceHook(SelectedPlotsHook):
+    """
+    Records every stage of each selected plot as Chrome trace events,
+    written to ``filename`` on ``close``. The timeline can be viewed in
+    ``chrome://tracing`` or https://ui.perfetto.dev.
+
+    Parameters
+    ----------
+
+    plots: List[str], optional
+        Names of the plots to trace. By default, all plots.
+
+    filename: Path
+        Output JSON filename.
+    """
+
+    filename: Path = attr.ib(default=Path("trace.json"), converter=Path)
+
+    events: List[Dict[str, Any]] = attr.ib(init=False, factory=list)
+
+    def event(self, phase: str, stage: str, plot: str, detail: Optional[str]):
+        self.events.append(
+            dict(
+                name=stage if detail is None else f"{stage}: {detail}",
+                cat=stage,
+                ph=phase,
+                ts=time.perf_counter() * 1e6,
+                pid=os.getpid(),
+                tid=threading.get_ident(),
+                args=dict(plot=plot, detail=detail),
+            )
+        )
+
+    def before_stage(self, stage: str, plot: str, detail: Optional[str]):
+        if self.selected(plot):
+            self.event("B", stage, plot, detail)
+
+    def after_stage(self, stage: str, plot: str, detail: Optional[str]):
+        if self.selected(plot):
+            self.event("E", stage, plot, detail)
+
+    def close(self):
+        with open(self.filename, "w") as handle:
+            json.dump(dict(traceEvents=self.events), handle)
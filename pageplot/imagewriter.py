@@ -0,0 +1,336 @@
+"""
+Background encoding and writing of rendered figures.
+
+Saving a PNG is three steps: rasterising the figure with Agg, compressing
+the pixels with zlib, and writing the file. Only the first needs the figure
+(and the GIL, for the most part); compression and writing are handed to a
+pool of threads, so that they overlap with the pre-processing of the next
+plot.
+
+The encoding (PNG compression level, lossless WebP, resolution, and
+thumbnails) is set by the :class:`GlobalConfig`. Files are written to an
+:class:`OutputSink`; by default, straight to the filesystem.
+"""
+
+import io
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, Optional, Tuple
+
+import attr
+import numpy as np
+
+from pageplot.sinks import DirectorySink, OutputSink
+
+if TYPE_CHECKING:
+    from matplotlib.figure import Figure
+
+    from pageplot.config import GlobalConfig
+
+# Formats that are encoded from the rendered pixels by pageplot, rather than
+# by matplotlib's savefig.
+RASTER_SUFFIXES = {".png": "png", ".webp": "webp"}
+
+
+def pil_kwargs(filename: Path, config: "GlobalConfig") -> Optional[Dict[str, Any]]:
+    """
+    Encoder options (passed to Pillow) for the format of ``filename``.
+    """
+
+    suffix = Path(filename).suffix.lower()
+
+    if suffix == ".png":
+        return {"compress_level": config.png_compression}
+    elif suffix == ".webp":
+        return {"lossless": config.webp_lossless}
+
+    return None
+
+
+def thumbnail_filename(filename: Path) -> Path:
+    """
+    Filename of the thumbnail of a figure; for vector formats, the
+    thumbnail is a PNG.
+    """
+
+    filename = Path(filename)
+    suffix = filename.suffix if filename.suffix.lower() in RASTER_SUFFIXES else ".png"
+
+    return filename.with_name(f"{filename.stem}_thumbnail{suffix}")
+
+
+def can_encode(filename: Path) -> bool:
+    """
+    Whether ``filename`` can be encoded from the rendered pixels, which is
+    the case for raster formats unless the ``savefig.bbox`` rc parameter is
+    ``tight`` (which requires a second, measuring, draw).
+    """
+
+    from matplotlib import rcParams
+
+    return (
+        Path(filename).suffix.lower() in RASTER_SUFFIXES
+        and rcParams["savefig.bbox"] != "tight"
+    )
+
+
+def render(fig: "Figure", dpi: Optional[float] = None) -> Tuple[np.ndarray, float]:
+    """
+    Renders the figure to an RGBA array, returning it and the resolution.
+    """
+
+    # Going through savefig applies the savefig rc parameters (dpi, face
+    # colour, transparency) exactly as a direct save would.
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format="rgba", dpi=dpi)
+
+    renderer = fig.canvas.renderer
+    rgba = np.frombuffer(buffer.getbuffer(), dtype=np.uint8).reshape(
+        int(renderer.height), int(renderer.width), 4
+    )
+
+    return rgba, renderer.dpi
+
+
+def encode(
+    rgba: np.ndarray,
+    filename: Path,
+    dpi: float,
+    config: "GlobalConfig",
+    sink: Optional[OutputSink] = None,
+):
+    """
+    Compresses and writes a rendered image, and its thumbnail if the
+    configuration asks for them, to ``filename`` in the ``sink`` (by
+    default, the filesystem).
+    """
+
+    from matplotlib.image import imsave
+
+    filename = Path(filename)
+    sink = DirectorySink() if sink is None else sink
+
+    with sink.open(filename) as handle:
+        imsave(
+            handle,
+            memoryview(rgba),
+            format=RASTER_SUFFIXES[filename.suffix.lower()],
+            origin="upper",
+            dpi=dpi,
+            pil_kwargs=pil_kwargs(filename, config),
+        )
+
+    if config.thumbnail_width is not None:
+        encode_thumbnail(rgba, thumbnail_filename(filename), config, sink=sink)
+
+    return
+
+
+def encode_thumbnail(
+    rgba: np.ndarray,
+    filename: Path,
+    config: "GlobalConfig",
+    sink: Optional[OutputSink] = None,
+):
+    """
+    Writes a copy of the rendered image, resized to the configured
+    thumbnail width.
+    """
+
+    from PIL import Image
+
+    filename = Path(filename)
+    sink = DirectorySink() if sink is None else sink
+
+    height, width, _ = rgba.shape
+    thumbnail_width = min(config.thumbnail_width, width)
+    thumbnail_height = max(round(height * thumbnail_width / width), 1)
+
+    with sink.open(filename) as handle:
+        Image.fromarray(rgba, mode="RGBA").resize(
+            (thumbnail_width, thumbnail_height), Image.LANCZOS
+        ).save(
+            handle,
+            format=RASTER_SUFFIXES[filename.suffix.lower()],
+            **(pil_kwargs(filename, config) or {}),
+        )
+
+    return
+
+
+def save_figure(
+    fig: "Figure",
+    filename: Path,
+    config: "GlobalConfig",
+    sink: Optional[OutputSink] = None,
+):
+    """
+    Saves the figure (and its thumbnail) with the output settings of the
+    configuration, synchronously, to ``filename`` in the ``sink`` (by
+    default, the filesystem).
+    """
+
+    filename = Path(filename)
+    sink = DirectorySink() if sink is None else sink
+
+    if can_encode(filename):
+        rgba, dpi = render(fig, dpi=config.dpi)
+        encode(rgba, filename, dpi, config, sink=sink)
+
+        return
+
+    options = pil_kwargs(filename, config)
+    file_format = filename.suffix[1:].lower()
+
+    with sink.open(filename) as handle:
+        if options is None:
+            fig.savefig(handle, format=file_format, dpi=config.dpi)
+        else:
+            fig.savefig(handle, format=file_format, dpi=config.dpi, pil_kwargs=options)
+
+    if config.thumbnail_width is not None:
+        rgba, _ = render(fig, dpi=config.thumbnail_width / fig.get_figwidth())
+        encode_thumbnail(rgba, thumbnail_filename(filename), config, sink=sink)
+
+    return
+
+
+@attr.s(auto_attribs=True)
+class ImageWriter:
+    """
+    Pool of threads that compress and write rendered figures. Use as a
+    context manager, or call ``close`` when finished; this waits for all
+    pending writes.
+
+    Parameters
+    ----------
+
+    threads: int, optional
+        Number of writer threads. Defaults to 4.
+
+    max_queued_bytes: int, optional
+        Maximal size of the rendered (uncompressed) images waiting to be
+        written. Rendering the next figure blocks until there is space, so
+        that memory stays bounded when writing is slower than plotting.
+        Defaults to 256 MB.
+
+    failures: Dict[str, Exception]
+        Exceptions raised while writing, by plot name.
+
+    Notes
+    -----
+
+    Only raster (PNG and WebP) files are written in the background, and only
+    when the ``savefig.bbox`` rc parameter is not ``tight`` (see
+    :func:`can_encode`); anything else is saved synchronously. Background
+    writes produce the same files as ``savefig``.
+    """
+
+    threads: int = attr.ib(default=4, converter=int)
+    max_queued_bytes: int = attr.ib(default=256 * 1024**2, converter=int)
+
+    failures: Dict[str, Exception] = attr.ib(init=False, factory=dict)
+
+    executor: ThreadPoolExecutor = attr.ib(init=False, repr=False)
+    pending: Dict[str, Future] = attr.ib(init=False, factory=dict, repr=False)
+    queued_bytes: int = attr.ib(init=False, default=0, repr=False)
+    space: threading.Condition = attr.ib(
+        init=False, factory=threading.Condition, repr=False
+    )
+
+    def __attrs_post_init__(self):
+        self.executor = ThreadPoolExecutor(
+            max_workers=max(self.threads, 1), thread_name_prefix="pageplot-writer"
+        )
+
+    def save(
+        self,
+        name: str,
+        fig: "Figure",
+        filename: Path,
+        config: "GlobalConfig",
+        sink: Optional[OutputSink] = None,
+    ):
+        """
+        Renders ``fig`` and queues it to be written to ``filename`` in the
+        ``sink`` (with the output settings of ``config``), or saves it
+        synchronously if it can not be written in the background. Errors
+        while rendering are raised immediately, whereas errors while writing
+        in the background are recorded in ``failures`` under ``name``.
+        """
+
+        if not can_encode(filename):
+            save_figure(fig, filename, config, sink=sink)
+
+            return
+
+        rgba, dpi = render(fig, dpi=config.dpi)
+
+        with self.space:
+            # Always allow a single image through, however large.
+            while self.queued_bytes > 0 and (
+                self.queued_bytes + rgba.nbytes > self.max_queued_bytes
+            ):
+                self.space.wait()
+
+            self.queued_bytes += rgba.nbytes
+
+        self.pending[name] = self.executor.submit(
+            self.write, name, rgba, Path(filename), dpi, config, sink
+        )
+
+        return
+
+    def write(
+        self,
+        name: str,
+        rgba: np.ndarray,
+        filename: Path,
+        dpi: float,
+        config: "GlobalConfig",
+        sink: Optional[OutputSink] = None,
+    ):
+        """
+        Compresses and writes a rendered image (run on the writer threads).
+        """
+
+        try:
+            encode(rgba, filename, dpi, config, sink=sink)
+        except Exception as error:
+            self.failures[name] = error
+        finally:
+            with self.space:
+                self.queued_bytes -= rgba.nbytes
+                self.space.notify_all()
+
+        return
+
+    def wait(self) -> Dict[str, Exception]:
+        """
+        Waits for all pending writes to finish, and returns the failures.
+        """
+
+        for future in self.pending.values():
+            future.result()
+
+        self.pending.clear()
+
+        return self.failures
+
+    def close(self) -> Dict[str, Exception]:
+        """
+        Waits for all pending writes, shuts down the threads, and returns
+        the failures.
+        """
+
+        failures = self.wait()
+        self.executor.shutdown()
+
+        return failures
+
+    def __enter__(self) -> "ImageWriter":
+        return self
+
+    def __exit__(self, *args):
+        self.close()
@@ -0,0 +1,215 @@
+"""
+Timing and I/O accounting for each stage of plot creation.
+
+Every stage (e.g. reading an array, pre-processing or blitting an extension,
+saving a figure) is recorded with its wall-clock time, CPU time, the bytes
+read from each file, and the bytes of arrays that it produced. The records
+can be summarised per plot, and written to a JSON report.
+"""
+
+import json
+import time
+from contextlib import contextmanager, nullcontext
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, ContextManager, Dict, Iterator, List, Optional
+
+import attr
+import numpy as np
+
+if TYPE_CHECKING:
+    from pageplot.sinks import OutputSink
+
+
+def array_bytes(*values: Any) -> int:
+    """
+    Total size in bytes of the arrays in ``values``, including those within
+    dictionaries, lists, and tuples. Everything else is ignored.
+    """
+
+    total = 0
+
+    for value in values:
+        if isinstance(value, np.ndarray):
+            total += value.nbytes
+        elif isinstance(value, dict):
+            total += array_bytes(*value.values())
+        elif isinstance(value, (list, tuple)):
+            total += array_bytes(*value)
+
+    return total
+
+
+@attr.s(auto_attribs=True)
+class StageRecord:
+    """
+    Measurements from a single stage.
+
+    Parameters
+    ----------
+
+    stage: str
+        Name of the stage, e.g. ``preprocess`` or ``save``.
+
+    plot: str, optional
+        Name of the plot that the stage belongs to, if any.
+
+    detail: str, optional
+        What the stage acted on, e.g. the extension name for ``blit``, or
+        the calculation string for ``calculation_from_string``.
+
+    wall_time: float
+        Elapsed time in seconds.
+
+    cpu_time: float
+        CPU time of this process in seconds.
+
+    bytes_read: Dict[str, int]
+        Bytes read from each file by the I/O backend during the stage.
+
+    bytes_allocated: int
+        Bytes of the arrays produced by the stage.
+    """
+
+    stage: str
+    plot: Optional[str] = None
+    detail: Optional[str] = None
+    wall_time: float = 0.0
+    cpu_time: float = 0.0
+    bytes_read: Dict[str, int] = attr.ib(factory=dict)
+    bytes_allocated: int = 0
+
+    @property
+    def total_bytes_read(self) -> int:
+        return sum(self.bytes_read.values())
+
+
+@attr.s(auto_attribs=True)
+class Instrumentation:
+    """
+    Collects a :class:`StageRecord` for each stage that is run within
+    ``stage``.
+
+    Parameters
+    ----------
+
+    data: IOSpecification, optional
+        The data that plots read from. Its ``bytes_read`` (if present) is
+        used to account for the I/O of each stage.
+    """
+
+    data: Any = None
+
+    records: List[StageRecord] = attr.ib(init=False, factory=list)
+
+    def current_bytes_read(self) -> Dict[str, int]:
+        return dict(getattr(self.data, "bytes_read", {}))
+
+    @contextmanager
+    def stage(
+        self, stage: str, plot: Optional[str] = None, detail: Optional[str] = None
+    ) -> Iterator[StageRecord]:
+        """
+        Context manager that measures the enclosed stage. The record is
+        yielded so that the caller can fill in ``bytes_allocated``.
+        """
+
+        record = StageRecord(stage=stage, plot=plot, detail=detail)
+
+        initial_bytes_read = self.current_bytes_read()
+        initial_wall_time = time.perf_counter()
+        initial_cpu_time = time.process_time()
+
+        try:
+            yield record
+        finally:
+            record.wall_time = time.perf_counter() - initial_wall_time
+            record.cpu_time = time.process_time() - initial_cpu_time
+
+            for filename, nbytes in self.current_bytes_read().items():
+                read = nbytes - initial_bytes_read.get(filename, 0)
+
+                if read > 0:
+                    record.bytes_read[filename] = read
+
+            self.records.append(record)
+
+    def plot_summary(self) -> List[Dict[str, Any]]:
+        """
+        Totals of each measurement for every plot, slowest (by wall time)
+        first. Each entry also contains the wall time spent in each stage.
+        """
+
+        summary: Dict[str, Dict[str, Any]] = {}
+
+        for record in self.records:
+            if record.plot is None:
+                continue
+
+            totals = summary.setdefault(
+                record.plot,
+                dict(
+                    name=record.plot,
+                    wall_time=0.0,
+                    cpu_time=0.0,
+                    bytes_read=0,
+                    bytes_allocated=0,
+                    stages={},
+                ),
+            )
+
+            totals["wall_time"] += record.wall_time
+            totals["cpu_time"] += record.cpu_time
+            totals["bytes_read"] += record.total_bytes_read
+            totals["bytes_allocated"] += record.bytes_allocated
+            totals["stages"][record.stage] = (
+                totals["stages"].get(record.stage, 0.0) + record.wall_time
+            )
+
+        return sorted(summary.values(), key=lambda x: x["wall_time"], reverse=True)
+
+    def report(self) -> Dict[str, Any]:
+        """
+        Machine-readable report of all stages, and the per-plot summary.
+        """
+
+        bytes_read: Dict[str, int] = {}
+
+        for record in self.records:
+            for filename, nbytes in record.bytes_read.items():
+                bytes_read[filename] = bytes_read.get(filename, 0) + nbytes
+
+        return dict(
+            bytes_read=bytes_read,
+            plots=self.plot_summary(),
+            stages=[attr.asdict(record) for record in self.records],
+        )
+
+    def write_report(self, filename: Path, sink: Optional["OutputSink"] = None):
+        """
+        Writes the output of ``report`` to a JSON file, in the ``sink`` if
+        one is given (see :mod:`pageplot.sinks`).
+        """
+
+        if sink is None:
+            with open(filename, "w") as handle:
+                json.dump(self.report(), handle, indent=2)
+        else:
+            sink.write(filename, json.dumps(self.report(), indent=2).encode("utf-8"))
+
+
+def stage(
+    instrumentation: Optional[Instrumentation],
+    stage: str,
+    plot: Optional[str] = None,
+    detail: Optional[str] = None,
+) -> ContextManager[Optional[StageRecord]]:
+    """
+    Measures a stage with ``instrumentation``, if it is not ``None``.
+    Otherwise, returns a context manager that does nothing and yields
+    ``None``.
+    """
+
+    if instrumentation is None:
+        return nullcontext()
+
+    return instrumentation.stage(stage=stage, plot=plot, detail=detail)
@@ -7,7 +7,7 @@ do that. These are typically latency limited on HPC systems.
 
 from glob import glob
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Type, Union
+from typing import Any, Dict, List, Optional, Tuple, Type, Union
 
 import attr
 import h5py
@@ -16,7 +16,12 @@ import unyt
 
 from pageplot.exceptions import PagePlotParserError
 
-from .spec import IOSpecification, MetadataSpecification
+from .spec import (
+    IOSpecification,
+    MetadataSpecification,
+    file_fingerprint,
+    selected_size,
+)
 
 
 @attr.s(auto_attribs=True)
@@ -64,7 +69,7 @@ class MetadataAREPOSubFind(MetadataSpecification):
         self.box_length = unyt.unyt_quantity(
             float(self.get_header("BoxSize")) / self.h, self.length
         )
-        self.box_volume = self.box_length ** 3
+        self.box_volume = self.box_length**3
 
         # Set up unit registry. This gives units for all possible fields.
         self.unit_registry = {
@@ -98,11 +103,11 @@ class MetadataAREPOSubFind(MetadataSpecification):
             "Subhalo/SubhaloBHMass": self.mass / self.h,
             "Subhalo/SubhaloBHMdot": self.mass / self.time,
             "Subhalo/SubhaloBfldDisk": self.h
-            * self.a ** 2
+            * self.a**2
             * (self.mass)
             / ((self.length) * (self.time) ** 2),
             "Subhalo/SubhaloBfldHalo": self.h
-            * self.a ** 2
+            * self.a**2
             * (self.mass)
             / ((self.length) * (self.time) ** 2),
             "Subhalo/SubhaloCM": self.a * self.length / self.h,
@@ -201,6 +206,19 @@ class IOAREPOSubFind(IOSpecification):
 
         return
 
+    def fingerprint(self) -> str:
+        """
+        Fingerprint of all of the files that make up the catalogue.
+        """
+
+        if self.filename.stem.endswith(".0"):
+            if self.ordered_filenames is None:
+                self.get_ordered_filenames()
+
+            return file_fingerprint(*self.ordered_filenames)
+
+        return file_fingerprint(self.filename)
+
     def read_raw_field(self, field: str, selector: np.s_) -> np.array:
         """
         Reads a raw field from (potentially) many files.
@@ -219,6 +237,8 @@ class IOAREPOSubFind(IOSpecification):
                     with h5py.File(path, "r") as handle:
                         read.append(handle[field][selector])
                         never_found = False
+
+                    self.record_read(path, read[-1].nbytes)
                 except KeyError:
                     # Empty file, just skip it.
                     continue
@@ -237,8 +257,65 @@ class IOAREPOSubFind(IOSpecification):
             with h5py.File(self.filename, "r") as handle:
                 raw = handle[field][selector]
 
+            self.record_read(self.filename, raw.nbytes)
+
         return raw
 
+    def estimate_size(self, path: str) -> Optional[int]:
+        """
+        Estimates the size of the read from the shapes of the datasets
+        in all files, without reading them.
+        """
+
+        field, selector = self.parse_path(path)
+
+        if self.filename.stem.endswith(".0"):
+            if self.ordered_filenames is None:
+                self.get_ordered_filenames()
+
+            filenames = self.ordered_filenames
+        else:
+            filenames = [self.filename]
+
+        size = 0
+
+        for filename in filenames:
+            try:
+                with h5py.File(filename, "r") as handle:
+                    dataset = handle[field]
+                    size += selected_size(dataset.shape, selector) * (
+                        dataset.dtype.itemsize
+                    )
+            except KeyError:
+                # Empty file.
+                continue
+            except OSError:
+                return None
+
+        return size
+
+    def parse_path(self, path: str) -> Tuple[str, Any]:
+        """
+        Splits a path, e.g. ``Subhalo/SubhaloMassType[:, 4]``, into the
+        field and selector.
+        """
+
+        if path.count("[") > 0:
+            start = path.find("[")
+            stop = path.find("]")
+
+            field = path[:start]
+
+            # For some reason python doesn't like us polluting the local namespace.
+            stored_result = {}
+            exec(f"selector = np.s_[{path[start+1:stop]}]", {"np": np}, stored_result)
+            selector = stored_result["selector"]
+        else:
+            field = path
+            selector = np.s_[:]
+
+        return field, selector
+
     def data_from_string(
         self,
         path: Optional[str],
@@ -264,19 +341,7 @@ class IOAREPOSubFind(IOSpecification):
         if mask is None:
             mask = np.s_[:]
 
-        if path.count("[") > 0:
-            start = path.find("[")
-            stop = path.find("]")
-
-            field = path[:start]
-
-            # For some reason python doesn't like us polluting the local namespace.
-            stored_result = {}
-            exec(f"selector = np.s_[{path[start+1:stop]}]", {"np": np}, stored_result)
-            selector = stored_result["selector"]
-        else:
-            field = path
-            selector = np.s_[:]
+        field, selector = self.parse_path(path)
 
         return unyt.unyt_array(
             self.read_raw_field(field=field, selector=selector),
@@ -0,0 +1,137 @@
+"""
+A memory-bounded cache of columns read from any I/O specification.
+
+Many plots share the same columns (and masks), so the raw, unmasked,
+arrays are kept in memory between plots up to a memory budget, with the
+least recently used columns evicted first.
+"""
+
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Union
+
+import attr
+import numpy as np
+import unyt
+
+from .spec import IOSpecification
+
+
+@attr.s(auto_attribs=True)
+class ColumnCache:
+    """
+    Wraps an object conforming to the :class:`IOSpecification`, caching
+    the columns returned by its ``data_from_string``. Conforms to the
+    specification itself, so can be passed to plots in place of the data.
+
+    Parameters
+    ----------
+
+    data: IOSpecification
+        The data to read from.
+
+    memory_budget: int, optional
+        Maximal number of bytes of columns to keep in memory. Columns larger
+        than this are never cached. Defaults to no limit.
+
+    Notes
+    -----
+
+    The cached arrays are shared between all consumers; as for the
+    extensions, they must not be modified in-place.
+    """
+
+    data: Any
+    memory_budget: Optional[int] = None
+
+    columns: Dict[str, unyt.unyt_array] = attr.ib(init=False, factory=OrderedDict)
+    resident_bytes: int = attr.ib(init=False, default=0)
+
+    hits: int = attr.ib(init=False, default=0)
+    misses: int = attr.ib(init=False, default=0)
+
+    @property
+    def metadata(self):
+        return self.data.metadata
+
+    @property
+    def bytes_read(self) -> Dict[str, int]:
+        return getattr(self.data, "bytes_read", {})
+
+    def fingerprint(self) -> str:
+        return self.data.fingerprint()
+
+    def estimate_size(self, path: str) -> Optional[int]:
+        if path in self.columns:
+            return self.columns[path].nbytes
+
+        return self.data.estimate_size(path)
+
+    def evict(self, path: str):
+        """
+        Removes a single column from the cache, if present.
+        """
+
+        column = self.columns.pop(path, None)
+
+        if column is not None:
+            self.resident_bytes -= column.nbytes
+
+    def reserve(self, size: int):
+        """
+        Evicts the least recently used columns until there are at least
+        ``size`` bytes available within the memory budget.
+        """
+
+        if self.memory_budget is None:
+            return
+
+        while self.columns and self.resident_bytes + size > self.memory_budget:
+            self.evict(next(iter(self.columns)))
+
+    def clear(self):
+        self.columns.clear()
+        self.resident_bytes = 0
+
+    def data_from_string(
+        self,
+        path: Optional[str],
+        mask: Optional[Union[np.array, np.lib.index_tricks.IndexExpression]] = None,
+    ) -> Optional[unyt.unyt_array]:
+        """
+        Gets the (cached, if possible) column, and applies the mask.
+        """
+
+        if path is None:
+            return None
+
+        if path in self.columns:
+            self.hits += 1
+            self.columns.move_to_end(path)
+            column = self.columns[path]
+        else:
+            self.misses += 1
+            column = self.data.data_from_string(path=path, mask=None)
+
+            if self.memory_budget is None or column.nbytes <= self.memory_budget:
+                self.reserve(column.nbytes)
+                self.columns[path] = column
+                self.resident_bytes += column.nbytes
+
+        if mask is None:
+            return column
+
+        return column[mask]
+
+    def calculation_from_string(
+        self,
+        calculate: Optional[str],
+        mask: Optional[Union[np.array, np.lib.index_tricks.IndexExpression]] = None,
+    ) -> Optional[unyt.unyt_array]:
+        """
+        See :meth:`IOSpecification.calculation_from_string`; individual
+        columns are read through the cache.
+        """
+
+        return IOSpecification.calculation_from_string(
+            self, calculate=calculate, mask=mask
+        )
@@ -12,7 +12,7 @@ import unyt
 
 from pageplot.exceptions import PagePlotParserError
 
-from .spec import IOSpecification, MetadataSpecification
+from .spec import IOSpecification, MetadataSpecification, selected_size
 
 field_search = re.compile(r"(.*?)(\[.*?\])? (.*)")
 
@@ -29,6 +29,30 @@ class IOHDF5(IOSpecification):
     # Storage object that is lazy-loaded
     metadata: Optional[MetadataHDF5] = None
 
+    def estimate_size(self, path: str) -> Optional[int]:
+        """
+        Estimates the size of the read from the dataset's shape and type.
+        """
+
+        match = field_search.match(path)
+
+        if not match:
+            return None
+
+        if match.group(2) is not None:
+            stored_result = {}
+            exec(f"selector = np.s_{match.group(2)}", {"np": np}, stored_result)
+            selector = stored_result["selector"]
+        else:
+            selector = np.s_[:]
+
+        try:
+            with h5py.File(self.filename, "r") as handle:
+                dataset = handle[match.group(1)]
+                return selected_size(dataset.shape, selector) * dataset.dtype.itemsize
+        except (OSError, KeyError):
+            return None
+
     def data_from_string(
         self,
         path: Optional[str],
@@ -67,7 +91,11 @@ class IOHDF5(IOSpecification):
             unit = match.group(3)
 
             with h5py.File(self.filename, "r") as handle:
-                return unyt.unyt_array(handle[field][selector][mask], unit, name=field)
+                raw = handle[field][selector]
+
+            self.record_read(self.filename, raw.nbytes)
+
+            return unyt.unyt_array(raw[mask], unit, name=field)
 
         else:
             raise PagePlotParserError(
@@ -2,8 +2,9 @@
 A wrapper for multiple IO components.
 """
 
+import hashlib
 from pathlib import Path
-from typing import Any, List, Optional, Union
+from typing import Any, Dict, List, Optional, Union
 
 import attr
 import numpy as np
@@ -50,6 +51,41 @@ class MultiIOSpecification:
             base_spec=self.base_metadata_spec,
         )
 
+    def fingerprint(self) -> str:
+        """
+        Combined fingerprint of all of the individual data files.
+        """
+
+        return hashlib.sha256(
+            ";".join(data.fingerprint() for data in self.individual_data).encode()
+        ).hexdigest()
+
+    @property
+    def bytes_read(self) -> Dict[str, int]:
+        """
+        Bytes read from each file, over all of the individual data.
+        """
+
+        bytes_read = {}
+
+        for data in self.individual_data:
+            bytes_read.update(getattr(data, "bytes_read", {}))
+
+        return bytes_read
+
+    def estimate_size(self, path: str) -> Optional[int]:
+        """
+        Sum of the estimated sizes from the individual files, or ``None``
+        if any are unknown.
+        """
+
+        sizes = [data.estimate_size(path) for data in self.individual_data]
+
+        if any(size is None for size in sizes):
+            return None
+
+        return sum(sizes)
+
     def data_from_string(
         self,
         path: Optional[str],
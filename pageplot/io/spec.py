@@ -5,9 +5,11 @@ These can be extended by using their pluggy hooks
 and iheritence.
 """
 
+import hashlib
+import os
 import re
 from pathlib import Path
-from typing import Optional, Type, Union
+from typing import Dict, Optional, Tuple, Type, Union
 
 import attr
 import numpy as np
@@ -16,6 +18,36 @@ import unyt
 dataset_searcher = re.compile(r"\{(.*?)\}")
 
 
+def selected_size(shape: Tuple[int, ...], selector) -> int:
+    """
+    Number of elements selected from an array of the given shape by
+    ``selector`` (a slice expression), without allocating the array.
+    """
+
+    return np.broadcast_to(np.empty((), dtype=bool), shape)[selector].size
+
+
+def file_fingerprint(*filenames: Path) -> str:
+    """
+    Creates a fingerprint of the given files from their resolved paths,
+    sizes, and modification times. This changes whenever the files are
+    re-written, without having to read their contents.
+    """
+
+    hasher = hashlib.sha256()
+
+    for filename in filenames:
+        path = Path(filename).resolve()
+
+        try:
+            stat = os.stat(path)
+            hasher.update(f"{path}:{stat.st_size}:{stat.st_mtime_ns};".encode())
+        except OSError:
+            hasher.update(f"{path};".encode())
+
+    return hasher.hexdigest()
+
+
 @attr.s(auto_attribs=True)
 class MetadataSpecification:
     """
@@ -44,9 +76,39 @@ class IOSpecification:
     # Storage object that is lazy-loaded
     metadata: MetadataSpecification = attr.ib(init=False)
 
+    # Number of bytes read from each file, see ``record_read``.
+    bytes_read: Dict[str, int] = attr.ib(init=False, factory=dict)
+
     def __attrs_post_init__(self):
         self.metadata = self.metadata_specification(filename=self.filename)
 
+    def record_read(self, filename: Path, nbytes: int):
+        """
+        Accounts for ``nbytes`` read from ``filename``. Backends should call
+        this for each read that they make, so that I/O can be reported on.
+        """
+
+        filename = str(filename)
+        self.bytes_read[filename] = self.bytes_read.get(filename, 0) + int(nbytes)
+
+    def fingerprint(self) -> str:
+        """
+        Return a string that changes whenever the underlying data does.
+        Used to key products derived from the data (e.g. the pre-processing
+        cache). Backends that read from more than one file should override
+        this.
+        """
+        return file_fingerprint(self.filename)
+
+    def estimate_size(self, path: str) -> Optional[int]:
+        """
+        Estimate the size in bytes of the (unmasked) array that
+        ``data_from_string(path)`` would return, without reading it. Used
+        to schedule plots within a memory budget. Return ``None`` if this
+        is unknown.
+        """
+        return None
+
     def data_from_string(
         self,
         path: Optional[str],
@@ -10,6 +10,40 @@ import unyt
 
 from pageplot.io.spec import IOSpecification
 
+# In order of priority. Once a match is found the search
+# exits (so e.g. <= needs to be before <).
+mask_operators = [
+    ("<=", operator.le),
+    (">=", operator.ge),
+    ("<", operator.lt),
+    (">", operator.gt),
+    ("==", operator.eq),
+    ("!=", operator.ne),
+]
+
+
+def get_mask_calculation(mask_text: Optional[str]) -> Optional[str]:
+    """
+    Gets the calculation string (to be passed to
+    ``data.calculation_from_string``) that the mask is based upon. Useful
+    for finding the data required by a mask without reading it.
+
+    Parameters
+    ----------
+
+    mask_text: str | None
+        Mask text matching the specification in :func:`get_mask`.
+    """
+
+    if mask_text is None:
+        return None
+
+    for check, _ in mask_operators:
+        if check in mask_text:
+            return mask_text.split(check)[0].strip()
+
+    return mask_text
+
 
 def get_mask(
     data: IOSpecification, mask_text: Optional[str]
@@ -50,19 +84,7 @@ def get_mask(
     if mask_text is None:
         return np.s_[:]
 
-    # In order of priority. Once a match is found the loop
-    # exits (so e.g. <= needs to be before <).
-    contain_possibilities = ["<=", ">=", "<", ">", "==", "!="]
-    contain_operators = [
-        operator.le,
-        operator.ge,
-        operator.lt,
-        operator.gt,
-        operator.eq,
-        operator.ne,
-    ]
-
-    for op, check in zip(contain_operators, contain_possibilities):
+    for check, op in mask_operators:
         if check in mask_text:
             data_name, compare = mask_text.split(check)
 
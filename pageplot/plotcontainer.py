@@ -2,14 +2,25 @@
 PlotModel conatiner, used to 'create all the plots'.
 """
 
+from contextlib import nullcontext
 from pathlib import Path
-from typing import Any, Dict
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
 
 import attr
 
+from pageplot.exceptions import PagePlotWriteError
 from pageplot.extensionmodel import PlotExtension
+from pageplot.hooks import StageHook, hooked_stage
+from pageplot.imagewriter import ImageWriter
+from pageplot.instrumentation import Instrumentation
+from pageplot.io.columncache import ColumnCache
 from pageplot.io.spec import IOSpecification
 from pageplot.plotmodel import PlotModel
+from pageplot.scheduler import PlotScheduler, SchedulerReport
+from pageplot.sinks import DirectorySink, OutputSink
+
+if TYPE_CHECKING:
+    from pageplot.serialization import SerializedDataWriter
 
 
 @attr.s(auto_attribs=True)
@@ -35,8 +46,52 @@ class PlotContainer:
     output_path: Path
         Where to write the figures. Defaults to the current working directory.
 
+    sink: OutputSink, optional
+        Where to write the figures instead of ``output_path``, e.g. a
+        :class:`pageplot.sinks.BundleSink` to pack them into one archive.
+        This is not closed by the container.
+
     additional_extensions: Dict[str, PlotExtension]
         Additional plot extensions to use with the given figures.
+
+    memory_budget: int, optional
+        Budget in bytes for the data read by ``process``. Columns shared
+        between plots are kept in memory within this budget, and plots are
+        ordered and throttled by their estimated size to stay within it.
+
+    instrumentation: Instrumentation, optional
+        Records the time and I/O of each stage of every plot. Plots without
+        their own instrumentation are given this one. Set to ``None`` to
+        disable.
+
+    hooks: List[StageHook], optional
+        Hooks called before and after each stage of every plot (see
+        :mod:`pageplot.hooks`). Plots without their own hooks are given these.
+        The ``plot`` stage, around each whole plot, is only run by
+        ``process``.
+
+    writer_threads: int, optional
+        Number of background threads compressing and writing the figures
+        (see :class:`ImageWriter`), so that this overlaps with making the
+        next plot. Set to 0 to save synchronously. Defaults to 4.
+
+    max_queued_bytes: int, optional
+        Maximal size of the rendered images waiting to be written by the
+        background threads. Defaults to 256 MB.
+
+    render_figures: bool, optional
+        Whether to draw and save the figures with matplotlib. Without this,
+        the extensions are only pre-processed (e.g. for the figures to be
+        drawn in the browser, see :mod:`pageplot.webpage.client`). Defaults
+        to True.
+
+    scheduler_report: SchedulerReport, optional
+        Column cache statistics from the last call to ``process``.
+
+    write_failures: Dict[str, Exception]
+        Errors, by plot name, from writing the figures in the background in
+        the last call to ``process`` or ``create_figures``. If there are
+        any, a ``PagePlotWriteError`` is raised once all other plots are done.
     """
 
     data: IOSpecification
@@ -46,11 +101,38 @@ class PlotContainer:
         default=None, converter=attr.converters.default_if_none("png")
     )
     output_path: Path = attr.ib(default=Path("."), converter=Path)
+    sink: Optional[OutputSink] = None
 
     additional_extensions: Dict[str, PlotExtension] = attr.ib(
         default=attr.Factory(dict)
     )
 
+    memory_budget: Optional[int] = None
+
+    instrumentation: Optional[Instrumentation] = attr.ib(
+        default=attr.Factory(
+            lambda self: Instrumentation(data=self.data), takes_self=True
+        )
+    )
+
+    hooks: List[StageHook] = attr.ib(factory=list)
+
+    writer_threads: int = attr.ib(default=4, converter=int)
+    max_queued_bytes: int = attr.ib(default=256 * 1024**2, converter=int)
+
+    render_figures: bool = True
+
+    scheduler_report: Optional[SchedulerReport] = attr.ib(init=False, default=None)
+    write_failures: Dict[str, Exception] = attr.ib(init=False, factory=dict)
+
+    def __attrs_post_init__(self):
+        for plot in self.plots.values():
+            if plot.instrumentation is None:
+                plot.instrumentation = self.instrumentation
+
+            if not plot.hooks:
+                plot.hooks = self.hooks
+
     def setup_figures(self):
         """
         Sets up the figures, but does not yet
@@ -59,7 +141,9 @@ class PlotContainer:
 
         for plot in self.plots.values():
             plot.associate_data(data=self.data)
-            plot.setup_figures()
+
+            if self.render_figures:
+                plot.setup_figures()
 
     def run_extensions(self):
         """
@@ -69,15 +153,186 @@ class PlotContainer:
         for plot in self.plots.values():
             plot.run_extensions(additional_extensions=self.additional_extensions)
 
-    def create_figures(self):
+    def output_sink(self) -> OutputSink:
+        """
+        The sink that the figures are written to: ``sink`` if given, or
+        otherwise the ``output_path`` directory.
+        """
+
+        return DirectorySink(self.output_path) if self.sink is None else self.sink
+
+    def image_writer(self) -> Optional[ImageWriter]:
+        """
+        Creates the background image writer, or returns ``None`` if figures
+        are to be saved synchronously.
+        """
+
+        if self.writer_threads <= 0 or not self.render_figures:
+            return None
+
+        return ImageWriter(
+            threads=self.writer_threads, max_queued_bytes=self.max_queued_bytes
+        )
+
+    def close_hooks(self):
+        """
+        Closes the hooks, so that those that buffer their output (e.g.
+        profiles) write it, even if the plotting failed.
+        """
+
+        for hook in self.hooks:
+            hook.close()
+
+    def check_write_failures(self, image_writer: Optional[ImageWriter]):
+        """
+        Waits for the background writes to finish, and raises a
+        ``PagePlotWriteError`` listing every plot that could not be written.
+        """
+
+        self.write_failures = {} if image_writer is None else image_writer.close()
+
+        if self.write_failures:
+            raise PagePlotWriteError(
+                self.write_failures,
+                "Unable to write figures:\n"
+                + "\n".join(
+                    f"{name}: {error!r}" for name, error in self.write_failures.items()
+                ),
+            )
+
+        return
+
+    def create_figures(
+        self, serialized_data_writer: Optional["SerializedDataWriter"] = None
+    ):
         """
         Creates all figures and saves them to disk.
+
+        Parameters
+        ----------
+
+        serialized_data_writer: SerializedDataWriter, optional
+            If given, the serialized data of each plot is written out as soon
+            as its figure has been saved.
+        """
+
+        sink = self.output_sink()
+        image_writer = self.image_writer()
+
+        try:
+            for name, plot in self.plots.items():
+                if self.render_figures:
+                    plot.perform_blitting()
+                    plot.save(
+                        f"{name}.{self.file_extension}",
+                        image_writer=image_writer,
+                        sink=sink,
+                    )
+                    plot.finalize()
+
+                plot.write_additional_outputs(sink)
+
+                if serialized_data_writer is not None:
+                    serialized_data_writer.write_plot(name, plot.serialize())
+        except BaseException:
+            # Still finish the writes already queued, but report the error
+            # that stopped the plotting.
+            if image_writer is not None:
+                image_writer.close()
+
+            raise
+        finally:
+            self.close_hooks()
+
+        self.check_write_failures(image_writer)
+
+    def process(self, serialized_data_writer: Optional["SerializedDataWriter"] = None):
         """
+        Creates and saves all figures, one plot at a time. This is the
+        equivalent of ``setup_figures``, ``run_extensions``, and
+        ``create_figures``, but each plot is saved, and its raw data
+        released, straight after its own pre-processing. Peak memory is
+        hence set by the largest plot, rather than growing with the number
+        of plots.
+
+        Plots are run in an order that groups those sharing columns (see
+        :class:`PlotScheduler`), so that each column is ideally only read
+        once. Figures are compressed and written in the background (see
+        ``writer_threads``), overlapping with the following plots.
+
+        Parameters
+        ----------
+
+        serialized_data_writer: SerializedDataWriter, optional
+            If given, the serialized data of each plot is written out as soon
+            as its figure has been saved.
+
+        Returns
+        -------
+
+        scheduler_report: SchedulerReport
+            Expected and achieved column cache hit rates.
+        """
+
+        data = ColumnCache(data=self.data, memory_budget=self.memory_budget)
+        scheduler = PlotScheduler(data=data, memory_budget=self.memory_budget)
+        sink = self.output_sink()
+        image_writer = self.image_writer()
+
+        try:
+            for name in scheduler.order(self.plots):
+                plot = self.plots[name]
+
+                scheduler.throttle(name, plot)
+
+                if plot.hooks:
+                    context = hooked_stage(plot.hooks, nullcontext(), "plot", plot=name)
+                else:
+                    context = nullcontext()
+
+                with context:
+                    plot.associate_data(data=data)
+
+                    if self.render_figures:
+                        plot.setup_figures()
+
+                    plot.run_extensions(
+                        additional_extensions=self.additional_extensions
+                    )
+
+                    if self.render_figures:
+                        plot.perform_blitting()
+                        plot.save(
+                            f"{name}.{self.file_extension}",
+                            image_writer=image_writer,
+                            sink=sink,
+                        )
+                        plot.finalize()
+
+                    plot.write_additional_outputs(sink)
+
+                if serialized_data_writer is not None:
+                    serialized_data_writer.write_plot(name, plot.serialize())
+
+                plot.release()
+                scheduler.release(name)
+        except BaseException:
+            # Still finish the writes already queued, but report the error
+            # that stopped the plotting.
+            if image_writer is not None:
+                image_writer.close()
+
+            raise
+        finally:
+            self.close_hooks()
+
+        self.scheduler_report = scheduler.report()
+
+        data.clear()
+
+        self.check_write_failures(image_writer)
 
-        for name, plot in self.plots.items():
-            plot.perform_blitting()
-            plot.save(self.output_path / f"{name}.{self.file_extension}")
-            plot.finalize()
+        return self.scheduler_report
 
     def serialize(self) -> Dict[str, Any]:
         """
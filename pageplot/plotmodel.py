@@ -5,19 +5,26 @@ From this all data and plotting flow.
 """
 
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Union
+from typing import TYPE_CHECKING, Any, ContextManager, Dict, List, Optional, Union
 
 import attr
-import matplotlib.pyplot as plt
 import numpy as np
 import unyt
 
 from pageplot.config import GlobalConfig
 from pageplot.exceptions import PagePlotParserError
 from pageplot.extensionmodel import PlotExtension
-from pageplot.extensions import built_in_extensions
+from pageplot.hooks import StageHook, hooked_stage
+from pageplot.imagewriter import ImageWriter, save_figure
+from pageplot.instrumentation import Instrumentation, StageRecord, array_bytes, stage
 from pageplot.io.spec import IOSpecification
 from pageplot.mask import get_mask
+from pageplot.plugins import plot_extension_registry
+from pageplot.sinks import DirectorySink, OutputSink
+
+if TYPE_CHECKING:
+    from matplotlib.axes import Axes
+    from matplotlib.figure import Figure
 
 
 @attr.s(auto_attribs=True)
@@ -35,7 +42,10 @@ class PlotModel:
     ``run_extensions`` - runs all of the extensions' ``preprocess`` steps
     ``perform_blitting`` - runs the extensions' ``blit`` functions
     ``save`` - writes out the figures to disk
-    ``finalize`` - closes the Figure object
+    ``write_additional_outputs`` - (optional) writes any other files the
+    extensions produce
+    ``finalize`` - drops the Figure object
+    ``release`` - (optional) drops the raw data used by the extensions
 
     You can also serialize the contents of the whole figure to a dictionary
     with the ``serialize`` object.
@@ -64,7 +74,11 @@ class PlotModel:
     mask: str, optional
         Mask text (see :func:`get_mask`).
 
+    instrumentation: Instrumentation, optional
+        If given, the time and I/O of each stage are recorded here.
 
+    hooks: List[StageHook], optional
+        Hooks called before and after each stage (see :mod:`pageplot.hooks`).
     """
 
     name: str
@@ -82,10 +96,52 @@ class PlotModel:
 
     mask: Optional[str] = None
 
+    instrumentation: Optional[Instrumentation] = attr.ib(default=None, repr=False)
+    hooks: List[StageHook] = attr.ib(factory=list, repr=False)
+
     data: IOSpecification = attr.ib(init=False)
-    fig: plt.Figure = attr.ib(init=False)
-    axes: plt.Axes = attr.ib(init=False)
+    fig: "Figure" = attr.ib(init=False)
+    axes: "Axes" = attr.ib(init=False)
     extensions: Dict[str, PlotExtension] = attr.ib(init=False)
+    additional_outputs: List[str] = attr.ib(init=False, factory=list)
+
+    def measure(
+        self, stage_name: str, detail: Optional[str] = None
+    ) -> ContextManager[Optional[StageRecord]]:
+        """
+        Context manager that records a stage of this plot with the
+        ``instrumentation``, if there is any (yielding ``None`` otherwise),
+        and calls the ``hooks`` around it.
+        """
+
+        context = stage(self.instrumentation, stage_name, plot=self.name, detail=detail)
+
+        if self.hooks:
+            return hooked_stage(
+                self.hooks, context, stage_name, plot=self.name, detail=detail
+            )
+
+        return context
+
+    def calculation_from_string(
+        self,
+        calculate: Optional[str],
+        mask: Union[np.array, np.lib.index_tricks.IndexExpression],
+    ) -> Optional[unyt.unyt_array]:
+        """
+        Measured call to ``self.data.calculation_from_string``.
+        """
+
+        if calculate is None:
+            return None
+
+        with self.measure("calculation_from_string", detail=calculate) as record:
+            output = self.data.calculation_from_string(calculate, mask=mask)
+
+            if record is not None:
+                record.bytes_allocated = array_bytes(output)
+
+        return output
 
     def associate_data(self, data: IOSpecification):
         """
@@ -96,14 +152,17 @@ class PlotModel:
             Any data file that conforms to the specification.
         """
 
-        self.data = data
+        with self.measure("associate_data"):
+            self.data = data
 
     def setup_figures(self):
         """
-        Sets up the internal figure and axes.
+        Sets up the internal figure and axes. These are not registered with
+        pyplot, so are safe to create in threads and worker processes.
         """
 
-        self.fig, self.axes = plt.subplots()
+        with self.measure("setup_figures"):
+            self.fig, self.axes = self.config.create_figure()
 
         return
 
@@ -115,6 +174,10 @@ class PlotModel:
         excluding the plotting). Internal extensions are performed
         first, then any additional extensions are executed.
 
+        If the configuration has a pre-processing cache, extensions that
+        support it are restored from there when possible. Data is only read
+        if it is required by an extension that could not be restored.
+
         additional_extensions: Dict[str, PlotExtension]
             Any additional extensions conforming to the specification.
         """
@@ -137,39 +200,104 @@ class PlotModel:
             else:
                 units[name] = unyt.unyt_quantity(1.0, value)
 
-        mask = get_mask(data=self.data, mask_text=self.mask)
-
         self.extensions = {}
 
         if additional_extensions is None:
             additional_extensions = {}
 
-        combined_extensions = {**additional_extensions, **built_in_extensions}
+        registered_extensions = plot_extension_registry()
+
+        # Same ordering and precedence as {**additional, **registered}, but
+        # without importing the registered extensions that are not used.
+        extension_names = [
+            *additional_extensions.keys(),
+            *(
+                name
+                for name in registered_extensions
+                if name not in additional_extensions
+            ),
+        ]
 
         for name in self.plot_spec.keys():
-            try:
-                Extension = combined_extensions[name]
-            except KeyError:
+            if name not in extension_names:
                 raise PagePlotParserError(
                     name, "Unable to find matching extension for configuration value."
                 )
 
-        for name, Extension in combined_extensions.items():
+        cache = self.config.preprocess_cache
+        data_fingerprint = None if cache is None else self.data.fingerprint()
+
+        # Read lazily, and only once, shared between all extensions.
+        loaded_data = dict(x=None, y=None, z=None)
+        data_loaded = False
+
+        for name in extension_names:
             if name not in self.plot_spec.keys():
                 continue
 
+            if name in registered_extensions:
+                Extension = registered_extensions[name]
+            else:
+                Extension = additional_extensions[name]
+
+            parameters = self.plot_spec.get(name, {})
+
+            cache_key = None
+            state = None
+
+            if cache is not None and Extension.preprocess_state:
+                cache_key = cache.key(
+                    extension=f"{Extension.__module__}.{Extension.__qualname__}",
+                    name=name,
+                    parameters=parameters,
+                    units={key: str(value.units) for key, value in units.items()},
+                    x=self.x,
+                    y=self.y,
+                    z=self.z,
+                    mask=self.mask,
+                    data=data_fingerprint,
+                )
+                state = cache.load(cache_key)
+
+            needs_data = state is None or Extension.blit_requires_data
+
+            if needs_data and Extension.requires_data and not data_loaded:
+                with self.measure("get_mask", detail=self.mask) as record:
+                    mask = get_mask(data=self.data, mask_text=self.mask)
+
+                    if record is not None:
+                        record.bytes_allocated = array_bytes(mask)
+
+                loaded_data = dict(
+                    x=self.calculation_from_string(self.x, mask=mask),
+                    y=self.calculation_from_string(self.y, mask=mask),
+                    z=self.calculation_from_string(self.z, mask=mask),
+                )
+                data_loaded = True
+
             extension = Extension(
                 name=name,
                 config=self.config,
                 metadata=self.data.metadata,
-                x=self.data.calculation_from_string(self.x, mask=mask),
-                y=self.data.calculation_from_string(self.y, mask=mask),
-                z=self.data.calculation_from_string(self.z, mask=mask),
+                **loaded_data,
                 **units,
-                **self.plot_spec.get(name, {}),
+                **parameters,
             )
 
-            extension.preprocess()
+            if state is None:
+                with self.measure("preprocess", detail=name) as record:
+                    extension.preprocess()
+
+                    if record is not None:
+                        record.bytes_allocated = array_bytes(
+                            extension.get_preprocess_state()
+                        )
+
+                if cache_key is not None:
+                    cache.store(cache_key, extension.get_preprocess_state())
+            else:
+                with self.measure("restore", detail=name):
+                    extension.set_preprocess_state(state)
 
             self.extensions[name] = extension
 
@@ -183,16 +311,31 @@ class PlotModel:
         without affecting or creating the figure.
         """
 
-        for extension in self.extensions.values():
-            extension.blit(fig=self.fig, axes=self.axes)
+        for name, extension in self.extensions.items():
+            with self.measure("blit", detail=name):
+                extension.blit(fig=self.fig, axes=self.axes)
 
-    def save(self, filename: Path):
+    def save(
+        self,
+        filename: Path,
+        image_writer: Optional[ImageWriter] = None,
+        sink: Optional[OutputSink] = None,
+    ):
         """
         Saves the figure to file.
 
         filename: Path
             Filename that you would like to save the figure to. Can have
-            any matplotlib-compatible file extension.
+            any matplotlib-compatible file extension. The resolution,
+            compression, and thumbnails are set by the configuration.
+
+        image_writer: ImageWriter, optional
+            If given, the figure is only rendered here, and compressed and
+            written to disk in the background by the writer's threads.
+
+        sink: OutputSink, optional
+            Where to write the figure, with ``filename`` relative to it (see
+            :mod:`pageplot.sinks`). By default, the filesystem.
 
         Notes
         -----
@@ -201,10 +344,42 @@ class PlotModel:
         there will be lots of figures open at one time causing potential slowdowns.
         """
 
-        self.fig.savefig(filename)
+        with self.measure("save", detail=str(filename)):
+            if image_writer is None:
+                save_figure(self.fig, filename, self.config, sink=sink)
+            else:
+                image_writer.save(self.name, self.fig, filename, self.config, sink=sink)
 
         return
 
+    def write_additional_outputs(self, sink: Optional[OutputSink] = None) -> List[str]:
+        """
+        Writes the additional output files of the extensions (see
+        :meth:`PlotExtension.additional_outputs`), each named
+        ``{plot}_{extension}_{name}``, to the sink (by default, the current
+        working directory).
+
+        Returns
+        -------
+
+        additional_outputs: List[str]
+            The names of the files written. These are also stored in
+            ``additional_outputs``.
+        """
+
+        sink = DirectorySink() if sink is None else sink
+
+        self.additional_outputs = []
+
+        for name, extension in self.extensions.items():
+            with self.measure("additional_outputs", detail=name):
+                for output_name, data in extension.additional_outputs():
+                    filename = f"{self.name}_{name}_{output_name}"
+                    sink.write(filename, data)
+                    self.additional_outputs.append(filename)
+
+        return self.additional_outputs
+
     def serialize(self) -> Dict[str, Any]:
         """
         Serializes the contents of the extensions to a dictionary.
@@ -218,12 +393,27 @@ class PlotModel:
 
         return serialized
 
+    def release(self):
+        """
+        Releases the x, y, and z data held by the extensions, keeping only
+        their pre-processed products (so ``serialize`` still works). The
+        figure can not be re-drawn after this.
+        """
+
+        for extension in self.extensions.values():
+            extension.x = None
+            extension.y = None
+            extension.z = None
+
     def finalize(self):
         """
-        Closes figures and cleans up.
+        Closes figures and cleans up. As the figures are not managed by
+        pyplot, this just drops our references to them.
         """
 
-        plt.close(self.fig)
+        with self.measure("finalize"):
+            self.fig = None
+            self.axes = None
 
     class Config:
         arbitrary_types_allowed = True
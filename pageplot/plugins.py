@@ -0,0 +1,194 @@
+"""
+Plugin registry for plot extensions, configuration extensions, and I/O
+backends.
+
+Third-party packages register their classes through package entry points,
+for instance in their ``setup.py``:
+
+.. code-block:: python
+
+    entry_points={
+        "pageplot.plot_extensions": [
+            "my_line = my_package.lines:MyLineExtension",
+        ],
+    }
+
+after which ``my_line`` can be used in plot specifications like any of the
+built in extensions. Entry points are only loaded (imported) when their name
+is used, and the results of scanning the environment for them are cached on
+disk between runs.
+"""
+
+import hashlib
+import json
+import os
+import sys
+from functools import lru_cache
+from importlib.metadata import entry_points
+from pathlib import Path
+from typing import Dict
+
+from pageplot.extensions import (
+    LazyExtensionRegistry,
+    built_in_config_extensions,
+    built_in_extensions,
+)
+
+PLOT_EXTENSION_GROUP = "pageplot.plot_extensions"
+CONFIG_EXTENSION_GROUP = "pageplot.config_extensions"
+IO_GROUP = "pageplot.io"
+
+built_in_io = LazyExtensionRegistry(
+    {
+        "hdf5": "pageplot.io.h5py:IOHDF5",
+        "arepo_subfind": "pageplot.io.areposubfind:IOAREPOSubFind",
+    }
+)
+
+
+def cache_directory() -> Path:
+    """
+    Directory for pageplot's persistent caches. Can be set with the
+    ``PAGEPLOT_CACHE_DIR`` environment variable, and otherwise defaults to
+    ``$XDG_CACHE_HOME/pageplot`` (or ``~/.cache/pageplot``).
+    """
+
+    if "PAGEPLOT_CACHE_DIR" in os.environ:
+        return Path(os.environ["PAGEPLOT_CACHE_DIR"])
+
+    base = os.environ.get("XDG_CACHE_HOME", Path.home() / ".cache")
+
+    return Path(base) / "pageplot"
+
+
+def environment_fingerprint() -> str:
+    """
+    Fingerprint of the installed packages. Installing or removing a
+    distribution modifies its ``site-packages`` directory, so the
+    modification times of those directories are used rather than scanning
+    their contents. Other ``sys.path`` entries (e.g. the directory of the
+    driver script, which may also be the output directory) only contribute
+    their path.
+    """
+
+    hasher = hashlib.sha256(sys.version.encode())
+
+    for path in sys.path:
+        hasher.update(f"{path};".encode())
+
+        if Path(path).name in ["site-packages", "dist-packages"]:
+            try:
+                hasher.update(f"{os.stat(path).st_mtime_ns};".encode())
+            except OSError:
+                continue
+
+    return hasher.hexdigest()
+
+
+def entry_points_in_group(group: str):
+    try:
+        return entry_points(group=group)
+    except TypeError:
+        # Python 3.9 does not support selection.
+        return entry_points().get(group, [])
+
+
+def scan_entry_points() -> Dict[str, Dict[str, str]]:
+    """
+    Scans the environment for all pageplot entry points, returning a
+    dictionary of group to (ordered by name) extension name to
+    ``"module:ClassName"`` locations.
+    """
+
+    return {
+        group: {
+            entry_point.name: entry_point.value
+            for entry_point in sorted(
+                entry_points_in_group(group), key=lambda x: x.name
+            )
+        }
+        for group in [PLOT_EXTENSION_GROUP, CONFIG_EXTENSION_GROUP, IO_GROUP]
+    }
+
+
+@lru_cache(maxsize=None)
+def discover_plugins() -> Dict[str, Dict[str, str]]:
+    """
+    Returns the entry point locations for all groups, using the on-disk
+    cache if the environment has not changed since it was written.
+    """
+
+    cache_filename = cache_directory() / "plugins.json"
+    fingerprint = environment_fingerprint()
+
+    try:
+        with open(cache_filename, "r") as handle:
+            cached = json.load(handle)
+
+        if cached["fingerprint"] == fingerprint:
+            return cached["entry_points"]
+    except (OSError, ValueError, KeyError):
+        pass
+
+    discovered = scan_entry_points()
+
+    try:
+        cache_filename.parent.mkdir(parents=True, exist_ok=True)
+        temporary_filename = cache_filename.with_suffix(f".{os.getpid()}.tmp")
+
+        with open(temporary_filename, "w") as handle:
+            json.dump({"fingerprint": fingerprint, "entry_points": discovered}, handle)
+
+        os.replace(temporary_filename, cache_filename)
+    except OSError:
+        # Caching is only an optimisation; read-only homes are fine.
+        pass
+
+    return discovered
+
+
+def combine_registries(
+    built_in: LazyExtensionRegistry, group: str
+) -> LazyExtensionRegistry:
+    """
+    Combines built in locations with those of plugins. Plugins are ordered
+    before the built in extensions (like ``additional_extensions``), so that
+    'global' extensions such as ``legend`` still run last. Built in names
+    take precedence over plugins.
+    """
+
+    plugins = {
+        name: location
+        for name, location in discover_plugins().get(group, {}).items()
+        if name not in built_in
+    }
+
+    return LazyExtensionRegistry({**plugins, **built_in.locations})
+
+
+@lru_cache(maxsize=None)
+def plot_extension_registry() -> LazyExtensionRegistry:
+    """
+    All available plot extensions, built in and from plugins.
+    """
+
+    return combine_registries(built_in_extensions, PLOT_EXTENSION_GROUP)
+
+
+@lru_cache(maxsize=None)
+def config_extension_registry() -> LazyExtensionRegistry:
+    """
+    All available configuration extensions, built in and from plugins.
+    """
+
+    return combine_registries(built_in_config_extensions, CONFIG_EXTENSION_GROUP)
+
+
+@lru_cache(maxsize=None)
+def io_registry() -> LazyExtensionRegistry:
+    """
+    All available I/O backends (``IOSpecification`` sub-classes), built in
+    and from plugins.
+    """
+
+    return combine_registries(built_in_io, IO_GROUP)
@@ -2,11 +2,11 @@
 Main runner for the plots. Takes in filenames and spits out plots.
 """
 
-
+import copy
 import json
 import pickle
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Any, Dict, List, Optional
 
 import attr
 
@@ -14,10 +14,37 @@ from pageplot.config import GlobalConfig
 from pageplot.configextension import ConfigExtension
 from pageplot.exceptions import PagePlotParserError
 from pageplot.extensionmodel import PlotExtension
+from pageplot.hooks import StageHook
+from pageplot.instrumentation import stage
 from pageplot.io.spec import IOSpecification
 from pageplot.plotcontainer import PlotContainer
 from pageplot.plotmodel import PlotModel
-from pageplot.webpage.html import WebpageCreator
+from pageplot.sinks import BundleSink, DirectorySink, OutputSink
+
+
+def read_plot_specifications(
+    plot_filenames: List[Path],
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Reads the plot specifications from the plot JSON files, combined into
+    one dictionary of plot name to specification.
+
+    May raise the ``PagePlotParserError`` if there are duplicate names.
+    """
+
+    specifications: Dict[str, Dict[str, Any]] = {}
+
+    for plot_filename in plot_filenames:
+        with open(plot_filename, "r") as handle:
+            raw_json = json.load(handle)
+
+        for name, plot in raw_json.items():
+            if name in specifications:
+                raise PagePlotParserError(name, f"Duplicate plot name {name} found.")
+
+            specifications[name] = plot
+
+    return specifications
 
 
 @attr.s(auto_attribs=True)
@@ -62,12 +89,50 @@ class PagePlotRunner:
         all of the plot models generated. This allows you to hook into the
         library and add custom plotting code. On the specification side,
         these will be read like any of the default extensions from your JSON.
+        Extensions registered through the ``pageplot.plot_extensions`` entry
+        point group (see :mod:`pageplot.plugins`) do not need to be passed here.
 
     additional_config_extensions: Dict[str, ConfigExtension]
         Additional configuration extensions. This allows you to surface
         additional global variables (e.g. a fixed value you would like to have
         used to denote a fixed line on a plot). These will then be read from
         the extensions section in the ``config_filename``.
+
+    memory_budget: int, optional
+        Memory budget in bytes for the data read while creating figures.
+        See :class:`PlotContainer`. By default no limit is imposed.
+
+    hooks: List[StageHook], optional
+        Hooks called before and after each stage of every plot, e.g. to
+        profile selected plots with :class:`pageplot.hooks.CProfileHook`.
+        See :mod:`pageplot.hooks`.
+
+    writer_threads: int, optional
+        Number of background threads compressing and writing the figures.
+        Set to 0 to save synchronously. See :class:`PlotContainer`.
+
+    rendering: str, optional
+        Where the figures are drawn: ``matplotlib`` (the default) saves an
+        image of each; ``browser`` skips matplotlib entirely, and the webpage
+        draws the plots from their (much smaller) serialized data, with
+        zooming (see :mod:`pageplot.webpage.client`); ``both`` does both,
+        with the zoomable plots shown when a figure is clicked on.
+
+    bundle: Path, optional
+        If given, all of the output (figures, serialized data, webpages, and
+        the report) is packed into a single zip archive with this filename,
+        relative to ``output_path``, rather than written as individual files
+        (see :class:`pageplot.sinks.BundleSink`). The archive is complete
+        once ``close`` is called, or the runner is used as a context manager.
+
+    config: GlobalConfig, optional
+        An already loaded (and activated) configuration, used instead of
+        reading ``config_filename``. See :mod:`pageplot.sweep`.
+
+    plot_specifications: Dict[str, Dict[str, Any]], optional
+        Already read plot specifications (see
+        :func:`read_plot_specifications`), used instead of reading
+        ``plot_filenames``. These are not modified.
     """
 
     config_filename: Path = attr.ib(converter=Path)
@@ -88,8 +153,26 @@ class PagePlotRunner:
         factory=dict
     )
 
-    config: GlobalConfig = attr.ib(init=False)
+    memory_budget: Optional[int] = None
+
+    hooks: List[StageHook] = attr.ib(factory=list)
+
+    writer_threads: int = attr.ib(default=4, converter=int)
+
+    rendering: str = attr.ib(
+        default="matplotlib",
+        validator=attr.validators.in_(["matplotlib", "browser", "both"]),
+    )
+
+    bundle: Optional[Path] = attr.ib(
+        default=None, converter=attr.converters.optional(Path)
+    )
+
+    config: Optional[GlobalConfig] = None
+    plot_specifications: Optional[Dict[str, Dict[str, Any]]] = None
+
     plot_container: PlotContainer = attr.ib(init=False)
+    sink: OutputSink = attr.ib(init=False)
 
     def load_config(self) -> GlobalConfig:
         """
@@ -119,65 +202,104 @@ class PagePlotRunner:
             The filled ``PlotContainer`` ready for use.
         """
 
+        if self.plot_specifications is None:
+            specifications = read_plot_specifications(self.plot_filenames)
+        else:
+            specifications = copy.deepcopy(self.plot_specifications)
+
         plots: Dict[str, PlotModel] = {}
 
-        for plot_filename in self.plot_filenames:
-            with open(plot_filename, "r") as handle:
-                raw_json = json.load(handle)
-
-            for name, plot in raw_json.items():
-                if name in plots:
-                    raise PagePlotParserError(
-                        name, f"Duplicate plot name {name} found."
-                    )
-                else:
-                    kwargs = {
-                        name: plot.pop(name, None)
-                        for name in [
-                            "x",
-                            "y",
-                            "z",
-                            "x_units",
-                            "y_units",
-                            "z_units",
-                            "mask",
-                        ]
-                    }
-
-                    plot_model = PlotModel(
-                        name=name,
-                        config=self.config,
-                        plot_spec=plot,
-                        **kwargs,
-                    )
-
-                    plots[name] = plot_model
+        for name, plot in specifications.items():
+            kwargs = {
+                name: plot.pop(name, None)
+                for name in [
+                    "x",
+                    "y",
+                    "z",
+                    "x_units",
+                    "y_units",
+                    "z_units",
+                    "mask",
+                ]
+            }
+
+            plots[name] = PlotModel(
+                name=name,
+                config=self.config,
+                plot_spec=plot,
+                **kwargs,
+            )
 
         self.plot_container = PlotContainer(
             data=self.data,
             plots=plots,
             file_extension=self.file_extension,
             output_path=self.output_path,
+            sink=self.sink,
+            additional_extensions=self.additional_plot_extensions,
+            memory_budget=self.memory_budget,
+            hooks=self.hooks,
+            writer_threads=self.writer_threads,
+            render_figures=self.rendering != "browser",
         )
 
         return self.plot_container
 
     def __attrs_post_init__(self):
-        self.load_config()
+        if self.bundle is None:
+            self.sink = DirectorySink(self.output_path)
+        else:
+            self.sink = BundleSink(self.output_path / self.bundle)
+
+        if self.config is None:
+            self.load_config()
+
         self.load_plots()
 
-    def create_figures(self):
+    def serialized_data_writer(self, serialized_data_filename: Path):
+        """
+        Writer for the HDF5 serialized data. When bundling, the file is
+        written into the bundle, named by the final part of the filename.
+        """
+
+        from pageplot.serialization import SerializedDataWriter
+
+        if self.bundle is None:
+            return SerializedDataWriter(filename=serialized_data_filename)
+
+        return SerializedDataWriter(
+            filename=Path(serialized_data_filename).name, sink=self.sink
+        )
+
+    def create_figures(self, serialized_data_filename: Optional[Path] = None):
         """
         Makes the plots, and saves them out to disk.
+
+        Parameters
+        ----------
+
+        serialized_data_filename: Path, optional
+            If given, the serialized data is written to this HDF5 file
+            as each plot is completed (see :meth:`serialize`). When bundling,
+            the file is written into the bundle.
+
+        Returns
+        -------
+
+        scheduler_report: SchedulerReport
+            Expected and achieved hit rates of the column cache.
         """
 
-        self.plot_container.setup_figures()
-        self.plot_container.run_extensions()
-        self.plot_container.create_figures()
+        if serialized_data_filename is None:
+            return self.plot_container.process()
+        else:
+            with self.serialized_data_writer(serialized_data_filename) as writer:
+                return self.plot_container.process(serialized_data_writer=writer)
 
     def create_webpage(self, webpage_filename: Path = Path("index.html")):
         """
-        Webpage output, links the plots together.
+        Webpage output, links the plots together: an index page, one page
+        per section of plots, and ``index.json``, listing all of the plots.
 
         Parameters
         ----------
@@ -186,22 +308,81 @@ class PagePlotRunner:
             Defaults to index.html. Releative to the plot output path.
         """
 
-        webpage = WebpageCreator()
-        webpage.add_metadata("PagePlot")
-        webpage.add_plots(plot_container=self.plot_container)
-        webpage.render_webpage()
-        webpage.save_html(self.output_path / webpage_filename)
+        # Deferred, so that jinja2 is only imported when creating webpages.
+        from pageplot.webpage.html import WebpageCreator
+
+        instrumentation = self.plot_container.instrumentation
+
+        with stage(instrumentation, "render_webpage", detail=str(webpage_filename)):
+            webpage = WebpageCreator()
+            webpage.add_metadata("PagePlot")
+            webpage.add_plots(
+                plot_container=self.plot_container,
+                client_side=self.rendering != "matplotlib",
+            )
+
+            if instrumentation is not None:
+                webpage.add_timings(instrumentation=instrumentation)
+
+            webpage.save_pages(self.sink, index_filename=webpage_filename)
+
+    def write_report(self, report_filename: Path = Path("report.json")):
+        """
+        Writes the timing and I/O report of all stages run so far (see
+        :mod:`pageplot.instrumentation`) to JSON. Call this after
+        ``create_figures`` and ``create_webpage``.
+
+        Parameters
+        ----------
+
+        report_filename: Path
+            Defaults to report.json. Relative to the plot output path.
+        """
+
+        if self.plot_container.instrumentation is not None:
+            self.plot_container.instrumentation.write_report(
+                report_filename, sink=self.sink
+            )
 
     def serialize(self, serialized_data_filename: Path):
         """
         Serializes all of the data, and saves it to disk.
 
+        Files ending in ``.hdf5`` or ``.h5`` are written in the structured
+        HDF5 format (see :mod:`pageplot.serialization`), which can be read
+        lazily with :class:`pageplot.serialization.SerializedData`. Any other
+        filename gives a pickle of the ``PlotContainer.serialize`` dictionary.
+
         Parameters
         ----------
 
         serialized_data_filename: Path
-            Path to the output pickle file.
+            Path to the output HDF5 or pickle file. When bundling, the file
+            is written into the bundle, named by the final part of the path.
+        """
+
+        if Path(serialized_data_filename).suffix in [".hdf5", ".h5"]:
+            with self.serialized_data_writer(serialized_data_filename) as writer:
+                for name, plot in self.plot_container.plots.items():
+                    writer.write_plot(name, plot.serialize())
+        elif self.bundle is None:
+            with open(serialized_data_filename, "wb") as handle:
+                pickle.dump(self.plot_container.serialize(), handle)
+        else:
+            self.sink.write(
+                Path(serialized_data_filename).name,
+                pickle.dumps(self.plot_container.serialize()),
+            )
+
+    def close(self):
         """
+        Finishes writing the output; required to complete the ``bundle``.
+        """
+
+        self.sink.close()
+
+    def __enter__(self) -> "PagePlotRunner":
+        return self
 
-        with open(serialized_data_filename, "wb") as handle:
-            pickle.dump(self.plot_container.serialize(), handle)
+    def __exit__(self, *args):
+        self.close()
@@ -0,0 +1,349 @@
+"""
+Scheduling of plots within a memory budget.
+
+Each plot is run from reading through to saving (and the release of its
+raw data) before the next one begins, so that only one plot's arrays, plus
+any cached columns, are resident at any one time.
+
+Plots are clustered by the columns (including those of their masks) that
+they share, and each cluster is walked so that a column is read once, used
+by all of its consumers, and then evicted.
+"""
+
+import warnings
+from typing import Dict, List, Optional, Set
+
+import attr
+
+from pageplot.io.columncache import ColumnCache
+from pageplot.io.spec import dataset_searcher
+from pageplot.mask import get_mask_calculation
+from pageplot.plotmodel import PlotModel
+
+
+def calculation_columns(calculate: Optional[str]) -> Set[str]:
+    """
+    The columns (paths passed to ``data_from_string``) required by a
+    calculation string.
+    """
+
+    if calculate is None:
+        return set()
+
+    matches = dataset_searcher.findall(calculate)
+
+    return set(matches) if len(matches) > 0 else {calculate}
+
+
+def column_requests(plot: PlotModel) -> List[str]:
+    """
+    The columns read by a plot, in the order that they are requested from
+    ``data_from_string``. Columns appear once for each calculation (mask,
+    x, y, z) that uses them.
+    """
+
+    requests = []
+
+    for calculate in [get_mask_calculation(plot.mask), plot.x, plot.y, plot.z]:
+        requests.extend(sorted(calculation_columns(calculate)))
+
+    return requests
+
+
+def plot_columns(plot: PlotModel) -> Set[str]:
+    """
+    All columns that a plot requires, including those for its mask.
+    """
+
+    return set(column_requests(plot))
+
+
+def cluster_plots(columns: Dict[str, Set[str]]) -> List[List[str]]:
+    """
+    Groups plots that (transitively) share any column.
+
+    Parameters
+    ----------
+
+    columns: Dict[str, Set[str]]
+        The columns required by each plot, keyed by plot name.
+
+    Returns
+    -------
+
+    clusters: List[List[str]]
+        Plot names in each cluster. Both the clusters, and the plots within
+        them, are in the order in which they first appear in ``columns``.
+    """
+
+    parents = {name: name for name in columns}
+
+    def find(name: str) -> str:
+        while parents[name] != name:
+            parents[name] = parents[parents[name]]
+            name = parents[name]
+
+        return name
+
+    first_consumer = {}
+
+    for name, required in columns.items():
+        for column in required:
+            if column in first_consumer:
+                parents[find(name)] = find(first_consumer[column])
+            else:
+                first_consumer[column] = name
+
+    clusters: Dict[str, List[str]] = {}
+
+    for name in columns:
+        clusters.setdefault(find(name), []).append(name)
+
+    return list(clusters.values())
+
+
+@attr.s(auto_attribs=True)
+class SchedulerReport:
+    """
+    Column cache statistics for a run of the scheduled plots.
+
+    Parameters
+    ----------
+
+    clusters: int
+        Number of clusters of plots sharing columns.
+
+    requests: int
+        Number of column reads expected from the plots.
+
+    expected_hits: int
+        Reads expected to be served from the cache, if every column is only
+        read from disk once.
+
+    hits: int
+        Reads actually served from the cache.
+
+    misses: int
+        Reads actually served from disk.
+    """
+
+    clusters: int
+    requests: int
+    expected_hits: int
+    hits: int
+    misses: int
+
+    @property
+    def expected_hit_rate(self) -> float:
+        return self.expected_hits / self.requests if self.requests > 0 else 0.0
+
+    @property
+    def achieved_hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total > 0 else 0.0
+
+    def __str__(self) -> str:
+        return (
+            f"Column cache hit rate: {self.achieved_hit_rate:.1%} achieved, "
+            f"{self.expected_hit_rate:.1%} expected ({self.hits} hits, "
+            f"{self.misses} misses, {self.clusters} clusters of plots)."
+        )
+
+
+@attr.s(auto_attribs=True)
+class PlotScheduler:
+    """
+    Orders and throttles plots so that the arrays resident in memory stay
+    within a budget.
+
+    Parameters
+    ----------
+
+    data: ColumnCache
+        Cached data that all plots read from.
+
+    memory_budget: int, optional
+        Memory budget in bytes. Without one, clusters of plots are run in
+        the order in which they first appear.
+    """
+
+    data: ColumnCache
+    memory_budget: Optional[int] = None
+
+    column_sizes: Dict[str, Optional[int]] = attr.ib(init=False, factory=dict)
+    last_consumers: Dict[str, str] = attr.ib(init=False, factory=dict)
+    plot_columns: Dict[str, Set[str]] = attr.ib(init=False, factory=dict)
+
+    clusters: int = attr.ib(init=False, default=0)
+    requests: int = attr.ib(init=False, default=0)
+    expected_hits: int = attr.ib(init=False, default=0)
+
+    def column_size(self, column: str) -> Optional[int]:
+        if column not in self.column_sizes:
+            self.column_sizes[column] = self.data.estimate_size(column)
+
+        return self.column_sizes[column]
+
+    def estimate_footprint(self, plot: PlotModel) -> Optional[int]:
+        """
+        Estimate of the peak memory used by a plot. The raw columns are
+        counted twice, to account for the derived (masked and calculated) x,
+        y, and z arrays. Returns ``None`` if any column size is unknown.
+        """
+
+        sizes = [self.column_size(column) for column in plot_columns(plot)]
+
+        if any(size is None for size in sizes):
+            return None
+
+        return 2 * sum(sizes)
+
+    def walk(self, cluster: List[str]) -> List[str]:
+        """
+        Orders the plots within a cluster. Starting from the first plot,
+        the next plot is always the one sharing the most bytes with the
+        columns that are currently live (read, and still needed by a later
+        plot), so that columns are evicted as early as possible. Ties are
+        broken by the fewest bytes of new columns that would be read.
+        """
+
+        def size(columns: Set[str]) -> int:
+            return sum(self.column_size(column) or 1 for column in columns)
+
+        consumers: Dict[str, int] = {}
+
+        for name in cluster:
+            for column in self.plot_columns[name]:
+                consumers[column] = consumers.get(column, 0) + 1
+
+        remaining = list(cluster)
+        live: Set[str] = set()
+        order = []
+
+        while remaining:
+            if live:
+                # max() returns the first of equal plots, keeping input order.
+                name = max(
+                    remaining,
+                    key=lambda name: (
+                        size(self.plot_columns[name] & live),
+                        -size(self.plot_columns[name] - live),
+                    ),
+                )
+            else:
+                name = remaining[0]
+
+            remaining.remove(name)
+            order.append(name)
+
+            for column in self.plot_columns[name]:
+                consumers[column] -= 1
+
+                if consumers[column] == 0:
+                    live.discard(column)
+                else:
+                    live.add(column)
+
+        return order
+
+    def order(self, plots: Dict[str, PlotModel]) -> List[str]:
+        """
+        Orders the plots for data locality. Plots are clustered by the
+        columns that they share, and each cluster is walked in turn (see
+        :meth:`walk`). With a memory budget, clusters are run in order of
+        estimated footprint, smallest first, so that the cache is only
+        flushed for the largest plots at the end; clusters with unknown
+        footprints keep their original order, first.
+        """
+
+        self.plot_columns = {name: plot_columns(plot) for name, plot in plots.items()}
+
+        clusters = cluster_plots(self.plot_columns)
+
+        if self.memory_budget is not None:
+            footprints = {
+                name: self.estimate_footprint(plot) for name, plot in plots.items()
+            }
+
+            def cluster_footprint(cluster: List[str]) -> int:
+                if any(footprints[name] is None for name in cluster):
+                    return -1
+
+                return max(footprints[name] for name in cluster)
+
+            clusters = sorted(clusters, key=cluster_footprint)
+
+        order = [name for cluster in clusters for name in self.walk(cluster)]
+
+        self.last_consumers = {
+            column: name for name in order for column in self.plot_columns[name]
+        }
+
+        self.clusters = len(clusters)
+        self.requests = sum(len(column_requests(plot)) for plot in plots.values())
+        self.expected_hits = self.requests - len(self.last_consumers)
+
+        return order
+
+    def release(self, name: str):
+        """
+        Called after a plot is run. Evicts the columns that no later plot
+        requires.
+        """
+
+        for column in self.plot_columns.get(name, set()):
+            if self.last_consumers.get(column) == name:
+                self.data.evict(column)
+
+        return
+
+    def report(self) -> SchedulerReport:
+        """
+        Expected and achieved cache statistics for the plots run so far.
+        """
+
+        return SchedulerReport(
+            clusters=self.clusters,
+            requests=self.requests,
+            expected_hits=self.expected_hits,
+            hits=self.data.hits,
+            misses=self.data.misses,
+        )
+
+    def throttle(self, name: str, plot: PlotModel):
+        """
+        Called before a plot is run. Evicts cached columns (that this plot
+        does not use) until its estimated footprint fits within the budget.
+        """
+
+        if self.memory_budget is None:
+            return
+
+        footprint = self.estimate_footprint(plot)
+
+        if footprint is None:
+            return
+
+        if footprint > self.memory_budget:
+            warnings.warn(
+                f"Plot {name} is estimated to need {footprint} bytes, more than the "
+                f"memory budget of {self.memory_budget} bytes."
+            )
+
+        columns = plot_columns(plot)
+
+        # The plot's own columns are re-used, so do not count against it.
+        required = footprint - sum(
+            self.data.columns[column].nbytes
+            for column in columns
+            if column in self.data.columns
+        )
+
+        for column in list(self.data.columns.keys()):
+            if self.data.resident_bytes + required <= self.memory_budget:
+                break
+
+            if column not in columns:
+                self.data.evict(column)
+
+        return
@@ -0,0 +1,295 @@
+"""
+Structured, unit-preserving serialization of the data behind the figures.
+
+The output of :meth:`PlotContainer.serialize` is written to HDF5 with one
+group per plot, containing one group per extension. Arrays are stored as
+datasets, with their units and names as attributes, and all other (scalar,
+string, and list) metadata are stored as JSON-encoded attributes. Unlike
+pickles, these files are safe to open from shared directories, and a single
+plot (or array) can be read without loading the whole file.
+"""
+
+import io
+import json
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, Iterator, List, Optional
+
+import attr
+import h5py
+import numpy as np
+import unyt
+
+if TYPE_CHECKING:
+    from pageplot.sinks import OutputSink
+
+# Attribute that marks a group as storing a list rather than a dictionary.
+LIST_MARKER = "__list__"
+
+
+def is_json_serializable(value: Any) -> bool:
+    """
+    Whether ``value`` can be stored as a JSON attribute, rather than needing
+    its own dataset or group. Lists of arrays (and lists containing lists of
+    arrays, and so on) can not.
+    """
+
+    if isinstance(value, np.ndarray):
+        return False
+
+    if isinstance(value, dict):
+        return all(is_json_serializable(item) for item in value.values())
+
+    if isinstance(value, (list, tuple)):
+        return all(is_json_serializable(item) for item in value)
+
+    return True
+
+
+def json_default(value: Any) -> Any:
+    """
+    Fallback for values that are not natively JSON serializable; numpy
+    scalars are converted to their python equivalents, and everything else
+    (e.g. paths) to strings.
+    """
+
+    if isinstance(value, np.generic):
+        return value.item()
+
+    return str(value)
+
+
+def write_serialized(group: h5py.Group, data: Dict[str, Any]):
+    """
+    Recursively writes a serialized dictionary to the given HDF5 group.
+
+    Parameters
+    ----------
+
+    group: h5py.Group
+        Group to write into. This should be empty.
+
+    data: Dict[str, Any]
+        Serialized data, as returned by :meth:`PlotExtension.serialize`.
+    """
+
+    for key, value in data.items():
+        key = str(key)
+
+        if isinstance(value, np.ndarray):
+            dataset = group.create_dataset(key, data=np.asarray(value))
+
+            if isinstance(value, unyt.unyt_array):
+                dataset.attrs["units"] = str(value.units)
+
+                if getattr(value, "name", None) is not None:
+                    dataset.attrs["name"] = str(value.name)
+        elif isinstance(value, dict):
+            write_serialized(group.create_group(key), value)
+        elif isinstance(value, (list, tuple)) and not is_json_serializable(value):
+            sub_group = group.create_group(key)
+            sub_group.attrs[LIST_MARKER] = True
+            write_serialized(sub_group, dict(enumerate(value)))
+        else:
+            group.attrs[key] = json.dumps(value, default=json_default)
+
+    return
+
+
+def read_dataset(dataset: h5py.Dataset, memory_map: bool = False) -> np.ndarray:
+    """
+    Reads a dataset, restoring units if they are present.
+
+    Parameters
+    ----------
+
+    dataset: h5py.Dataset
+        The dataset to read.
+
+    memory_map: bool, optional
+        If possible (i.e. the dataset is stored contiguously and is not
+        compressed), return a read-only memory map of the data rather than
+        reading it.
+    """
+
+    offset = dataset.id.get_offset() if memory_map else None
+
+    if offset is not None and dataset.ndim > 0 and dataset.size > 0:
+        raw = np.memmap(
+            dataset.file.filename,
+            mode="r",
+            dtype=dataset.dtype,
+            offset=offset,
+            shape=dataset.shape,
+        )
+    else:
+        raw = dataset[()]
+
+    if "units" in dataset.attrs:
+        return unyt.unyt_array(
+            raw, dataset.attrs["units"], name=dataset.attrs.get("name", None)
+        )
+
+    return raw
+
+
+def read_serialized(group: h5py.Group, memory_map: bool = False) -> Any:
+    """
+    Recursively reads a group written with :func:`write_serialized`.
+    """
+
+    output = {}
+
+    for key, value in group.attrs.items():
+        if key != LIST_MARKER:
+            output[key] = json.loads(value)
+
+    for key, item in group.items():
+        if isinstance(item, h5py.Dataset):
+            output[key] = read_dataset(item, memory_map=memory_map)
+        else:
+            output[key] = read_serialized(item, memory_map=memory_map)
+
+    if group.attrs.get(LIST_MARKER, False):
+        return [output[key] for key in sorted(output.keys(), key=int)]
+
+    return output
+
+
+@attr.s(auto_attribs=True)
+class SerializedDataWriter:
+    """
+    Writes serialized plot data to HDF5, one plot at a time, so that plots
+    can be written as soon as they are complete. Use as a context manager,
+    or call ``close`` when finished.
+
+    Parameters
+    ----------
+
+    filename: Path
+        Output HDF5 filename. Any existing file is overwritten.
+
+    sink: OutputSink, optional
+        If given, the file is built in memory and written to the sink (see
+        :mod:`pageplot.sinks`) as ``filename`` on ``close``.
+    """
+
+    filename: Path = attr.ib(converter=Path)
+    sink: Optional["OutputSink"] = None
+
+    handle: h5py.File = attr.ib(init=False)
+    buffer: Optional[io.BytesIO] = attr.ib(init=False, default=None, repr=False)
+
+    def __attrs_post_init__(self):
+        if self.sink is None:
+            self.handle = h5py.File(self.filename, "w")
+        else:
+            self.buffer = io.BytesIO()
+            self.handle = h5py.File(self.buffer, "w")
+
+    def write_plot(self, name: str, serialized: Dict[str, Any]):
+        """
+        Writes (and flushes to disk) the serialized data of a single plot.
+
+        Parameters
+        ----------
+
+        name: str
+            Name of the plot.
+
+        serialized: Dict[str, Any]
+            Output of :meth:`PlotModel.serialize`.
+        """
+
+        write_serialized(self.handle.create_group(name), serialized)
+        self.handle.flush()
+
+    def close(self):
+        self.handle.close()
+
+        if self.buffer is not None:
+            self.sink.write(self.filename, self.buffer.getvalue())
+            self.buffer = None
+
+    def __enter__(self) -> "SerializedDataWriter":
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+@attr.s(auto_attribs=True)
+class SerializedData:
+    """
+    Lazy reader for files written by :class:`SerializedDataWriter`. Acts
+    like a (read-only) dictionary of plot names to serialized data; each
+    plot is only read when requested.
+
+    Parameters
+    ----------
+
+    filename: Path
+        HDF5 file to read from.
+
+    memory_map: bool, optional
+        Return memory maps of the arrays, instead of reading them, where
+        possible. Default: False.
+    """
+
+    filename: Path = attr.ib(converter=Path)
+    memory_map: bool = False
+
+    handle: h5py.File = attr.ib(init=False)
+
+    def __attrs_post_init__(self):
+        self.handle = h5py.File(self.filename, "r")
+
+    def keys(self) -> List[str]:
+        return list(self.handle.keys())
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.keys())
+
+    def __len__(self) -> int:
+        return len(self.handle)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.handle
+
+    def __getitem__(self, name: str) -> Dict[str, Any]:
+        return read_serialized(self.handle[name], memory_map=self.memory_map)
+
+    def read(self, plot: str, extension: str, item: Optional[str] = None) -> Any:
+        """
+        Reads the serialized data for a single extension of a single plot,
+        or just one item from it (e.g. ``read("plot", "median_line",
+        "values")``).
+        """
+
+        group = self.handle[plot]
+
+        if item is None:
+            if extension in group.attrs:
+                return json.loads(group.attrs[extension])
+
+            return read_serialized(group[extension], memory_map=self.memory_map)
+
+        group = group[extension]
+
+        if item in group.attrs:
+            return json.loads(group.attrs[item])
+
+        value = group[item]
+
+        if isinstance(value, h5py.Dataset):
+            return read_dataset(value, memory_map=self.memory_map)
+
+        return read_serialized(value, memory_map=self.memory_map)
+
+    def close(self):
+        self.handle.close()
+
+    def __enter__(self) -> "SerializedData":
+        return self
+
+    def __exit__(self, *args):
+        self.close()
@@ -0,0 +1,245 @@
+"""
+Destinations for the output files (figures, thumbnails, serialized data,
+webpages, and reports) of a run.
+
+By default every file is written to the output directory
+(:class:`DirectorySink`). Across many runs this is a very large number of
+small files, which is slow for parallel filesystems (and for copying). A
+:class:`BundleSink` instead packs all of the output of a run into a single,
+uncompressed, zip archive; the figures are already compressed, and storing
+them as they are means that each can be read straight from the archive.
+
+Bundles are standard zip files, so can be unpacked with any zip tool, or
+with
+
+.. code-block:: bash
+
+    python -m pageplot.sinks unpack output.zip output_directory
+
+and their webpages can be browsed without unpacking with
+
+.. code-block:: bash
+
+    python -m pageplot.sinks serve output.zip
+"""
+
+import io
+import threading
+import zipfile
+from contextlib import contextmanager
+from pathlib import Path, PurePosixPath
+from typing import BinaryIO, Iterator, List, Union
+
+import attr
+
+
+class OutputSink:
+    """
+    Base class for the destinations of output files. Files are named by
+    their path relative to the output (e.g. ``"stellar_mass.png"``).
+
+    Sinks must be safe to write to from many threads at once (figures are
+    written by the threads of the :class:`ImageWriter`). Use as a context
+    manager, or call ``close`` once all files have been written.
+    """
+
+    @contextmanager
+    def open(self, name: Union[str, Path]) -> Iterator[BinaryIO]:
+        """
+        Opens the file ``name`` for (binary) writing, as a context manager.
+        The file is only complete once the context has exited.
+        """
+
+        raise NotImplementedError
+
+    def write(self, name: Union[str, Path], data: bytes):
+        """
+        Writes ``data`` as the file ``name``.
+        """
+
+        with self.open(name) as handle:
+            handle.write(data)
+
+    def close(self):
+        """
+        Finishes writing; no files can be written afterwards.
+        """
+
+        return
+
+    def __enter__(self) -> "OutputSink":
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+@attr.s(auto_attribs=True)
+class DirectorySink(OutputSink):
+    """
+    Writes each output file to its own file in a directory.
+
+    Parameters
+    ----------
+
+    path: Path, optional
+        The output directory, which should already exist. Defaults to the
+        current working directory.
+    """
+
+    path: Path = attr.ib(default=Path("."), converter=Path)
+
+    @contextmanager
+    def open(self, name: Union[str, Path]) -> Iterator[BinaryIO]:
+        with open(self.path / name, "wb") as handle:
+            yield handle
+
+
+@attr.s(auto_attribs=True)
+class BundleSink(OutputSink):
+    """
+    Writes all output files into a single (uncompressed) zip archive. The
+    central directory of the archive, written on ``close``, indexes the
+    files.
+
+    Parameters
+    ----------
+
+    filename: Path
+        Filename of the archive. Any existing file is overwritten.
+    """
+
+    filename: Path = attr.ib(converter=Path)
+
+    archive: zipfile.ZipFile = attr.ib(init=False, repr=False)
+    lock: threading.Lock = attr.ib(init=False, factory=threading.Lock, repr=False)
+
+    def __attrs_post_init__(self):
+        self.archive = zipfile.ZipFile(self.filename, "w", zipfile.ZIP_STORED)
+
+    @contextmanager
+    def open(self, name: Union[str, Path]) -> Iterator[BinaryIO]:
+        # Only one file can be written to the archive at a time, so files
+        # are built in memory and then copied in.
+        buffer = io.BytesIO()
+
+        yield buffer
+
+        self.write(name, buffer.getvalue())
+
+    def write(self, name: Union[str, Path], data: bytes):
+        with self.lock:
+            self.archive.writestr(PurePosixPath(name).as_posix(), data)
+
+    def close(self):
+        with self.lock:
+            self.archive.close()
+
+
+def as_sink(output: Union[str, Path, OutputSink]) -> OutputSink:
+    """
+    Output directories are converted to a :class:`DirectorySink`, and sinks
+    are returned as they are.
+    """
+
+    if isinstance(output, OutputSink):
+        return output
+
+    return DirectorySink(path=output)
+
+
+def unpack_bundle(filename: Path, output_path: Path) -> List[str]:
+    """
+    Extracts all of the files from a bundle written by :class:`BundleSink`
+    to the ``output_path`` directory (created if it does not exist), and
+    returns their names.
+    """
+
+    output_path = Path(output_path)
+    output_path.mkdir(parents=True, exist_ok=True)
+
+    with zipfile.ZipFile(filename, "r") as archive:
+        archive.extractall(output_path)
+
+        return archive.namelist()
+
+
+def bundle_request_handler(archive: zipfile.ZipFile, filename: Path):
+    """
+    Handler (for :class:`http.server.HTTPServer`) of requests for the files
+    in an open bundle, written by :class:`BundleSink` to ``filename``.
+    """
+
+    import mimetypes
+    from http.server import BaseHTTPRequestHandler
+    from urllib.parse import unquote, urlsplit
+
+    class BundleRequestHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            # Browsers percent-encode names, e.g. with spaces, in the path.
+            name = unquote(urlsplit(self.path).path).lstrip("/") or "index.html"
+
+            try:
+                data = archive.read(name)
+            except KeyError:
+                self.send_error(404, f"{name} is not in {filename}")
+                return
+
+            self.send_response(200)
+            self.send_header(
+                "Content-Type",
+                mimetypes.guess_type(name)[0] or "application/octet-stream",
+            )
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+    return BundleRequestHandler
+
+
+def serve_bundle(filename: Path, port: int = 8000, host: str = "localhost"):
+    """
+    Serves the files in a bundle (written by :class:`BundleSink`) over
+    HTTP, read straight from the archive, until interrupted. The webpage is
+    at ``http://{host}:{port}/``.
+    """
+
+    from http.server import HTTPServer
+
+    archive = zipfile.ZipFile(filename, "r")
+    handler = bundle_request_handler(archive, filename)
+
+    with HTTPServer((host, port), handler) as server:
+        print(f"Serving {filename} at http://{host}:{port}/")
+
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            archive.close()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description="Unpack, or browse, a bundle of pageplot output."
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    unpack = commands.add_parser("unpack", help="Extract all files to a directory.")
+    unpack.add_argument("bundle", type=Path)
+    unpack.add_argument("output_path", type=Path, nargs="?", default=Path("."))
+
+    serve = commands.add_parser("serve", help="Serve the webpages over HTTP.")
+    serve.add_argument("bundle", type=Path)
+    serve.add_argument("--port", type=int, default=8000)
+    serve.add_argument("--host", default="localhost")
+
+    args = parser.parse_args()
+
+    if args.command == "unpack":
+        unpack_bundle(args.bundle, args.output_path)
+    else:
+        serve_bundle(args.bundle, port=args.port, host=args.host)
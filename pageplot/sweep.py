@@ -0,0 +1,366 @@
+"""
+Sweeps: the same plots for many snapshots (data files) of a simulation.
+
+Running a separate process for each snapshot re-imports pageplot, re-reads
+the configuration and plot specifications, and re-builds the styled
+matplotlib state every time. A :class:`PagePlotSweep` reads the
+configuration and plots once, and hands the snapshots out to a pool of
+worker processes. Each worker activates the configuration (applying the
+stylesheet, and building the figure template) once, and keeps it, along
+with the other per-process caches (e.g. of the observational data, see
+:class:`pageplot.extensions.velociraptor_data.ObservationCache`), warm for
+all of the snapshots that it processes.
+
+Each snapshot has its own output directory, ``{output_path}/{snapshot}``,
+holding everything that a :class:`PagePlotRunner` would write, and an index
+page in ``output_path`` links to all of them.
+"""
+
+import glob
+import json
+import os
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Type, Union
+
+import attr
+
+from pageplot.config import GlobalConfig
+from pageplot.configextension import ConfigExtension
+from pageplot.extensionmodel import PlotExtension
+from pageplot.io.spec import IOSpecification
+from pageplot.plugins import io_registry
+from pageplot.runner import PagePlotRunner, read_plot_specifications
+
+# The state shared by all of the snapshots that this worker process makes;
+# see ``initialize_worker``.
+worker_state: Dict[str, Any] = {}
+
+
+def expand_data_filenames(
+    data_filenames: Union[str, Path, List[Union[str, Path]]],
+) -> List[Path]:
+    """
+    Data filenames from a list, or a (sorted) glob pattern such as
+    ``"snapshots/snap_*.hdf5"``.
+    """
+
+    if isinstance(data_filenames, (str, Path)):
+        pattern = str(data_filenames)
+
+        if glob.has_magic(pattern):
+            return [Path(filename) for filename in sorted(glob.glob(pattern))]
+
+        data_filenames = [pattern]
+
+    return [Path(filename) for filename in data_filenames]
+
+
+def resolve_io(io: Union[str, Type[IOSpecification]]) -> Type[IOSpecification]:
+    """
+    I/O backends can be given by class, or by their name in the
+    :func:`pageplot.plugins.io_registry` (e.g. ``"hdf5"``).
+    """
+
+    if isinstance(io, str):
+        return io_registry()[io]
+
+    return io
+
+
+def snapshot_names(data_filenames: List[Path]) -> List[str]:
+    """
+    Names of the output directories of the snapshots: the names of their
+    data files, without extensions, prefixed by their position in the
+    sweep if these are not unique.
+    """
+
+    names = [filename.stem for filename in data_filenames]
+
+    if len(set(names)) == len(names):
+        return names
+
+    return [f"{index:04d}_{name}" for index, name in enumerate(names)]
+
+
+def activate(
+    raw_config: Dict[str, Any],
+    additional_config_extensions: Dict[str, ConfigExtension],
+    plot_specifications: Dict[str, Dict[str, Any]],
+    options: Dict[str, Any],
+) -> Dict[str, Any]:
+    """
+    Activates the configuration, giving the state shared by all of the
+    snapshots made with it: the ``config``, the ``plot_specifications``,
+    and the ``options`` (see :meth:`PagePlotSweep.options`).
+    """
+
+    config = GlobalConfig(**raw_config)
+    config.run_extensions(additional_extensions=additional_config_extensions)
+
+    return dict(config=config, plot_specifications=plot_specifications, options=options)
+
+
+def initialize_worker(*args):
+    """
+    Activates the configuration once for this worker process, for all of
+    the snapshots that it makes. Takes the arguments of ``activate``.
+    """
+
+    worker_state.clear()
+    worker_state.update(activate(*args))
+
+    return
+
+
+def run_snapshot(
+    name: str, data_filename: Path, state: Optional[Dict[str, Any]] = None
+) -> Dict[str, Any]:
+    """
+    Creates the figures, webpage, and report of a single snapshot of the
+    sweep. Failures are recorded, rather than raised, so that one bad
+    snapshot does not stop the rest of the sweep.
+
+    Parameters
+    ----------
+
+    name: str
+        Name of the snapshot, and of its output directory.
+
+    data_filename: Path
+        Data file of the snapshot.
+
+    state: Dict[str, Any], optional
+        State returned by ``activate``. Defaults to that of this worker
+        process.
+    """
+
+    state = worker_state if state is None else state
+    options = state["options"]
+
+    output_path = options["output_path"] / name
+    output_path.mkdir(parents=True, exist_ok=True)
+
+    serialized_data_filename = (
+        None
+        if options["serialized_data_filename"] is None
+        else output_path / options["serialized_data_filename"]
+    )
+
+    start = time.perf_counter()
+    error = None
+
+    try:
+        with PagePlotRunner(
+            data=options["io"](filename=data_filename),
+            output_path=output_path,
+            config=state["config"],
+            plot_specifications=state["plot_specifications"],
+            **options["runner"],
+        ) as runner:
+            runner.create_figures(serialized_data_filename=serialized_data_filename)
+            runner.create_webpage()
+            runner.write_report()
+    except Exception:
+        error = traceback.format_exc()
+
+    bundle = options["runner"]["bundle"]
+
+    return dict(
+        name=name,
+        data_filename=str(data_filename),
+        page=f"{name}/{'index.html' if bundle is None else bundle}",
+        plots=len(state["plot_specifications"]),
+        wall_time=time.perf_counter() - start,
+        process=os.getpid(),
+        error=error,
+    )
+
+
+@attr.s(auto_attribs=True)
+class PagePlotSweep:
+    """
+    Creates the same plots for many snapshots, in parallel, reading the
+    configuration once and re-using warm worker processes. See
+    :mod:`pageplot.sweep`.
+
+    Parameters
+    ----------
+
+    config_filename: Path
+        Filename of the configuration JSON, as for :class:`PagePlotRunner`.
+
+    data_filenames: Union[str, List[Path]]
+        The data files of the snapshots, as a list, or as a glob pattern
+        (e.g. ``"snapshots/snap_*.hdf5"``).
+
+    io: Union[str, Type[IOSpecification]]
+        The I/O backend used to open each data file, as a class or by its
+        name in :func:`pageplot.plugins.io_registry` (e.g. ``"hdf5"``).
+
+    plot_filenames: List[Path]
+        Filenames of the plot specification JSON.
+
+    output_path: Path, optional
+        Directory for the output; each snapshot is written to a directory
+        named after its data file within it. Created if it does not exist.
+        Defaults to the current working directory.
+
+    workers: int, optional
+        Number of worker processes. Defaults to the number of CPUs. With 0,
+        the snapshots are processed one after another in this process.
+
+    serialized_data_filename: Path, optional
+        If given, the serialized data of each snapshot is written to this
+        HDF5 file in its output directory.
+
+    file_extension, additional_plot_extensions, additional_config_extensions,
+    memory_budget, writer_threads, rendering, bundle: optional
+        As for :class:`PagePlotRunner`, for every snapshot. Extensions must
+        be importable by the workers.
+    """
+
+    config_filename: Path = attr.ib(converter=Path)
+    data_filenames: List[Path] = attr.ib(converter=expand_data_filenames)
+    io: Type[IOSpecification] = attr.ib(converter=resolve_io)
+    plot_filenames: List[Path] = attr.ib(
+        factory=list, converter=lambda x: [Path(a) for a in x]
+    )
+
+    output_path: Path = attr.ib(default=Path("."), converter=Path)
+    workers: Optional[int] = None
+    serialized_data_filename: Optional[Path] = attr.ib(
+        default=None, converter=attr.converters.optional(Path)
+    )
+
+    file_extension: Optional[str] = None
+    additional_plot_extensions: Dict[str, PlotExtension] = attr.ib(factory=dict)
+    additional_config_extensions: Dict[str, ConfigExtension] = attr.ib(factory=dict)
+    memory_budget: Optional[int] = None
+    writer_threads: int = attr.ib(default=4, converter=int)
+    rendering: str = attr.ib(
+        default="matplotlib",
+        validator=attr.validators.in_(["matplotlib", "browser", "both"]),
+    )
+    bundle: Optional[Path] = attr.ib(
+        default=None, converter=attr.converters.optional(Path)
+    )
+
+    raw_config: Dict[str, Any] = attr.ib(init=False, repr=False)
+    plot_specifications: Dict[str, Dict[str, Any]] = attr.ib(init=False, repr=False)
+
+    def __attrs_post_init__(self):
+        # Read (and check) once, rather than for every snapshot.
+        with open(self.config_filename, "r") as handle:
+            self.raw_config = json.load(handle)
+
+        self.plot_specifications = read_plot_specifications(self.plot_filenames)
+
+    def options(self) -> Dict[str, Any]:
+        """
+        The options shared by all of the snapshots: the ``io`` backend, the
+        ``output_path`` and ``serialized_data_filename``, and the remaining
+        arguments of each ``runner``.
+        """
+
+        return dict(
+            io=self.io,
+            output_path=self.output_path,
+            serialized_data_filename=self.serialized_data_filename,
+            runner=dict(
+                config_filename=self.config_filename,
+                plot_filenames=self.plot_filenames,
+                file_extension=self.file_extension,
+                additional_plot_extensions=self.additional_plot_extensions,
+                memory_budget=self.memory_budget,
+                writer_threads=self.writer_threads,
+                rendering=self.rendering,
+                bundle=self.bundle,
+            ),
+        )
+
+    def snapshots(self) -> Dict[str, Path]:
+        """
+        The data file of each snapshot, by the name of its output directory.
+        """
+
+        return dict(zip(snapshot_names(self.data_filenames), self.data_filenames))
+
+    def run(self) -> List[Dict[str, Any]]:
+        """
+        Creates the figures, webpages, and reports of all of the snapshots,
+        and the index page linking to them.
+
+        Returns
+        -------
+
+        results: List[Dict[str, Any]]
+            For each snapshot (in order): its ``name``, ``data_filename``,
+            index ``page``, number of ``plots``, ``wall_time``, the
+            ``process`` that made it, and the ``error`` (a traceback) if it
+            failed.
+        """
+
+        self.output_path.mkdir(parents=True, exist_ok=True)
+
+        snapshots = self.snapshots()
+
+        # Sent to each worker once, rather than with every snapshot.
+        shared = (
+            self.raw_config,
+            self.additional_config_extensions,
+            self.plot_specifications,
+            self.options(),
+        )
+
+        if self.workers == 0:
+            # Kept local, so that it can not leak into other sweeps.
+            state = activate(*shared)
+
+            results = [
+                run_snapshot(name, data_filename, state=state)
+                for name, data_filename in snapshots.items()
+            ]
+        else:
+            with ProcessPoolExecutor(
+                max_workers=self.workers,
+                initializer=initialize_worker,
+                initargs=shared,
+            ) as executor:
+                futures = [
+                    executor.submit(run_snapshot, name, data_filename)
+                    for name, data_filename in snapshots.items()
+                ]
+
+                results = [future.result() for future in futures]
+
+        self.create_index(results)
+
+        return results
+
+    def create_index(
+        self,
+        results: List[Dict[str, Any]],
+        index_filename: str = "index.html",
+        json_filename: str = "index.json",
+    ):
+        """
+        Writes the index page (and a JSON index) of the snapshots in the
+        sweep to ``output_path``.
+        """
+
+        # Deferred, so that jinja2 is only imported when creating webpages.
+        from pageplot.webpage.html import WebpageCreator
+
+        webpage = WebpageCreator()
+        webpage.add_metadata("PagePlot Sweep")
+        webpage.add_snapshots(results)
+        webpage.save_sweep_index(
+            self.output_path,
+            index_filename=index_filename,
+            json_filename=json_filename,
+        )
+
+        return
@@ -0,0 +1,33 @@
+{% raw %}
+
+/* Loads the figures (with a data-src) of the grid once they are close to being
+   scrolled into view, or all of them on browsers without IntersectionObserver. */
+
+(function () {
+    var images = document.querySelectorAll("img.lazy[data-src]");
+
+    function load(image) {
+        image.src = image.dataset.src;
+        image.removeAttribute("data-src");
+    }
+
+    if (!("IntersectionObserver" in window)) {
+        images.forEach(load);
+        return;
+    }
+
+    var observer = new IntersectionObserver(function (entries) {
+        entries.forEach(function (entry) {
+            if (entry.isIntersecting) {
+                load(entry.target);
+                observer.unobserve(entry.target);
+            }
+        });
+    }, { rootMargin: "400px" });
+
+    images.forEach(function (image) {
+        observer.observe(image);
+    });
+})();
+
+{% endraw %}
@@ -0,0 +1,21 @@
+{% raw %}
+
+/* Loads the full resolution figure of a lightbox only once it is opened. */
+
+function loadLightbox() {
+    var target = document.getElementById(decodeURIComponent(window.location.hash.slice(1)));
+
+    if (target === null) {
+        return;
+    }
+
+    target.querySelectorAll("img[data-src]").forEach(function (image) {
+        image.src = image.dataset.src;
+        image.removeAttribute("data-src");
+    });
+}
+
+window.addEventListener("hashchange", loadLightbox);
+loadLightbox();
+
+{% endraw %}
@@ -0,0 +1,720 @@
+{% raw %}
+
+/* Draws plots in the browser from their serialized data (written by
+   pageplot.webpage.client), without any external libraries. The data of each
+   plot is only loaded once its canvas is close to being scrolled into view, or
+   its lightbox is opened. In the lightbox, scroll to zoom, drag to pan, and
+   double click to reset the view. */
+
+(function () {
+    var PagePlot = window.PagePlot = { data: {}, pending: {} };
+
+    var TYPES = {
+        "<f4": Float32Array,
+        "<f8": Float64Array,
+        "<u4": Uint32Array,
+        "<i4": Int32Array
+    };
+
+    /* The default matplotlib colour cycle, and (a coarse) viridis. */
+    var COLOURS = [
+        "#1f77b4", "#ff7f0e", "#2ca02c", "#d62728", "#9467bd",
+        "#8c564b", "#e377c2", "#7f7f7f", "#bcbd22", "#17becf"
+    ];
+    var VIRIDIS = [
+        [68, 1, 84], [71, 44, 122], [59, 81, 139], [44, 113, 142], [33, 144, 141],
+        [39, 173, 129], [92, 200, 99], [170, 220, 50], [253, 231, 37]
+    ];
+
+    var MARGIN = { left: 70, right: 15, top: 15, bottom: 50 };
+
+    /* Data */
+
+    function decode(value) {
+        if (Array.isArray(value)) {
+            return value.map(decode);
+        }
+
+        if (value === null || typeof value !== "object") {
+            return value;
+        }
+
+        if (value.__array__) {
+            var raw = atob(value.data);
+            var bytes = new Uint8Array(raw.length);
+
+            for (var i = 0; i < raw.length; i++) {
+                bytes[i] = raw.charCodeAt(i);
+            }
+
+            var array = new TYPES[value.dtype](bytes.buffer);
+            array.shape = value.shape;
+            array.units = value.units;
+
+            return array;
+        }
+
+        var output = {};
+
+        Object.keys(value).forEach(function (key) {
+            output[key] = decode(value[key]);
+        });
+
+        return output;
+    }
+
+    function scalar(value) {
+        return value === null || value === undefined ? null : value[0];
+    }
+
+    /* Sorts the extensions of the plot into what the renderer can draw. */
+    function layers(data) {
+        var plot = {
+            x_label: data.x_label,
+            y_label: data.y_label,
+            lines: [],
+            histograms: [],
+            scale: { x: "linear", y: "linear" },
+            limits: { x: [null, null], y: [null, null] }
+        };
+
+        Object.keys(data.extensions).forEach(function (name) {
+            var extension = decode(data.extensions[name]);
+
+            if (extension.scale_x !== undefined) {
+                plot.scale.x = extension.scale_x === "log" ? "log" : "linear";
+                plot.scale.y = extension.scale_y === "log" ? "log" : "linear";
+            }
+
+            if (extension.limits_x !== undefined) {
+                plot.limits.x = extension.limits_x.map(scalar);
+                plot.limits.y = extension.limits_y.map(scalar);
+            }
+
+            if ((extension.grid !== undefined || extension.tiles !== undefined) && extension.x_edges !== undefined) {
+                /* Tiles are written next to the data, prefixed by the plot and extension. */
+                extension.prefix = data.name + "_" + name + "_";
+                plot.histograms.push(extension);
+            }
+
+            if (extension.centers !== undefined && extension.values !== undefined) {
+                extension.label = name.replace(/_/g, " ");
+                extension.colour = COLOURS[plot.lines.length % COLOURS.length];
+                plot.lines.push(extension);
+            }
+        });
+
+        return plot;
+    }
+
+    /* Scales */
+
+    function forward(value, scale) {
+        return scale === "log" ? Math.log10(value) : value;
+    }
+
+    function inverse(value, scale) {
+        return scale === "log" ? Math.pow(10, value) : value;
+    }
+
+    function usable(value, scale) {
+        return value !== null && isFinite(value) && (scale !== "log" || value > 0);
+    }
+
+    /* Range of the data, in the (linear or log) space of the scale. */
+    function dataRange(plot, axis) {
+        var scale = plot.scale[axis];
+        var low = Infinity;
+        var high = -Infinity;
+
+        function include(values) {
+            for (var i = 0; i < values.length; i++) {
+                if (usable(values[i], scale)) {
+                    var value = forward(values[i], scale);
+                    low = Math.min(low, value);
+                    high = Math.max(high, value);
+                }
+            }
+        }
+
+        plot.histograms.forEach(function (histogram) {
+            include(axis === "x" ? histogram.x_edges : histogram.y_edges);
+        });
+
+        plot.lines.forEach(function (line) {
+            include(axis === "x" ? line.centers : line.values);
+        });
+
+        if (!isFinite(low)) {
+            return [0, 1];
+        }
+
+        if (low === high) {
+            return [low - 0.5, high + 0.5];
+        }
+
+        /* Margins, as matplotlib, for lines only. */
+        if (plot.histograms.length === 0) {
+            var margin = 0.05 * (high - low);
+            return [low - margin, high + margin];
+        }
+
+        return [low, high];
+    }
+
+    function initialView(plot) {
+        var view = {};
+
+        ["x", "y"].forEach(function (axis) {
+            var range = dataRange(plot, axis);
+            var limits = plot.limits[axis];
+            var scale = plot.scale[axis];
+
+            view[axis] = [
+                usable(limits[0], scale) ? forward(limits[0], scale) : range[0],
+                usable(limits[1], scale) ? forward(limits[1], scale) : range[1]
+            ];
+        });
+
+        return view;
+    }
+
+    /* Ticks, in the space of the scale: 1, 2, 5 steps for linear axes, and
+       decades (where there are enough of them) for log axes. */
+    function ticks(range, scale) {
+        /* Allowing for rounding, so that ticks at the very edges are kept. */
+        var tolerance = 1e-6 * Math.abs(range[1] - range[0]);
+        var low = Math.min(range[0], range[1]) - tolerance;
+        var high = Math.max(range[0], range[1]) + tolerance;
+
+        if (scale === "log" && high - low >= 1.5) {
+            var step = Math.max(1, Math.ceil((high - low) / 8));
+            var decades = [];
+
+            for (var decade = Math.ceil(low / step) * step; decade <= high; decade += step) {
+                decades.push({ position: decade, exponent: decade });
+            }
+
+            return decades;
+        }
+
+        if (scale === "log") {
+            return ticks([inverse(low, scale), inverse(high, scale)], "linear").map(
+                function (tick) {
+                    return { position: forward(tick.position, scale), text: tick.text };
+                }
+            ).filter(function (tick) { return isFinite(tick.position); });
+        }
+
+        var rough = (high - low) / 6;
+        var magnitude = Math.pow(10, Math.floor(Math.log10(rough)));
+        var spacing = [1, 2, 5, 10].map(function (factor) {
+            return factor * magnitude;
+        }).find(function (candidate) { return candidate >= rough; });
+
+        var output = [];
+
+        for (var value = Math.ceil(low / spacing) * spacing; value <= high; value += spacing) {
+            output.push({ position: value, text: format(value, spacing) });
+        }
+
+        return output;
+    }
+
+    function format(value, spacing) {
+        if (Math.abs(value) < spacing / 2) {
+            return "0";
+        }
+
+        var magnitude = Math.abs(value);
+
+        if (magnitude >= 1e5 || magnitude < 1e-3) {
+            return value.toExponential(Math.max(0, -Math.floor(Math.log10(spacing / magnitude))));
+        }
+
+        return value.toFixed(Math.max(0, -Math.floor(Math.log10(spacing))));
+    }
+
+    /* Drawing */
+
+    function colour(fraction) {
+        var position = Math.min(Math.max(fraction, 0), 1) * (VIRIDIS.length - 1);
+        var index = Math.min(Math.floor(position), VIRIDIS.length - 2);
+        var weight = position - index;
+
+        return VIRIDIS[index].map(function (channel, i) {
+            return Math.round(channel + weight * (VIRIDIS[index + 1][i] - channel));
+        });
+    }
+
+    /* Each histogram is coloured once, into an image of one pixel per cell. */
+    function histogramImage(histogram) {
+        var shape = histogram.grid.shape;
+        var rows = shape[0];
+        var columns = shape[1];
+        var grid = histogram.grid;
+        var log = histogram.norm === "log";
+
+        var low = Infinity;
+        var high = -Infinity;
+
+        for (var i = 0; i < grid.length; i++) {
+            if (isFinite(grid[i]) && (!log || grid[i] > 0)) {
+                low = Math.min(low, grid[i]);
+                high = Math.max(high, grid[i]);
+            }
+        }
+
+        var image = document.createElement("canvas");
+        image.width = columns;
+        image.height = rows;
+
+        var context = image.getContext("2d");
+        var pixels = context.createImageData(columns, rows);
+
+        for (var row = 0; row < rows; row++) {
+            for (var column = 0; column < columns; column++) {
+                var value = grid[row * columns + column];
+                /* The first row of the grid is at the bottom. */
+                var offset = 4 * ((rows - 1 - row) * columns + column);
+
+                if (!isFinite(value) || (log && value <= 0)) {
+                    continue;
+                }
+
+                var fraction = high > low ? (
+                    log ? Math.log(value / low) / Math.log(high / low) : (value - low) / (high - low)
+                ) : 0.5;
+                var rgb = colour(fraction);
+
+                pixels.data[offset] = rgb[0];
+                pixels.data[offset + 1] = rgb[1];
+                pixels.data[offset + 2] = rgb[2];
+                pixels.data[offset + 3] = 255;
+            }
+        }
+
+        context.putImageData(pixels, 0, 0);
+
+        return image;
+    }
+
+    /* Tile pyramids: each tile is loaded once, and the plot redrawn when it arrives. */
+    function tile(histogram, level, column, row, redraw) {
+        var filename = histogram.prefix + histogram.tiles.filename
+            .replace("{level}", level)
+            .replace("{column}", column)
+            .replace("{row}", row);
+
+        histogram.tileImages = histogram.tileImages || {};
+
+        var image = histogram.tileImages[filename];
+
+        if (image === undefined) {
+            image = new Image();
+            image.onload = redraw;
+            image.src = filename;
+            histogram.tileImages[filename] = image;
+        }
+
+        return image.complete && image.naturalWidth > 0 ? image : null;
+    }
+
+    function drawTiles(context, histogram, px, py, box, redraw) {
+        var tiles = histogram.tiles;
+        var x = histogram.x_edges;
+        var y = histogram.y_edges;
+        var columns = x.length - 1;
+        var rows = y.length - 1;
+        var ratio = window.devicePixelRatio || 1;
+
+        /* The coarsest level with at least one cell per device pixel. */
+        var cellSize = Math.max(
+            Math.abs(px(x[columns]) - px(x[0])) / columns,
+            Math.abs(py(y[0]) - py(y[rows])) / rows
+        ) * ratio;
+        var finest = Math.min(Math.max(Math.floor(-Math.log2(cellSize)), 0), tiles.levels - 1);
+
+        /* The coarsest level is a single tile, which stands in for finer tiles while they load. */
+        var coarsest = tile(histogram, tiles.levels - 1, 0, 0, redraw);
+
+        function drawLevel(level) {
+            var span = tiles.tile_size * Math.pow(2, level);
+
+            for (var column = 0; column * span < columns; column++) {
+                var left = px(x[column * span]);
+                var right = px(x[Math.min((column + 1) * span, columns)]);
+
+                if (right < box.left || left > box.left + box.width) {
+                    continue;
+                }
+
+                for (var row = 0; row * span < rows; row++) {
+                    var bottom = py(y[row * span]);
+                    var top = py(y[Math.min((row + 1) * span, rows)]);
+
+                    if (bottom < box.top || top > box.top + box.height) {
+                        continue;
+                    }
+
+                    var image = tile(histogram, level, column, row, redraw);
+
+                    if (image !== null) {
+                        context.drawImage(image, left, top, right - left, bottom - top);
+                    } else if (coarsest !== null) {
+                        context.save();
+                        context.beginPath();
+                        context.rect(left, top, right - left, bottom - top);
+                        context.clip();
+                        context.drawImage(
+                            coarsest, px(x[0]), py(y[rows]), px(x[columns]) - px(x[0]), py(y[0]) - py(y[rows])
+                        );
+                        context.restore();
+                    }
+                }
+            }
+        }
+
+        context.imageSmoothingEnabled = false;
+        drawLevel(finest);
+    }
+
+    function draw(canvas, plot, view) {
+        var ratio = window.devicePixelRatio || 1;
+        var width = canvas.clientWidth;
+        var height = canvas.clientHeight;
+
+        canvas.width = Math.round(width * ratio);
+        canvas.height = Math.round(height * ratio);
+
+        var context = canvas.getContext("2d");
+        context.setTransform(ratio, 0, 0, ratio, 0, 0);
+        context.clearRect(0, 0, width, height);
+        context.font = "12px sans-serif";
+
+        var box = {
+            left: MARGIN.left,
+            top: MARGIN.top,
+            width: Math.max(width - MARGIN.left - MARGIN.right, 1),
+            height: Math.max(height - MARGIN.top - MARGIN.bottom, 1)
+        };
+
+        function px(value) {
+            var position = forward(value, plot.scale.x);
+            return box.left + (position - view.x[0]) / (view.x[1] - view.x[0]) * box.width;
+        }
+
+        function py(value) {
+            var position = forward(value, plot.scale.y);
+            return box.top + box.height - (position - view.y[0]) / (view.y[1] - view.y[0]) * box.height;
+        }
+
+        context.save();
+        context.beginPath();
+        context.rect(box.left, box.top, box.width, box.height);
+        context.clip();
+
+        function redraw() {
+            if (canvas.dataset.redrawing) {
+                return;
+            }
+
+            canvas.dataset.redrawing = "true";
+
+            window.requestAnimationFrame(function () {
+                delete canvas.dataset.redrawing;
+                draw(canvas, plot, view);
+            });
+        }
+
+        plot.histograms.forEach(function (histogram) {
+            if (histogram.tiles !== undefined) {
+                drawTiles(context, histogram, px, py, box, redraw);
+                return;
+            }
+
+            histogram.image = histogram.image || histogramImage(histogram);
+
+            var x = histogram.x_edges;
+            var y = histogram.y_edges;
+            var left = px(x[0]);
+            var top = py(y[y.length - 1]);
+
+            context.imageSmoothingEnabled = false;
+            context.drawImage(
+                histogram.image, left, top, px(x[x.length - 1]) - left, py(y[0]) - top
+            );
+        });
+
+        plot.lines.forEach(function (line) {
+            var errors = line.errors;
+            var n = line.centers.length;
+
+            context.strokeStyle = line.colour;
+            context.fillStyle = line.colour;
+            context.lineWidth = 1.5;
+
+            if (errors !== undefined && errors !== null && errors.length > 0) {
+                var asymmetric = errors.shape.length === 2;
+
+                context.beginPath();
+
+                for (var i = 0; i < n; i++) {
+                    /* Lower and upper errors are the rows of a 2 by N array. */
+                    var lower = errors[i];
+                    var upper = asymmetric ? errors[n + i] : errors[i];
+                    var x = px(line.centers[i]);
+
+                    context.moveTo(x, py(line.values[i] - lower));
+                    context.lineTo(x, py(line.values[i] + upper));
+                }
+
+                context.stroke();
+            }
+
+            context.beginPath();
+
+            for (var j = 0; j < n; j++) {
+                if (j === 0) {
+                    context.moveTo(px(line.centers[j]), py(line.values[j]));
+                } else {
+                    context.lineTo(px(line.centers[j]), py(line.values[j]));
+                }
+            }
+
+            context.stroke();
+        });
+
+        context.restore();
+
+        /* Frame, ticks, and labels */
+
+        context.strokeStyle = "black";
+        context.fillStyle = "black";
+        context.lineWidth = 1;
+        context.strokeRect(box.left, box.top, box.width, box.height);
+
+        function label(tick, x, y, align, baseline) {
+            context.textAlign = align;
+            context.textBaseline = baseline;
+
+            if (tick.exponent === undefined) {
+                context.fillText(tick.text, x, y);
+                return;
+            }
+
+            /* Powers of ten, with a raised exponent. */
+            var exponent = String(tick.exponent);
+            context.font = "9px sans-serif";
+            var exponentWidth = context.measureText(exponent).width;
+            context.font = "12px sans-serif";
+            var baseWidth = context.measureText("10").width;
+
+            var start = align === "center" ? x - (baseWidth + exponentWidth) / 2 : x - baseWidth - exponentWidth;
+
+            context.textAlign = "left";
+            context.fillText("10", start, y);
+            context.font = "9px sans-serif";
+            context.fillText(exponent, start + baseWidth, y - 6);
+            context.font = "12px sans-serif";
+        }
+
+        ticks(view.x, plot.scale.x).forEach(function (tick) {
+            var x = box.left + (tick.position - view.x[0]) / (view.x[1] - view.x[0]) * box.width;
+
+            context.beginPath();
+            context.moveTo(x, box.top + box.height);
+            context.lineTo(x, box.top + box.height + 5);
+            context.stroke();
+
+            label(tick, x, box.top + box.height + 8, "center", "top");
+        });
+
+        ticks(view.y, plot.scale.y).forEach(function (tick) {
+            var y = box.top + box.height - (tick.position - view.y[0]) / (view.y[1] - view.y[0]) * box.height;
+
+            context.beginPath();
+            context.moveTo(box.left - 5, y);
+            context.lineTo(box.left, y);
+            context.stroke();
+
+            label(tick, box.left - 8, y, "right", "middle");
+        });
+
+        context.textAlign = "center";
+        context.textBaseline = "bottom";
+        context.fillText(plot.x_label, box.left + box.width / 2, height - 4);
+
+        context.save();
+        context.translate(14, box.top + box.height / 2);
+        context.rotate(-Math.PI / 2);
+        context.textBaseline = "middle";
+        context.fillText(plot.y_label, 0, 0);
+        context.restore();
+
+        /* Legend */
+
+        context.textAlign = "left";
+        context.textBaseline = "middle";
+
+        plot.lines.forEach(function (line, index) {
+            var y = box.top + 14 + 16 * index;
+            var x = box.left + box.width - 10 - context.measureText(line.label).width - 24;
+
+            context.strokeStyle = line.colour;
+            context.lineWidth = 1.5;
+            context.beginPath();
+            context.moveTo(x, y);
+            context.lineTo(x + 18, y);
+            context.stroke();
+
+            context.fillStyle = "black";
+            context.fillText(line.label, x + 24, y);
+        });
+
+        return box;
+    }
+
+    /* Zooming (scroll), panning (drag), and resetting (double click). */
+    function interact(canvas, plot, view) {
+        var initial = JSON.parse(JSON.stringify(view));
+        var box = draw(canvas, plot, view);
+        var drag = null;
+
+        function position(event) {
+            var bounds = canvas.getBoundingClientRect();
+            return {
+                x: view.x[0] + (event.clientX - bounds.left - box.left) / box.width * (view.x[1] - view.x[0]),
+                y: view.y[1] - (event.clientY - bounds.top - box.top) / box.height * (view.y[1] - view.y[0])
+            };
+        }
+
+        canvas.addEventListener("wheel", function (event) {
+            event.preventDefault();
+
+            var centre = position(event);
+            var factor = event.deltaY > 0 ? 1.2 : 1 / 1.2;
+
+            ["x", "y"].forEach(function (axis) {
+                view[axis] = view[axis].map(function (limit) {
+                    return centre[axis] + (limit - centre[axis]) * factor;
+                });
+            });
+
+            box = draw(canvas, plot, view);
+        });
+
+        canvas.addEventListener("mousedown", function (event) {
+            drag = position(event);
+        });
+
+        window.addEventListener("mouseup", function () {
+            drag = null;
+        });
+
+        canvas.addEventListener("mousemove", function (event) {
+            if (drag === null) {
+                return;
+            }
+
+            var current = position(event);
+
+            ["x", "y"].forEach(function (axis) {
+                var shift = drag[axis] - current[axis];
+                view[axis] = [view[axis][0] + shift, view[axis][1] + shift];
+            });
+
+            box = draw(canvas, plot, view);
+        });
+
+        canvas.addEventListener("dblclick", function () {
+            view.x = initial.x.slice();
+            view.y = initial.y.slice();
+            box = draw(canvas, plot, view);
+        });
+    }
+
+    function setup(canvas, data) {
+        var plot = PagePlot.plots[data.name] || layers(data);
+        PagePlot.plots[data.name] = plot;
+
+        if (canvas.classList.contains("interactive")) {
+            interact(canvas, plot, initialView(plot));
+        } else {
+            draw(canvas, plot, initialView(plot));
+        }
+    }
+
+    PagePlot.plots = {};
+
+    PagePlot.register = function (data) {
+        PagePlot.data[data.name] = data;
+
+        (PagePlot.pending[data.name] || []).forEach(function (canvas) {
+            setup(canvas, data);
+        });
+
+        delete PagePlot.pending[data.name];
+    };
+
+    /* Loading */
+
+    function load(canvas) {
+        if (canvas.dataset.loaded) {
+            return;
+        }
+
+        canvas.dataset.loaded = "true";
+
+        var name = canvas.dataset.plot;
+
+        if (name in PagePlot.data) {
+            setup(canvas, PagePlot.data[name]);
+            return;
+        }
+
+        if (name in PagePlot.pending) {
+            PagePlot.pending[name].push(canvas);
+            return;
+        }
+
+        PagePlot.pending[name] = [canvas];
+
+        /* A script, rather than a request, so that this works from disk. */
+        var script = document.createElement("script");
+        script.src = canvas.dataset.src;
+        document.head.appendChild(script);
+    }
+
+    var grid = document.querySelectorAll(".plot canvas.client-plot");
+
+    if ("IntersectionObserver" in window) {
+        var observer = new IntersectionObserver(function (entries) {
+            entries.forEach(function (entry) {
+                if (entry.isIntersecting) {
+                    load(entry.target);
+                    observer.unobserve(entry.target);
+                }
+            });
+        }, { rootMargin: "400px" });
+
+        grid.forEach(function (canvas) {
+            observer.observe(canvas);
+        });
+    } else {
+        grid.forEach(load);
+    }
+
+    function loadLightboxPlot() {
+        var target = document.getElementById(decodeURIComponent(window.location.hash.slice(1)));
+
+        if (target !== null) {
+            target.querySelectorAll("canvas.client-plot").forEach(load);
+        }
+    }
+
+    window.addEventListener("hashchange", loadLightboxPlot);
+    loadLightboxPlot();
+})();
+
+{% endraw %}
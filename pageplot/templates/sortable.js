@@ -0,0 +1,29 @@
+{% raw %}
+
+/* Sorts tables with the class "sortable" when their headers are clicked. */
+
+document.querySelectorAll("table.sortable").forEach(function (table) {
+    table.querySelectorAll("th").forEach(function (header, column) {
+        header.style.cursor = "pointer";
+
+        header.addEventListener("click", function () {
+            var body = table.tBodies[0];
+            var rows = Array.prototype.slice.call(body.rows);
+            var numeric = header.dataset.type === "number";
+            var ascending = header.dataset.order !== "ascending";
+
+            rows.sort(function (a, b) {
+                var x = a.cells[column].textContent;
+                var y = b.cells[column].textContent;
+                var order = numeric ? parseFloat(x) - parseFloat(y) : x.localeCompare(y);
+
+                return ascending ? order : -order;
+            });
+
+            header.dataset.order = ascending ? "ascending" : "descending";
+            rows.forEach(function (row) { body.appendChild(row); });
+        });
+    });
+});
+
+{% endraw %}
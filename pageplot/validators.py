@@ -4,8 +4,8 @@ Helpful validators for use throughout extensions.
 
 from typing import Callable, List, Union
 
-import matplotlib.pyplot as plt
 import unyt
+from matplotlib.axes import Axes
 
 from pageplot.exceptions import PagePlotParserError
 
@@ -68,7 +68,7 @@ def line_display_as_to_function_validator(item: str) -> Callable:
     if item == "default":
 
         def errorbar_basic(
-            axes: plt.Axes,
+            axes: Axes,
             x: unyt.unyt_array,
             y: unyt.unyt_array,
             yerr: unyt.unyt_array,
@@ -85,7 +85,7 @@ def line_display_as_to_function_validator(item: str) -> Callable:
     elif item == "shaded":
 
         def errorbar_shaded(
-            axes: plt.Axes,
+            axes: Axes,
             x: unyt.unyt_array,
             y: unyt.unyt_array,
             yerr: unyt.unyt_array,
@@ -124,7 +124,7 @@ def line_display_as_to_function_validator(item: str) -> Callable:
     elif item == "points":
 
         def errorbar_points(
-            axes: plt.Axes,
+            axes: Axes,
             x: unyt.unyt_array,
             y: unyt.unyt_array,
             yerr: unyt.unyt_array,
@@ -0,0 +1,200 @@
+"""
+Data for drawing the figures in the browser, rather than with matplotlib.
+
+The serialized data of a plot (the output of :meth:`PlotModel.serialize`)
+is usually tiny compared to the rendered figure. Here it is written, one
+small script per plot, as JSON with the arrays packed as base64-encoded
+little-endian binary; the bundled renderer (``renderer.js``) draws it on
+a canvas, with zooming and panning, and without any external libraries.
+The data are loaded as scripts rather than fetched, so that the pages
+also work when opened straight from disk.
+
+The renderer understands extensions by the contents of their serialized
+data, so any extension that uses the same keys is drawn too:
+
++ ``centers`` and ``values`` (and, optionally, ``errors``, either
+  symmetric or as a 2 by N lower and upper array) are drawn as a line
+  with error bars.
++ ``x_edges``, ``y_edges``, and ``grid`` (with ``norm``) are drawn as a
+  two dimensional histogram.
++ ``tiles`` (with ``x_edges`` and ``y_edges``) describes a pyramid of image
+  tiles written alongside the data (see
+  :class:`TwoDimensionalHistogramExtension`), which are loaded as they are
+  zoomed into. The grid (and any coarsened copies of it) is then not part
+  of the data, which would otherwise be far too large.
++ ``scale_x`` and ``scale_y`` set the axes scales.
++ ``limits_x`` and ``limits_y`` set the initial view.
+
+Arrays under these keys are converted to the output units of the plot.
+"""
+
+import base64
+import json
+from typing import TYPE_CHECKING, Any, Dict, Optional, Tuple
+
+import numpy as np
+import unyt
+
+if TYPE_CHECKING:
+    from pageplot.plotmodel import PlotModel
+
+# Keys of the serialized data that are in the units of the x and y axes.
+X_KEYS = ("centers", "x_edges", "limits_x")
+Y_KEYS = ("values", "errors", "y_edges", "limits_y")
+
+
+def array_dtype(values: np.ndarray) -> str:
+    """
+    The most compact (little-endian) type that a typed array in the browser
+    can hold ``values`` in without losing them: 32 bit integers where they
+    fit, then 32 bit floats where every value is exactly representable, and
+    otherwise 64 bit floats (e.g. for edges with a large offset, which
+    would collapse when zoomed into).
+    """
+
+    if values.dtype.kind in "uib":
+        if values.size == 0 or (values.min() >= 0 and values.max() < 2**32):
+            return "<u4"
+        elif values.min() >= -(2**31) and values.max() < 2**31:
+            return "<i4"
+
+        return "<f8"
+
+    with np.errstate(over="ignore"):
+        if np.array_equal(values, values.astype(np.float32), equal_nan=True):
+            return "<f4"
+
+    return "<f8"
+
+
+def encode_array(
+    array: np.ndarray, units: Optional[unyt.Unit] = None
+) -> Dict[str, Any]:
+    """
+    Encodes an array (with or without units) for the renderer, converting it
+    to ``units`` if it has compatible units.
+    """
+
+    name = getattr(array, "name", None)
+    array_units = ""
+
+    if isinstance(array, unyt.unyt_array):
+        if units is not None and array.units.dimensions == units.dimensions:
+            array = array.to(units)
+
+        array_units = str(array.units)
+
+    values = np.asarray(array)
+    dtype = array_dtype(values)
+
+    return {
+        "__array__": True,
+        "dtype": dtype,
+        "shape": list(values.shape),
+        "units": array_units,
+        "name": None if name is None else str(name),
+        "data": base64.b64encode(
+            np.ascontiguousarray(values, dtype=dtype).tobytes()
+        ).decode("ascii"),
+    }
+
+
+def encode_value(value: Any, units: Optional[Dict[str, unyt.Unit]] = None) -> Any:
+    """
+    Recursively encodes serialized data (see :func:`encode_array`), converting
+    arrays in the axes (see ``X_KEYS`` and ``Y_KEYS``) to ``units``, a
+    dictionary with ``x`` and ``y`` units.
+    """
+
+    units = {} if units is None else units
+
+    def encode(item: Any, item_units: Optional[unyt.Unit]) -> Any:
+        if isinstance(item, np.ndarray):
+            return encode_array(item, item_units)
+        elif isinstance(item, dict):
+            encoded = {}
+
+            for key, sub_item in item.items():
+                if key in X_KEYS:
+                    sub_item_units = units.get("x")
+                elif key in Y_KEYS:
+                    sub_item_units = units.get("y")
+                else:
+                    sub_item_units = item_units
+
+                encoded[str(key)] = encode(sub_item, sub_item_units)
+
+            return encoded
+        elif isinstance(item, (list, tuple)):
+            return [encode(sub_item, item_units) for sub_item in item]
+        elif isinstance(item, np.generic):
+            return item.item()
+        elif item is None or isinstance(item, (str, int, float, bool)):
+            return item
+
+        return str(item)
+
+    return encode(value, None)
+
+
+def axis_label(
+    serialized: Dict[str, Any], keys: Tuple[str, ...], units: unyt.Unit
+) -> str:
+    """
+    Label for an axis: the name of the first named array stored under one of
+    ``keys`` in any extension, and the units.
+    """
+
+    name = None
+
+    for extension in serialized.values():
+        if not isinstance(extension, dict):
+            continue
+
+        for key in keys:
+            if getattr(extension.get(key, None), "name", None) is not None:
+                name = extension[key].name
+                break
+
+        if name is not None:
+            break
+
+    units = "" if units == unyt.dimensionless else f"[{units}]"
+
+    return " ".join(str(part) for part in [name, units] if part)
+
+
+def client_data(plot: "PlotModel") -> Dict[str, Any]:
+    """
+    The data needed to draw a (pre-processed) plot in the browser: its name,
+    the labels of its axes, and the encoded serialized data of each of its
+    extensions that have any.
+    """
+
+    serialized = {
+        name: data for name, data in plot.serialize().items() if data is not None
+    }
+
+    first = next(iter(plot.extensions.values()), None)
+    units = {
+        "x": unyt.dimensionless if first is None else first.x_units.units,
+        "y": unyt.dimensionless if first is None else first.y_units.units,
+    }
+
+    return {
+        "name": plot.name,
+        "x_label": axis_label(serialized, X_KEYS, units["x"]),
+        "y_label": axis_label(serialized, Y_KEYS, units["y"]),
+        "extensions": encode_value(serialized, units),
+    }
+
+
+def client_script(plot: "PlotModel") -> str:
+    """
+    Script that registers the data of the plot (see :func:`client_data`)
+    with the renderer.
+    """
+
+    data = json.dumps(client_data(plot), separators=(",", ":"))
+
+    return f"PagePlot.register({data});\n"
@@ -2,13 +2,22 @@
 Functions that aid in the production of the HTML webpages.
 """
 
+import hashlib
+import json
+from pathlib import Path
 from time import strftime
+from typing import Any, Dict, List, Union
 
 import unyt
 from jinja2 import Environment, PackageLoader, select_autoescape
 
 from pageplot.config import GlobalConfig
+from pageplot.imagewriter import thumbnail_filename
+from pageplot.instrumentation import Instrumentation
 from pageplot.plotcontainer import PlotContainer
+from pageplot.plotmodel import PlotModel
+from pageplot.sinks import OutputSink, as_sink
+from pageplot.webpage.client import client_script
 
 
 def format_number(number):
@@ -75,13 +84,45 @@ def camel_to_title(string):
     return string.title().replace("_", " ")
 
 
+def stable_id(*parts: str) -> str:
+    """
+    Identifier built from a hash of the given strings, which (unlike the
+    built-in ``hash``) is the same on every run.
+    """
+
+    return hashlib.sha1("\0".join(parts).encode("utf-8")).hexdigest()[:12]
+
+
+def plot_metadata(plot) -> Dict[str, Any]:
+    """
+    The output of the metadata extension of a plot, without serializing (or
+    even running) any of the other extensions.
+    """
+
+    extensions = getattr(plot, "extensions", {})
+
+    if "metadata" in extensions:
+        return extensions["metadata"].serialize()
+
+    return dict(plot.plot_spec.get("metadata") or {})
+
+
 class WebpageCreator(object):
     """
     Creates webpages based on the information that is provided in
     the plots metadata through the autoplotter and the additional
     plotting interface provided through the pipeline.
+
+    Either render everything as a single page (``render_webpage`` and
+    ``save_html``), or, for large numbers of figures, write an index page,
+    one page per section, and a JSON index of all of the plots with
+    ``save_pages``. In both cases the figures are only loaded as they are
+    scrolled into view.
     """
 
+    # Files written once alongside the pages, rather than inlined in each.
+    assets = ["mathjax.js"]
+
     environment: Environment
     loader: PackageLoader
 
@@ -91,6 +132,9 @@ class WebpageCreator(object):
     plot_container: PlotContainer
     config: GlobalConfig
 
+    # Plots drawn in the browser, by the filename of their data.
+    client_plots: Dict[str, PlotModel]
+
     def __init__(self):
         """
         Sets up the ``jinja`` templating system.
@@ -109,6 +153,8 @@ class WebpageCreator(object):
             runs=[],
         )
 
+        self.client_plots = {}
+
         return
 
     def render_webpage(self, template: str = "plot_viewer.html") -> str:
@@ -143,55 +189,158 @@ class WebpageCreator(object):
 
         self.variables.update(dict(page_name=page_name))
 
-    def add_plots(self, plot_container: PlotContainer):
+    def add_plots(self, plot_container: PlotContainer, client_side: bool = False):
         """
         Adds the auto plotter metadata to the section / plot metadata.
+        Plots with thumbnails (see :class:`GlobalConfig`) show those, and
+        only load the full figure when clicked on.
         Parameters
         ----------
         plot_container: PlotContainer
             Complete plot container, post-run.
+        client_side: bool, optional
+            Also draw the plots in the browser, from their serialized data
+            (see :mod:`pageplot.webpage.client`), with zooming. These replace
+            the figures in the page if the container did not render them.
+            Plots that wrote additional outputs (e.g. the tiles of a two
+            dimensional histogram) are always also drawn in the browser, as
+            this is how those outputs are shown.
         """
 
         self.plot_container = plot_container
+        self.variables["client_side"] = (
+            self.variables.get("client_side", False)
+            or client_side
+            or any(plot.additional_outputs for plot in plot_container.plots.values())
+        )
 
         metadata = {
-            name: plot.serialize()["metadata"]
+            name: plot_metadata(plot)
             for name, plot in self.plot_container.plots.items()
         }
 
-        # Unique sections
-        sections = {md.get("section", "Uncategorised") for md in metadata.values()}
-        print(sections)
+        for name, plot in self.plot_container.plots.items():
+            md = metadata[name]
+            section = md.get("section") or "Uncategorised"
 
-        for section in sections:
-            plots = [
+            if self.plot_container.render_figures:
+                filename = f"{name}.{self.plot_container.file_extension}"
+                thumbnail = (
+                    thumbnail_filename(Path(filename)).name
+                    if plot.config.thumbnail_width is not None
+                    else filename
+                )
+            else:
+                filename = thumbnail = None
+
+            if client_side or plot.additional_outputs:
+                data = f"{name}.data.js"
+                self.client_plots[data] = plot
+            else:
+                data = None
+
+            if section not in self.variables["sections"]:
+                section_id = stable_id(section)
+
+                self.variables["sections"][section] = dict(
+                    title=section,
+                    plots=[],
+                    id=section_id,
+                    page=f"section_{section_id}.html",
+                )
+
+            self.variables["sections"][section]["plots"].append(
                 dict(
-                    filename=f"{name}.png",
+                    name=name,
+                    filename=filename,
+                    thumbnail=thumbnail,
+                    data=data,
                     title=md.get("title", ""),
                     caption=md.get("caption", ""),
-                    hash=abs(
-                        hash(str(md.get("title", "")) + str(md.get("caption", "")))
+                    id=stable_id(
+                        name, str(md.get("title", "")), str(md.get("caption", ""))
                     ),
                 )
-                for name, md in metadata.items()
-                if md.get("section", "Uncategorised") == section
-            ]
-
-            current_section_plots = (
-                self.variables["sections"].get(section, {"plots": []}).get("plots", [])
             )
 
-            self.variables["sections"][section] = dict(
-                title=section,
-                plots=plots + current_section_plots,
-                id=abs(hash(section)),
+        return
+
+    def add_timings(self, instrumentation: Instrumentation):
+        """
+        Adds the per-plot timing and I/O summary, shown as a sortable table
+        of the slowest plots.
+        Parameters
+        ----------
+        instrumentation: Instrumentation
+            Instrumentation that has recorded the creation of the plots.
+        """
+
+        self.variables["timings"] = [
+            dict(
+                name=plot["name"],
+                wall_time=plot["wall_time"],
+                cpu_time=plot["cpu_time"],
+                megabytes_read=plot["bytes_read"] / 1024**2,
+                megabytes_allocated=plot["bytes_allocated"] / 1024**2,
+                slowest_stage=max(plot["stages"], key=plot["stages"].get, default=""),
             )
+            for plot in instrumentation.plot_summary()
+        ]
+
+        return
+
+    def add_snapshots(self, snapshots: List[Dict[str, Any]]):
+        """
+        Adds the snapshots of a sweep, linked to from its index page (see
+        ``save_sweep_index`` and :mod:`pageplot.sweep`).
+        Parameters
+        ----------
+        snapshots: List[Dict[str, Any]]
+            The results of :meth:`pageplot.sweep.PagePlotSweep.run`, one for
+            each snapshot.
+        """
+
+        self.variables["snapshots"] = snapshots
 
         return
 
+    def write_assets(self, output_path: Union[Path, OutputSink]):
+        """
+        Writes the files shared between the pages (see ``assets``).
+        Parameters
+        ----------
+        output_path: Union[Path, OutputSink]
+            Directory (or sink, see :mod:`pageplot.sinks`) that the pages
+            are written to.
+        """
+
+        sink = as_sink(output_path)
+
+        for asset in self.assets:
+            sink.write(
+                asset, self.environment.get_template(asset).render().encode("utf-8")
+            )
+
+    def write_client_data(self, output_path: Union[Path, OutputSink]):
+        """
+        Writes the data of each plot that is drawn in the browser (see
+        ``add_plots`` and :mod:`pageplot.webpage.client`).
+        Parameters
+        ----------
+        output_path: Union[Path, OutputSink]
+            Directory (or sink, see :mod:`pageplot.sinks`) that the pages
+            are written to.
+        """
+
+        sink = as_sink(output_path)
+
+        for filename, plot in self.client_plots.items():
+            sink.write(filename, client_script(plot).encode("utf-8"))
+
     def save_html(self, filename: str):
         """
-        Saves the html in ``self.html`` to the filename provided.
+        Saves the html in ``self.html`` to the filename provided, along with
+        the files it uses.
         Parameters
         ----------
         filename: str
@@ -200,3 +349,110 @@ class WebpageCreator(object):
 
         with open(filename, "w") as handle:
             handle.write(self.html)
+
+        self.write_assets(Path(filename).parent)
+        self.write_client_data(Path(filename).parent)
+
+    def index(self) -> Dict[str, Any]:
+        """
+        JSON-serializable index of all of the sections and their plots.
+        """
+
+        return dict(
+            page_name=self.variables.get("page_name", ""),
+            creation_date=self.variables["creation_date"],
+            sections=sorted(
+                self.variables["sections"].values(), key=lambda x: x["title"]
+            ),
+        )
+
+    def save_pages(
+        self,
+        output_path: Union[Path, OutputSink],
+        index_filename: Union[str, Path] = "index.html",
+        json_filename: Union[str, Path] = "index.json",
+    ):
+        """
+        Writes an index page (linking to the sections, and with the timings),
+        one page for each section, and a JSON index of all of the plots
+        (see ``index``), along with the files that they use.
+        Parameters
+        ----------
+        output_path: Union[Path, OutputSink]
+            Directory (or sink, see :mod:`pageplot.sinks`) to write the
+            pages to.
+        index_filename: str, optional
+            Filename of the index page, relative to ``output_path``.
+        json_filename: str, optional
+            Filename of the JSON index, relative to ``output_path``.
+        """
+
+        sink = as_sink(output_path)
+
+        sink.write(
+            index_filename,
+            self.render_webpage(template="index.html").encode("utf-8"),
+        )
+
+        section_template = self.environment.get_template(
+            "section.html", parent="base.html"
+        )
+
+        for section in self.variables["sections"].values():
+            sink.write(
+                section["page"],
+                section_template.render(
+                    section=section,
+                    index_page=Path(index_filename).name,
+                    **self.variables,
+                ).encode("utf-8"),
+            )
+
+        sink.write(json_filename, json.dumps(self.index()).encode("utf-8"))
+
+        self.write_assets(sink)
+        self.write_client_data(sink)
+
+        return
+
+    def save_sweep_index(
+        self,
+        output_path: Union[Path, OutputSink],
+        index_filename: Union[str, Path] = "index.html",
+        json_filename: Union[str, Path] = "index.json",
+    ):
+        """
+        Writes the index page of a sweep, linking to the pages of each of its
+        snapshots (see ``add_snapshots``), and a JSON index of them.
+        Parameters
+        ----------
+        output_path: Union[Path, OutputSink]
+            Directory (or sink, see :mod:`pageplot.sinks`) to write the
+            index to.
+        index_filename: str, optional
+            Filename of the index page, relative to ``output_path``.
+        json_filename: str, optional
+            Filename of the JSON index, relative to ``output_path``.
+        """
+
+        sink = as_sink(output_path)
+
+        sink.write(
+            index_filename,
+            self.render_webpage(template="sweep.html").encode("utf-8"),
+        )
+
+        sink.write(
+            json_filename,
+            json.dumps(
+                dict(
+                    page_name=self.variables.get("page_name", ""),
+                    creation_date=self.variables["creation_date"],
+                    snapshots=self.variables.get("snapshots", []),
+                )
+            ).encode("utf-8"),
+        )
+
+        self.write_assets(sink)
+
+        return
@@ -0,0 +1,178 @@
+"""
+Tests drawing the figures in the browser from their serialized data.
+"""
+
+import base64
+import json
+
+import h5py
+import numpy as np
+import unyt
+
+from pageplot.io.h5py import IOHDF5
+from pageplot.runner import PagePlotRunner
+from pageplot.webpage.client import encode_array
+
+
+def decode_array(encoded):
+    return np.frombuffer(
+        base64.b64decode(encoded["data"]), dtype=encoded["dtype"]
+    ).reshape(encoded["shape"])
+
+
+def test_encode_array():
+    counts = np.array([[0, 3], [2**31, 7]], dtype=np.uint64)
+    encoded = encode_array(unyt.unyt_array(counts, None))
+
+    assert encoded["dtype"] == "<u4"
+    assert (decode_array(encoded) == counts).all()
+
+    masses = unyt.unyt_array([1e10, 2e12], "Msun", name="Mass")
+    encoded = encode_array(masses, unyt.Unit("1e10*Msun"))
+
+    assert encoded["dtype"] == "<f4"
+    assert encoded["name"] == "Mass"
+    assert np.allclose(decode_array(encoded), [1.0, 200.0])
+
+    # Incompatible units are left alone.
+    assert encode_array(masses, unyt.Unit("kpc"))["units"] == "Msun"
+
+    # Beyond the range of 32 bit floats.
+    assert encode_array(np.array([1e300]))["dtype"] == "<f8"
+
+    # Values are only narrowed to 32 bit floats when that is exact.
+    assert encode_array(np.array([0.5, 1e10, np.nan]))["dtype"] == "<f4"
+    encoded = encode_array(np.array([1e10 + 1.0, 0.1]))
+    assert encoded["dtype"] == "<f8"
+    assert (decode_array(encoded) == [1e10 + 1.0, 0.1]).all()
+
+
+def test_browser_rendering(tmp_path):
+    data_file = tmp_path / "test.hdf5"
+
+    with h5py.File(data_file, "w") as handle:
+        handle.create_dataset("XDataset", data=10 ** np.random.uniform(0, 3, 1024))
+        handle.create_dataset("YDataset", data=10 ** np.random.uniform(0, 3, 1024))
+
+    config_file = tmp_path / "config.json"
+    plot_file = tmp_path / "plots.json"
+
+    with open(config_file, "w") as handle:
+        json.dump({}, handle)
+
+    with open(plot_file, "w") as handle:
+        json.dump(
+            {
+                "test": {
+                    "x": "XDataset Solar_Mass",
+                    "y": "YDataset kpc",
+                    "x_units": "1e10 * Solar_Mass",
+                    "two_dimensional_histogram": {
+                        "limits_x": ["1 Solar_Mass", "1000 Solar_Mass"],
+                        "limits_y": ["1 kpc", "1000 kpc"],
+                        "spacing_x": "log",
+                        "spacing_y": "log",
+                        "bins": 16,
+                    },
+                    "median_line": {
+                        "limits": ["1 Solar_Mass", "1000 Solar_Mass"],
+                        "spacing": "log",
+                    },
+                    "axes_limits": {"limits_x": ["1 Solar_Mass", None]},
+                    "scale_axes": {"scale_x": "log", "scale_y": "log"},
+                    "metadata": {"title": "Test", "section": "Tests"},
+                }
+            },
+            handle,
+        )
+
+    runner = PagePlotRunner(
+        config_filename=config_file,
+        data=IOHDF5(filename=data_file),
+        plot_filenames=[plot_file],
+        output_path=tmp_path,
+        rendering="browser",
+    )
+    runner.create_figures()
+    runner.create_webpage()
+
+    # No images are rendered.
+    assert not list(tmp_path.glob("test*.png"))
+
+    script = (tmp_path / "test.data.js").read_text()
+    assert script.startswith("PagePlot.register(")
+
+    data = json.loads(script[len("PagePlot.register(") : -len(");\n")])
+    extensions = data["extensions"]
+
+    assert data["x_label"] == "XDataset [10000000000*Msun]"
+
+    histogram = extensions["two_dimensional_histogram"]
+    assert decode_array(histogram["grid"]).sum() == 1024
+    # Converted to the units of the axes.
+    assert np.isclose(decode_array(histogram["x_edges"])[0], 1e-10)
+    assert np.isclose(decode_array(extensions["axes_limits"]["limits_x"][0]), 1e-10)
+    assert extensions["axes_limits"]["limits_x"][1] is None
+    assert extensions["scale_axes"]["scale_x"] == "log"
+
+    page = next(tmp_path.glob("section_*.html")).read_text()
+    assert 'data-src="test.data.js"' in page
+    assert "PagePlot.register = function" in page
+
+
+def test_histogram_tiles(tmp_path):
+    data_file = tmp_path / "test.hdf5"
+
+    with h5py.File(data_file, "w") as handle:
+        handle.create_dataset("XDataset", data=np.random.rand(4096))
+        handle.create_dataset("YDataset", data=np.random.rand(4096))
+
+    config_file = tmp_path / "config.json"
+    plot_file = tmp_path / "plots.json"
+
+    with open(config_file, "w") as handle:
+        json.dump({}, handle)
+
+    with open(plot_file, "w") as handle:
+        json.dump(
+            {
+                "test": {
+                    "x": "XDataset Solar_Mass",
+                    "y": "YDataset kpc",
+                    "two_dimensional_histogram": {
+                        "limits_x": ["0 Solar_Mass", "1 Solar_Mass"],
+                        "limits_y": ["0 kpc", "1 kpc"],
+                        "bins": 64,
+                        "tile_size": 32,
+                    },
+                    "metadata": {"title": "Test", "section": "Tests"},
+                }
+            },
+            handle,
+        )
+
+    runner = PagePlotRunner(
+        config_filename=config_file,
+        data=IOHDF5(filename=data_file),
+        plot_filenames=[plot_file],
+        output_path=tmp_path,
+    )
+    runner.create_figures()
+    runner.create_webpage()
+
+    tiles = sorted(path.name for path in tmp_path.glob("test_*_tile_*.png"))
+
+    assert tiles == sorted(runner.plot_container.plots["test"].additional_outputs)
+    assert len(tiles) == 2 * 2 + 1
+    assert (tmp_path / "test.png").exists()
+
+    # Only the description of the tiles is sent to the browser, not the grid.
+    script = (tmp_path / "test.data.js").read_text()
+    data = json.loads(script[len("PagePlot.register(") : -len(");\n")])
+    histogram = data["extensions"]["two_dimensional_histogram"]
+
+    assert "grid" not in histogram
+    assert histogram["tiles"]["levels"] == 2
+
+    page = next(tmp_path.glob("section_*.html")).read_text()
+    assert "client-plot interactive" in page
@@ -0,0 +1,62 @@
+"""
+Tests for the pyplot-free construction of figures.
+"""
+
+import subprocess
+import sys
+
+import h5py
+import numpy as np
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+from pageplot.config import GlobalConfig
+
+
+def test_figures_are_independent():
+    config = GlobalConfig()
+
+    fig, axes = config.create_figure()
+    other_fig, other_axes = config.create_figure()
+
+    assert isinstance(fig.canvas, FigureCanvasAgg)
+    assert fig is not other_fig and fig.axes == [axes]
+
+    axes.plot([0.0, 1.0], [0.0, 1.0])
+    axes.set_xscale("log")
+
+    assert len(other_axes.lines) == 0
+    assert other_axes.get_xscale() == "linear"
+
+
+def test_plots_do_not_use_pyplot(tmp_path):
+    data_file = tmp_path / "test.hdf5"
+
+    with h5py.File(data_file, "w") as handle:
+        handle.create_dataset("XDataset", data=np.random.rand(128))
+        handle.create_dataset("YDataset", data=np.random.rand(128))
+
+    code = (
+        "import sys\n"
+        "from pageplot.config import GlobalConfig\n"
+        "from pageplot.io.h5py import IOHDF5\n"
+        "from pageplot.plotmodel import PlotModel\n"
+        "plot = PlotModel(name='test', config=GlobalConfig(), plot_spec={\n"
+        "    'scatter': {},\n"
+        "    'median_line': {'limits': ['0 Solar_Mass', '1 Solar_Mass']},\n"
+        "    'legend': {},\n"
+        "}, x='XDataset Solar_Mass', y='YDataset kpc')\n"
+        f"plot.associate_data(IOHDF5(filename={str(data_file)!r}))\n"
+        "plot.setup_figures()\n"
+        "plot.run_extensions()\n"
+        "plot.perform_blitting()\n"
+        f"plot.save({str(tmp_path / 'test.png')!r})\n"
+        "plot.finalize()\n"
+        "print('matplotlib.pyplot' in sys.modules)\n"
+    )
+
+    output = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, check=True, text=True
+    ).stdout
+
+    assert output.strip() == "False"
+    assert (tmp_path / "test.png").exists()
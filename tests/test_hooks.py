@@ -0,0 +1,146 @@
+"""
+Tests the stage hooks and the built-in profiling hooks.
+"""
+
+import json
+import os
+import pstats
+import tracemalloc
+from pathlib import Path
+
+import h5py
+import numpy as np
+
+from pageplot.config import GlobalConfig
+from pageplot.hooks import ChromeTraceHook, CProfileHook, StageHook, TracemallocHook
+from pageplot.io.h5py import IOHDF5
+from pageplot.plotcontainer import PlotContainer
+from pageplot.plotmodel import PlotModel
+
+
+class RecordingHook(StageHook):
+    def __init__(self):
+        self.calls = []
+
+    def before_plot(self, plot):
+        self.calls.append(("before_plot", plot))
+
+    def after_plot(self, plot):
+        self.calls.append(("after_plot", plot))
+
+    def before_extension(self, plot, extension, stage):
+        self.calls.append(("before_extension", extension, stage))
+
+    def before_read(self, plot, calculate):
+        self.calls.append(("before_read", calculate))
+
+    def after_save(self, plot, filename):
+        self.calls.append(("after_save", filename))
+
+
+def test_hooks():
+    data_file = Path("test_hooks_data.hdf5")
+
+    with h5py.File(data_file, "w") as handle:
+        handle.create_dataset("XDataset", data=np.random.rand(128))
+        handle.create_dataset("YDataset", data=np.random.rand(128))
+
+    plots = {
+        name: PlotModel(
+            name=name,
+            config=GlobalConfig(),
+            plot_spec={"median_line": {"limits": ["0.0 Solar_Mass", "1.0 Solar_Mass"]}},
+            x="XDataset Solar_Mass",
+            y="YDataset kpc",
+        )
+        for name in ["test_hooks_a", "test_hooks_b"]
+    }
+
+    recording = RecordingHook()
+    hooks = [
+        recording,
+        CProfileHook(plots=["test_hooks_b"]),
+        TracemallocHook(plots=["test_hooks_b"]),
+        ChromeTraceHook(plots=["test_hooks_a"], filename="test_hooks_trace.json"),
+    ]
+
+    container = PlotContainer(
+        data=IOHDF5(filename=data_file),
+        plots=plots,
+        file_extension="svg",
+        hooks=hooks,
+    )
+    container.process()
+
+    # The mask (here, None) is read first.
+    assert recording.calls[:5] == [
+        ("before_plot", "test_hooks_a"),
+        ("before_read", None),
+        ("before_read", "XDataset Solar_Mass"),
+        ("before_read", "YDataset kpc"),
+        ("before_extension", "median_line", "preprocess"),
+    ]
+    assert ("after_save", "test_hooks_a.svg") in recording.calls
+    assert recording.calls[-1] == ("after_plot", "test_hooks_b")
+
+    # Profiles and snapshots are only written for the selected plot.
+    assert not Path("test_hooks_a.prof").exists()
+    assert pstats.Stats("test_hooks_b.prof").total_calls > 0
+    assert tracemalloc.Snapshot.load("test_hooks_b.tracemalloc") is not None
+    assert not tracemalloc.is_tracing()
+    assert list(hooks[2].peaks.keys()) == ["test_hooks_b"]
+
+    with open("test_hooks_trace.json", "r") as handle:
+        events = json.load(handle)["traceEvents"]
+
+    assert {event["args"]["plot"] for event in events} == {"test_hooks_a"}
+    assert events[0]["name"] == "plot" and events[0]["ph"] == "B"
+    assert events[-1]["name"] == "plot" and events[-1]["ph"] == "E"
+
+    for filename in [
+        data_file,
+        "test_hooks_a.svg",
+        "test_hooks_b.svg",
+        "test_hooks_b.prof",
+        "test_hooks_b.tracemalloc",
+        "test_hooks_trace.json",
+    ]:
+        os.remove(filename)
+
+
+def test_hooks_closed_by_create_figures(tmp_path):
+    data_file = tmp_path / "test_hooks_data.hdf5"
+
+    with h5py.File(data_file, "w") as handle:
+        handle.create_dataset("XDataset", data=np.random.rand(128))
+        handle.create_dataset("YDataset", data=np.random.rand(128))
+
+    class ClosingHook(StageHook):
+        closed = 0
+
+        def close(self):
+            self.closed += 1
+
+    hook = ClosingHook()
+
+    container = PlotContainer(
+        data=IOHDF5(filename=data_file),
+        plots={
+            "test": PlotModel(
+                name="test",
+                config=GlobalConfig(),
+                plot_spec={"scatter": {}},
+                x="XDataset Solar_Mass",
+                y="YDataset kpc",
+            )
+        },
+        file_extension="png",
+        output_path=tmp_path,
+        hooks=[hook],
+    )
+    container.setup_figures()
+    container.run_extensions()
+    container.create_figures()
+
+    assert hook.closed == 1
+    assert (tmp_path / "test.png").exists()
@@ -0,0 +1,118 @@
+"""
+Tests the background encoding and writing of figures.
+"""
+
+import h5py
+import numpy as np
+import pytest
+
+from pageplot.config import GlobalConfig
+from pageplot.exceptions import PagePlotWriteError
+from pageplot.imagewriter import ImageWriter
+from pageplot.io.h5py import IOHDF5
+from pageplot.plotcontainer import PlotContainer
+from pageplot.plotmodel import PlotModel
+
+
+def test_background_writes_match_savefig(tmp_path):
+    config = GlobalConfig()
+
+    # A single queued byte forces every save to wait for the previous one.
+    with ImageWriter(threads=2, max_queued_bytes=1) as writer:
+        for index in range(4):
+            fig, axes = config.create_figure()
+            axes.plot([0.0, 1.0], [0.0, float(index)])
+
+            fig.savefig(tmp_path / f"direct_{index}.png")
+            writer.save(
+                f"plot_{index}", fig, tmp_path / f"background_{index}.png", config
+            )
+
+    assert writer.failures == {}
+    assert writer.queued_bytes == 0
+
+    for index in range(4):
+        assert (tmp_path / f"direct_{index}.png").read_bytes() == (
+            tmp_path / f"background_{index}.png"
+        ).read_bytes()
+
+
+def test_write_failures_reported_per_plot(tmp_path):
+    data_file = tmp_path / "test.hdf5"
+
+    with h5py.File(data_file, "w") as handle:
+        handle.create_dataset("XDataset", data=np.random.rand(128))
+        handle.create_dataset("YDataset", data=np.random.rand(128))
+
+    plots = {
+        name: PlotModel(
+            name=name,
+            config=GlobalConfig(),
+            plot_spec={"scatter": {}},
+            x="XDataset Solar_Mass",
+            y="YDataset kpc",
+        )
+        for name in ["good", "missing/bad"]
+    }
+
+    container = PlotContainer(
+        data=IOHDF5(filename=data_file), plots=plots, output_path=tmp_path
+    )
+
+    with pytest.raises(PagePlotWriteError) as error:
+        container.process()
+
+    assert list(error.value.failures.keys()) == ["missing/bad"]
+    assert list(container.write_failures.keys()) == ["missing/bad"]
+    assert (tmp_path / "good.png").exists()
+
+
+def test_output_pipeline(tmp_path):
+    from PIL import Image
+
+    from pageplot.webpage.html import WebpageCreator
+
+    data_file = tmp_path / "test.hdf5"
+
+    with h5py.File(data_file, "w") as handle:
+        handle.create_dataset("XDataset", data=np.random.rand(128))
+        handle.create_dataset("YDataset", data=np.random.rand(128))
+
+    config = GlobalConfig(thumbnail_width=120, dpi=50)
+
+    for file_extension in ["webp", "svg"]:
+        plot = PlotModel(
+            name="test",
+            config=config,
+            plot_spec={"scatter": {}, "metadata": {"title": "Test"}},
+            x="XDataset Solar_Mass",
+            y="YDataset kpc",
+        )
+
+        container = PlotContainer(
+            data=IOHDF5(filename=data_file),
+            plots={"test": plot},
+            output_path=tmp_path,
+            file_extension=file_extension,
+        )
+        container.process()
+
+        thumbnail = (
+            "test_thumbnail.webp" if file_extension == "webp" else "test_thumbnail.png"
+        )
+
+        with Image.open(tmp_path / thumbnail) as image:
+            assert image.width == 120
+
+        if file_extension == "webp":
+            with Image.open(tmp_path / "test.webp") as image:
+                # The default figure is 6.4 inches wide.
+                assert image.width == 320
+
+        webpage = WebpageCreator()
+        webpage.add_metadata("Test")
+        webpage.add_plots(plot_container=container)
+        html = webpage.render_webpage()
+
+        assert f'<img class="lazy" data-src="{thumbnail}" loading="lazy" />' in html
+        assert f'<img data-src="test.{file_extension}" />' in html
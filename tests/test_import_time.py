@@ -0,0 +1,46 @@
+"""
+Guards against regressions in the import time of the library; heavy
+dependencies must only be imported once they are used.
+"""
+
+import subprocess
+import sys
+
+
+def run_in_fresh_interpreter(code: str) -> str:
+    return subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, check=True, text=True
+    ).stdout
+
+
+def test_heavy_imports_deferred():
+    output = run_in_fresh_interpreter(
+        "import sys\n"
+        "import pageplot.runner\n"
+        "from pageplot.config import GlobalConfig\n"
+        "GlobalConfig().run_extensions()\n"
+        "heavy = ['velociraptor', 'jinja2', 'matplotlib.pyplot', 'h5py']\n"
+        "print(','.join(m for m in heavy if m in sys.modules))\n"
+    )
+
+    assert output.strip() == ""
+
+
+def test_import_time():
+    # Compare against unyt, which is the minimal (unavoidable) dependency.
+    timing = (
+        "import time\n"
+        "start = time.perf_counter()\n"
+        "import {module}\n"
+        "print(time.perf_counter() - start)\n"
+    )
+
+    baseline = min(
+        float(run_in_fresh_interpreter(timing.format(module="unyt"))) for _ in range(3)
+    )
+    pageplot = min(
+        float(run_in_fresh_interpreter(timing.format(module="pageplot.runner")))
+        for _ in range(3)
+    )
+
+    assert pageplot - baseline < 0.5
@@ -0,0 +1,80 @@
+"""
+Tests the per-stage timing and I/O accounting.
+"""
+
+import json
+import os
+from pathlib import Path
+
+import h5py
+import numpy as np
+
+from pageplot.config import GlobalConfig
+from pageplot.io.h5py import IOHDF5
+from pageplot.plotcontainer import PlotContainer
+from pageplot.plotmodel import PlotModel
+from pageplot.webpage.html import WebpageCreator
+
+
+def test_instrumentation_report():
+    data_file = Path("test_instrumentation_data.hdf5")
+    report_file = Path("test_instrumentation_report.json")
+
+    with h5py.File(data_file, "w") as handle:
+        handle.create_dataset("XDataset", data=np.random.rand(1024))
+        handle.create_dataset("YDataset", data=np.random.rand(1024))
+
+    plot = PlotModel(
+        name="test_instrumentation",
+        config=GlobalConfig(),
+        plot_spec={
+            "median_line": {"limits": ["0.0 Solar_Mass", "1.0 Solar_Mass"]},
+            "metadata": {"title": "Test", "section": "Tests"},
+        },
+        x="XDataset Solar_Mass",
+        y="YDataset kpc",
+        mask="XDataset Solar_Mass > 0.5 Solar_Mass",
+    )
+
+    container = PlotContainer(
+        data=IOHDF5(filename=data_file), plots={plot.name: plot}, file_extension="svg"
+    )
+    container.process()
+
+    records = container.instrumentation.records
+    stages = {record.stage for record in records}
+
+    for expected in ["associate_data", "get_mask", "preprocess", "blit", "save"]:
+        assert expected in stages
+
+    reads = [record for record in records if record.stage == "calculation_from_string"]
+    assert [record.detail for record in reads] == [
+        "XDataset Solar_Mass",
+        "YDataset kpc",
+    ]
+    # Masked to roughly half of the data.
+    assert 0 < reads[1].bytes_allocated < 1024 * 8
+
+    mask_record = next(record for record in records if record.stage == "get_mask")
+    assert mask_record.bytes_read == {str(data_file): 1024 * 8}
+
+    container.instrumentation.write_report(report_file)
+
+    with open(report_file, "r") as handle:
+        report = json.load(handle)
+
+    summary = report["plots"][0]
+    assert summary["name"] == plot.name
+    assert summary["bytes_read"] == 2 * 1024 * 8
+    assert report["bytes_read"] == {str(data_file): 2 * 1024 * 8}
+
+    webpage = WebpageCreator()
+    webpage.add_metadata("Test")
+    webpage.add_plots(plot_container=container)
+    webpage.add_timings(instrumentation=container.instrumentation)
+
+    assert plot.name in webpage.render_webpage().split("Slowest Plots")[1]
+
+    os.remove(data_file)
+    os.remove(report_file)
+    os.remove(f"{plot.name}.svg")
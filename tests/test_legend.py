@@ -0,0 +1,65 @@
+"""
+Tests for the placement of the legend.
+"""
+
+import numpy as np
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+from matplotlib.legend import Legend
+
+from pageplot.config import GlobalConfig
+from pageplot.extensions.legend import LegendExtension, set_location
+
+
+def test_best_location_avoids_data():
+    rng = np.random.default_rng(0)
+
+    for centre, expected in [((0.8, 0.8), "upper left"), ((0.2, 0.8), "upper right")]:
+        fig = Figure()
+        FigureCanvasAgg(fig)
+        axes = fig.add_subplot()
+
+        axes.scatter(*rng.normal(centre, 0.1, (100000, 2)).T, label="Points")
+        axes.plot([0.0, 1.0], [0.5, 0.5], label="Line")
+        axes.set_xlim(0.0, 1.0)
+        axes.set_ylim(0.0, 1.0)
+
+        LegendExtension(
+            name="legend", config=GlobalConfig(), metadata=None, x=None
+        ).blit(fig=fig, axes=axes)
+
+        # A fixed location is given to matplotlib, rather than "best".
+        assert axes.get_legend()._get_loc() == Legend.codes[expected]
+
+
+def test_best_location_after_autoscaling():
+    rng = np.random.default_rng(0)
+
+    fig = Figure()
+    FigureCanvasAgg(fig)
+    axes = fig.add_subplot()
+
+    # Without axes limits, the view only covers the data once autoscaled.
+    points = np.concatenate(
+        [rng.normal(9.0, 0.5, (100000, 2)), rng.uniform(0.0, 10.0, (100, 2))]
+    )
+    axes.scatter(*points.T, label="Points")
+
+    LegendExtension(name="legend", config=GlobalConfig(), metadata=None, x=None).blit(
+        fig=fig, axes=axes
+    )
+
+    assert axes.get_legend()._get_loc() == Legend.codes["upper left"]
+
+
+def test_set_location_without_set_loc(monkeypatch):
+    fig = Figure()
+    axes = fig.add_subplot()
+    axes.plot([0.0, 1.0], [0.0, 1.0], label="Line")
+    legend = axes.legend(loc="upper right")
+
+    # Older versions of matplotlib have no Legend.set_loc.
+    monkeypatch.delattr(Legend, "set_loc", raising=False)
+    set_location(legend, "lower left")
+
+    assert legend._get_loc() == Legend.codes["lower left"]
@@ -0,0 +1,122 @@
+"""
+Tests for the native mass functions.
+"""
+
+import numpy as np
+import pytest
+import unyt
+
+from pageplot.config import GlobalConfig
+from pageplot.extensions.mass_function import (
+    MassFunctionCounts,
+    MassFunctionExtension,
+    adaptive_mass_function,
+    fixed_mass_function,
+)
+
+
+def make_masses(rows: int, dtype=np.float64, seed: int = 0) -> unyt.unyt_array:
+    rng = np.random.default_rng(seed)
+
+    return unyt.unyt_array(
+        (10.0 ** rng.normal(0.0, 1.0, rows)).astype(dtype), "Solar_Mass", name="Mass"
+    )
+
+
+@pytest.mark.parametrize("dtype", [np.float64, np.float32])
+@pytest.mark.parametrize("rows", [0, 1, 4, 1000])
+def test_matches_velociraptor(dtype, rows):
+    mass_functions = pytest.importorskip("velociraptor.tools.mass_functions")
+
+    masses = make_masses(rows, dtype)
+    lowest_mass = unyt.unyt_quantity(1e-2, "Solar_Mass")
+    highest_mass = unyt.unyt_quantity(1e2, "Solar_Mass")
+    box_volume = unyt.unyt_quantity(12.0, "Mpc**3")
+
+    common = dict(
+        masses=masses,
+        box_volume=box_volume,
+        minimum_in_bin=3,
+        return_bin_edges=True,
+    )
+
+    expected = {
+        True: mass_functions.create_adaptive_mass_function(
+            lowest_mass=lowest_mass.copy(),
+            highest_mass=highest_mass.copy(),
+            base_n_bins=20,
+            **common,
+        ),
+        False: mass_functions.create_mass_function(
+            lowest_mass=lowest_mass.copy(),
+            highest_mass=highest_mass.copy(),
+            n_bins=20,
+            **common,
+        ),
+    }
+
+    for adaptive in [True, False]:
+        counts = MassFunctionCounts.from_masses(
+            masses.value, 1e-2, 1e2, bins=20, keep_masses=adaptive
+        )
+
+        if adaptive:
+            result = adaptive_mass_function(
+                counts, 12.0, base_n_bins=20, minimum_in_bin=3
+            )
+        else:
+            result = fixed_mass_function(counts, 12.0, minimum_in_bin=3)
+
+        for reference, value in zip(expected[adaptive], result):
+            assert np.array_equal(reference.value, value)
+
+
+def test_merged_counts():
+    masses = make_masses(10000).value
+    parts = np.array_split(masses, 7)
+
+    full = MassFunctionCounts.from_masses(masses, 1e-2, 1e2, bins=25)
+    merged = sum(
+        (
+            MassFunctionCounts.from_masses(part, 1e-2, 1e2, bins=25)
+            for part in parts[1:]
+        ),
+        MassFunctionCounts.from_masses(parts[0], 1e-2, 1e2, bins=25),
+    )
+
+    assert (merged.counts == full.counts).all()
+    assert (merged.sorted_masses == full.sorted_masses).all()
+
+    for expected, value in zip(
+        adaptive_mass_function(full, 1.0), adaptive_mass_function(merged, 1.0)
+    ):
+        assert np.array_equal(expected, value)
+
+    with pytest.raises(ValueError):
+        full + MassFunctionCounts.from_masses(masses, 1e-2, 1e2, bins=10)
+
+
+def test_extension():
+    extension = MassFunctionExtension(
+        name="mass_function",
+        config=GlobalConfig(),
+        metadata=None,
+        x=make_masses(1000),
+        y=None,
+        x_units=unyt.unyt_quantity(1.0, "Solar_Mass"),
+        y_units=unyt.unyt_quantity(1.0, "Gpc**-3"),
+        limits=["1e-2 Solar_Mass", "1e2 Solar_Mass"],
+        box_volume="1 Mpc**3",
+    )
+    extension.preprocess()
+
+    assert extension.centers.name == "Mass"
+    assert extension.edges.shape == (2, len(extension.centers))
+    assert extension.values.units == unyt.Unit("Gpc**-3")
+
+    # Adaptive bins hold every mass within the limits.
+    masses = extension.x.value
+    widths = np.diff(np.log10(extension.edges.value), axis=0)[0]
+    number = (extension.values.to("Mpc**-3").value * widths).sum()
+
+    assert np.isclose(number, ((masses >= 1e-2) & (masses <= 1e2)).sum())
@@ -0,0 +1,77 @@
+"""
+Tests the entry-point based plugin registry.
+"""
+
+import shutil
+import sys
+from importlib.metadata import EntryPoint
+from pathlib import Path
+
+import pageplot.plugins as plugins
+
+
+def clear_caches():
+    for function in [
+        plugins.discover_plugins,
+        plugins.plot_extension_registry,
+        plugins.config_extension_registry,
+        plugins.io_registry,
+    ]:
+        function.cache_clear()
+
+
+def test_plugin_registry(monkeypatch):
+    cache_path = Path("test_plugin_cache")
+    monkeypatch.setenv("PAGEPLOT_CACHE_DIR", str(cache_path))
+
+    scanned = []
+
+    def fake_entry_points_in_group(group):
+        scanned.append(group)
+
+        if group == plugins.PLOT_EXTENSION_GROUP:
+            return [
+                EntryPoint(
+                    name="my_scatter",
+                    value="pageplot.extensions.scatter:ScatterExtension",
+                    group=group,
+                ),
+                # Built in names can not be overwritten.
+                EntryPoint(name="legend", value="not.a.module:Legend", group=group),
+            ]
+
+        return []
+
+    monkeypatch.setattr(plugins, "entry_points_in_group", fake_entry_points_in_group)
+    clear_caches()
+
+    registry = plugins.plot_extension_registry()
+
+    # Plugins come before the built in extensions.
+    assert list(registry)[0] == "my_scatter"
+    assert (
+        registry.locations["legend"] == plugins.built_in_extensions.locations["legend"]
+    )
+    assert registry["my_scatter"].__name__ == "ScatterExtension"
+    assert "hdf5" in plugins.io_registry()
+
+    # Second time around the scan is read from the on-disk cache.
+    number_of_scans = len(scanned)
+    clear_caches()
+    plugins.plot_extension_registry()
+
+    assert len(scanned) == number_of_scans
+
+    clear_caches()
+    shutil.rmtree(cache_path)
+
+
+def test_registry_is_lazy():
+    registry = plugins.LazyExtensionRegistry(
+        {"missing": "pageplot.this_module_does_not_exist:Extension"}
+    )
+
+    # Listing and membership must not import anything.
+    assert "missing" in registry
+    assert list(registry) == ["missing"]
+    assert "pageplot.this_module_does_not_exist" not in sys.modules
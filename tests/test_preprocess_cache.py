@@ -0,0 +1,151 @@
+"""
+Tests the on-disk cache of extension pre-processing results.
+"""
+
+import os
+import shutil
+from pathlib import Path
+
+import h5py
+import numpy as np
+
+from pageplot.config import GlobalConfig
+from pageplot.io.h5py import IOHDF5
+from pageplot.plotmodel import PlotModel
+
+
+def make_plot(config, data, limits_x):
+    plot = PlotModel(
+        name="test",
+        config=config,
+        plot_spec={
+            "median_line": {
+                "limits": ["0.0 Solar_Mass", "1.0 Solar_Mass"],
+                "bins": 8,
+            },
+            "axes_limits": {"limits_x": limits_x},
+            "legend": {},
+        },
+        x="XDataset Solar_Mass",
+        y="YDataset kpc",
+    )
+
+    plot.associate_data(data=data)
+    plot.run_extensions()
+
+    return plot
+
+
+def test_preprocess_cache():
+    data_file = Path("test_cache.hdf5")
+    cache_path = Path("test_preprocess_cache")
+
+    with h5py.File(data_file, "w") as handle:
+        handle.create_dataset("XDataset", data=np.random.rand(128))
+        handle.create_dataset("YDataset", data=np.random.rand(128))
+
+    data = IOHDF5(filename=data_file)
+    config = GlobalConfig(preprocess_cache_path=cache_path)
+
+    first = make_plot(config, data, ["0.0 Solar_Mass", "1.0 Solar_Mass"])
+
+    assert len(list(cache_path.glob("*.npz"))) == 1
+
+    # Only the axes limits have changed, so no data should need to be read.
+    def fail(*args, **kwargs):
+        raise AssertionError("Data read despite cached pre-processing.")
+
+    data.calculation_from_string = fail
+
+    second = make_plot(config, data, ["0.1 Solar_Mass", "0.9 Solar_Mass"])
+
+    for name in ["edges", "centers", "values", "errors"]:
+        first_value = getattr(first.extensions["median_line"], name)
+        second_value = getattr(second.extensions["median_line"], name)
+
+        assert first_value.units == second_value.units
+        assert np.allclose(first_value.d, second_value.d)
+
+    assert second.extensions["median_line"].x is None
+
+    os.remove(data_file)
+    shutil.rmtree(cache_path)
+
+
+def test_blit_after_restore(tmp_path):
+    data_file = tmp_path / "test_cache.hdf5"
+
+    with h5py.File(data_file, "w") as handle:
+        handle.create_dataset("XDataset", data=np.random.rand(128))
+        handle.create_dataset("YDataset", data=np.random.rand(128))
+
+    data = IOHDF5(filename=data_file)
+    config = GlobalConfig(preprocess_cache_path=tmp_path / "cache")
+
+    def run():
+        plot = PlotModel(
+            name="test",
+            config=config,
+            plot_spec={
+                "two_dimensional_histogram": {
+                    "limits_x": ["0.0 Solar_Mass", "1.0 Solar_Mass"],
+                    "limits_y": ["0.0 kpc", "1.0 kpc"],
+                    "bins": 8,
+                },
+            },
+            x="XDataset Solar_Mass",
+            y="YDataset kpc",
+        )
+
+        plot.associate_data(data=data)
+        plot.setup_figures()
+        plot.run_extensions()
+        plot.perform_blitting()
+
+        return plot
+
+    first = run()
+    second = run()
+
+    # The second figure is drawn from the restored histogram alone.
+    assert second.extensions["two_dimensional_histogram"].y is None
+    assert np.array_equal(
+        first.axes.images[0].get_array(), second.axes.images[0].get_array()
+    )
+
+
+def test_scatter_after_restore(tmp_path):
+    data_file = tmp_path / "test_cache.hdf5"
+
+    with h5py.File(data_file, "w") as handle:
+        handle.create_dataset("XDataset", data=np.random.rand(1024))
+        handle.create_dataset("YDataset", data=np.random.rand(1024))
+
+    data = IOHDF5(filename=data_file)
+    config = GlobalConfig(preprocess_cache_path=tmp_path / "cache")
+
+    def run(max_points):
+        plot = PlotModel(
+            name="test",
+            config=config,
+            plot_spec={"scatter": {"max_points": max_points}},
+            x="XDataset Solar_Mass",
+            y="YDataset kpc",
+        )
+
+        plot.associate_data(data=data)
+        plot.setup_figures()
+        plot.run_extensions()
+        plot.perform_blitting()
+
+        return plot.axes.collections[0].get_offsets()
+
+    for max_points in [None, 100]:
+        first = run(max_points)
+        second = run(max_points)
+
+        # The subsample is restored, but the points are still drawn.
+        assert len(second) == (1024 if max_points is None else 100)
+        assert np.array_equal(first, second)
+
+    assert len(list((tmp_path / "cache").glob("*.npz"))) == 2
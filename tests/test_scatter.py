@@ -0,0 +1,113 @@
+"""
+Tests for the raster display mode and subsampling of the scatter extension.
+"""
+
+import numpy as np
+import unyt
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.collections import PathCollection
+from matplotlib.figure import Figure
+
+from pageplot.config import GlobalConfig
+from pageplot.extensions.scatter import (
+    ScatterDensityImage,
+    ScatterExtension,
+    pixel_counts,
+    stratified_sample,
+    water_fill,
+)
+
+
+def make_extension(rows: int, **kwargs) -> ScatterExtension:
+    rng = np.random.default_rng(0)
+
+    return ScatterExtension(
+        name="scatter",
+        config=GlobalConfig(),
+        metadata=None,
+        x=unyt.unyt_array(rng.random(rows), "Solar_Mass"),
+        y=unyt.unyt_array(rng.random(rows), "kpc"),
+        x_units=unyt.unyt_quantity(1.0, "Solar_Mass"),
+        y_units=unyt.unyt_quantity(1.0, "kpc"),
+        **kwargs,
+    )
+
+
+def draw(extension: ScatterExtension):
+    fig = Figure(figsize=(2, 2), dpi=50)
+    FigureCanvasAgg(fig)
+    axes = fig.add_subplot()
+
+    extension.blit(fig=fig, axes=axes)
+    fig.canvas.draw()
+
+    return axes
+
+
+def test_pixel_counts():
+    x = np.array([0.0, 0.1, 0.6, 0.99, 1.0, -0.1])
+    y = np.array([0.0, 0.2, 0.9, 0.99, 0.5, 0.5])
+
+    counts = pixel_counts(x, y, width=2, height=2)
+
+    assert counts.tolist() == [[2, 0], [0, 2]]
+
+
+def test_raster_mode():
+    axes = draw(make_extension(1000, display_as="raster"))
+
+    images = [image for image in axes.images if isinstance(image, ScatterDensityImage)]
+
+    assert len(images) == 1
+    assert not any(isinstance(c, PathCollection) for c in axes.collections)
+    assert images[0].get_array().sum() == 1000
+
+    # The limits are still set from the data.
+    assert axes.get_xlim()[0] <= 0.0 + 0.1 and axes.get_xlim()[1] >= 1.0 - 0.1
+
+
+def test_auto_threshold():
+    axes = draw(make_extension(100, raster_threshold=1000))
+    assert len(axes.images) == 0 and len(axes.collections) == 1
+
+    axes = draw(make_extension(2000, raster_threshold=1000))
+    assert len(axes.images) == 1 and len(axes.collections) == 0
+
+
+def test_water_fill():
+    rng = np.random.default_rng(0)
+    counts = np.array([1, 2, 50, 100, 0])
+
+    quotas = water_fill(counts, 33, rng)
+
+    assert quotas.sum() == 33
+    assert (quotas <= counts).all()
+    # Sparse cells are kept entirely, dense cells share the rest.
+    assert quotas[:2].tolist() == [1, 2]
+    assert abs(int(quotas[2]) - int(quotas[3])) <= 1
+
+
+def test_stratified_sample_keeps_outliers():
+    rng = np.random.default_rng(1)
+
+    # A dense core, and a handful of outliers far out in the tail.
+    x = np.concatenate([10.0 ** rng.normal(10.0, 0.3, 100_000), [1e15, 2e15, 3e15]])
+    y = np.concatenate([rng.normal(0.0, 1.0, 100_000), [0.0, 1.0, 2.0]])
+
+    selected = stratified_sample(x, y, max_points=1000, spacing_x="log")
+
+    assert len(selected) == 1000
+    assert {100_000, 100_001, 100_002} <= set(selected.tolist())
+    assert (np.diff(selected) > 0).all()
+
+    # Reproducible.
+    assert (selected == stratified_sample(x, y, 1000, spacing_x="log")).all()
+
+
+def test_max_points():
+    extension = make_extension(5000, max_points=100, display_as="points")
+    extension.preprocess()
+
+    axes = draw(extension)
+
+    assert len(axes.collections[0].get_offsets()) == 100
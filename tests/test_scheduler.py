@@ -0,0 +1,122 @@
+"""
+Tests the memory-budgeted column cache and plot scheduler.
+"""
+
+import os
+from pathlib import Path
+
+import h5py
+import numpy as np
+
+from pageplot.config import GlobalConfig
+from pageplot.io.columncache import ColumnCache
+from pageplot.io.h5py import IOHDF5
+from pageplot.plotmodel import PlotModel
+from pageplot.scheduler import PlotScheduler, cluster_plots, plot_columns
+
+
+def make_plot(name, x, y, mask=None):
+    return PlotModel(
+        name=name,
+        config=GlobalConfig(),
+        plot_spec={
+            "median_line": {"limits": ["0.0 Solar_Mass", "1.0 Solar_Mass"]},
+        },
+        x=x,
+        y=y,
+        mask=mask,
+    )
+
+
+def test_column_cache_and_scheduler():
+    data_file = Path("test_scheduler_data.hdf5")
+
+    with h5py.File(data_file, "w") as handle:
+        handle.create_dataset("Small", data=np.random.rand(128))
+        handle.create_dataset("Large", data=np.random.rand(1024))
+        handle.create_dataset("Other", data=np.random.rand(1024))
+
+    data = ColumnCache(data=IOHDF5(filename=data_file), memory_budget=34000)
+
+    assert data.estimate_size("Small Solar_Mass") == 128 * 8
+    assert data.estimate_size("Large Solar_Mass") == 1024 * 8
+    assert data.estimate_size("Large[:10] Solar_Mass") == 10 * 8
+
+    plots = {
+        "large": make_plot("large", "Large Solar_Mass", "Other kpc"),
+        "small": make_plot(
+            "small",
+            "Small Solar_Mass",
+            "Small kpc",
+            mask="Small Solar_Mass > 0.5 Solar_Mass",
+        ),
+    }
+
+    assert plot_columns(plots["small"]) == {"Small Solar_Mass", "Small kpc"}
+
+    scheduler = PlotScheduler(data=data, memory_budget=data.memory_budget)
+
+    assert scheduler.order(plots) == ["small", "large"]
+
+    for name in scheduler.order(plots):
+        plot = plots[name]
+        scheduler.throttle(name, plot)
+        plot.associate_data(data=data)
+        plot.run_extensions()
+        plot.release()
+        scheduler.release(name)
+
+        assert data.resident_bytes <= data.memory_budget
+
+    # The mask and x-axis of the small plot share a single read, and its
+    # columns are evicted once it is complete.
+    assert data.misses == 4
+    assert data.hits == 1
+    assert "Small Solar_Mass" not in data.columns
+
+    report = scheduler.report()
+    assert report.requests == 5
+    assert report.expected_hit_rate == report.achieved_hit_rate == 0.2
+    assert plots["small"].extensions["median_line"].values is not None
+    assert plots["small"].extensions["median_line"].x is None
+
+    os.remove(data_file)
+
+
+def test_locality_order():
+    columns = {
+        "temperature_density": {"Temperature", "Density"},
+        "masses": {"Masses"},
+        "temperature_masses": {"Temperature", "Masses"},
+        "velocities": {"Velocities"},
+        "density": {"Density"},
+    }
+
+    assert cluster_plots(columns) == [
+        ["temperature_density", "masses", "temperature_masses", "density"],
+        ["velocities"],
+    ]
+
+    plots = {
+        name: make_plot(
+            name,
+            " * ".join(f"{{{column} K}}" for column in sorted(required)),
+            None,
+        )
+        for name, required in columns.items()
+    }
+
+    data = ColumnCache(data=IOHDF5(filename=Path("test_missing_data.hdf5")))
+    scheduler = PlotScheduler(data=data)
+
+    # Density is last needed by density, which is run next so that it can
+    # be evicted, before moving on to temperature and masses.
+    assert scheduler.order(plots) == [
+        "temperature_density",
+        "density",
+        "temperature_masses",
+        "masses",
+        "velocities",
+    ]
+    assert scheduler.last_consumers["Temperature K"] == "temperature_masses"
+    assert scheduler.report().expected_hits == 3
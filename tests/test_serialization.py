@@ -0,0 +1,105 @@
+"""
+Tests the structured HDF5 serialization of plot data.
+"""
+
+import os
+from pathlib import Path
+
+import h5py
+import numpy as np
+import unyt
+
+from pageplot.config import GlobalConfig
+from pageplot.io.h5py import IOHDF5
+from pageplot.plotmodel import PlotModel
+from pageplot.serialization import SerializedData, SerializedDataWriter
+
+
+def assert_arrays_equal(a, b):
+    assert a.units == b.units
+    assert a.name == b.name
+    assert np.allclose(a.d, b.d)
+
+
+def test_serialization_round_trip():
+    data_file = Path("test_serialization_data.hdf5")
+    output_file = Path("test_serialization_output.hdf5")
+
+    with h5py.File(data_file, "w") as handle:
+        handle.create_dataset("XDataset", data=np.random.rand(128))
+        handle.create_dataset("YDataset", data=np.random.rand(128))
+
+    data = IOHDF5(filename=data_file)
+    config = GlobalConfig()
+
+    plots = {
+        "lines": PlotModel(
+            name="lines",
+            config=config,
+            plot_spec={
+                "median_line": {
+                    "limits": ["0.0 Solar_Mass", "1.0 Solar_Mass"],
+                    "percentiles": [16, 84],
+                },
+                "two_dimensional_histogram": {
+                    "limits_x": ["0.0 Solar_Mass", "1.0 Solar_Mass"],
+                    "limits_y": ["0.0 kpc", "1.0 kpc"],
+                },
+                "metadata": {"title": "Test", "section": "Tests"},
+            },
+            x="XDataset Solar_Mass",
+            y="YDataset kpc",
+        ),
+        "mass_function": PlotModel(
+            name="mass_function",
+            config=config,
+            plot_spec={
+                "mass_function": {
+                    "limits": ["0.01 Solar_Mass", "1.0 Solar_Mass"],
+                    "box_volume": "12 Mpc**3",
+                },
+                "legend": {},
+            },
+            x="XDataset Solar_Mass",
+            y_units="Mpc**-3",
+        ),
+    }
+
+    with SerializedDataWriter(filename=output_file) as writer:
+        for name, plot in plots.items():
+            plot.associate_data(data=data)
+            plot.run_extensions()
+            writer.write_plot(name, plot.serialize())
+
+    with SerializedData(filename=output_file, memory_map=True) as serialized:
+        assert set(serialized.keys()) == set(plots.keys())
+
+        original = plots["lines"].serialize()
+        read = serialized["lines"]
+
+        assert read["metadata"] == original["metadata"]
+        assert read["median_line"]["metadata"]["percentiles"] == [16.0, 84.0]
+
+        for key in ["centers", "values", "errors", "edges"]:
+            assert_arrays_equal(read["median_line"][key], original["median_line"][key])
+
+        for key in ["x_edges", "y_edges", "grid"]:
+            assert_arrays_equal(
+                read["two_dimensional_histogram"][key],
+                original["two_dimensional_histogram"][key],
+            )
+
+        # Reading single items, without loading the rest of the plot.
+        original = plots["mass_function"].serialize()
+
+        assert_arrays_equal(
+            serialized.read("mass_function", "mass_function", "values"),
+            original["mass_function"]["values"],
+        )
+        assert serialized.read("mass_function", "mass_function", "metadata")[
+            "box_volume"
+        ] == unyt.unyt_quantity(12, "Mpc**3")
+        assert serialized.read("mass_function", "legend") is None
+
+    os.remove(data_file)
+    os.remove(output_file)
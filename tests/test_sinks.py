@@ -0,0 +1,150 @@
+"""
+Tests writing the output of a run as a single bundle.
+"""
+
+import json
+import zipfile
+
+import h5py
+import numpy as np
+import pytest
+
+from pageplot.io.h5py import IOHDF5
+from pageplot.runner import PagePlotRunner
+from pageplot.serialization import SerializedData
+from pageplot.sinks import BundleSink, bundle_request_handler, unpack_bundle
+
+
+def test_bundle_sink_threads(tmp_path):
+    from concurrent.futures import ThreadPoolExecutor
+
+    with BundleSink(tmp_path / "test.zip") as sink:
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            for index in range(64):
+                executor.submit(sink.write, f"file_{index}.txt", b"x" * index)
+
+    with zipfile.ZipFile(tmp_path / "test.zip") as archive:
+        assert len(archive.namelist()) == 64
+        assert archive.read("file_10.txt") == b"x" * 10
+        assert {info.compress_type for info in archive.infolist()} == {
+            zipfile.ZIP_STORED
+        }
+
+
+def test_bundled_run(tmp_path):
+    data_file = tmp_path / "test.hdf5"
+
+    with h5py.File(data_file, "w") as handle:
+        handle.create_dataset("XDataset", data=np.random.rand(128))
+        handle.create_dataset("YDataset", data=np.random.rand(128))
+
+    config_file = tmp_path / "config.json"
+    plot_file = tmp_path / "plots.json"
+
+    with open(config_file, "w") as handle:
+        json.dump({"thumbnail_width": 100}, handle)
+
+    with open(plot_file, "w") as handle:
+        json.dump(
+            {
+                name: {
+                    "x": "XDataset Solar_Mass",
+                    "y": "YDataset kpc",
+                    "scatter": {},
+                    "metadata": {"title": name, "section": "Tests"},
+                }
+                for name in ["first", "second"]
+            },
+            handle,
+        )
+
+    with PagePlotRunner(
+        config_filename=config_file,
+        data=IOHDF5(filename=data_file),
+        plot_filenames=[plot_file],
+        output_path=tmp_path,
+        bundle="output.zip",
+    ) as runner:
+        runner.create_figures(serialized_data_filename="data.hdf5")
+        runner.create_webpage()
+        runner.write_report()
+
+    # Nothing but the bundle is written.
+    assert sorted(path.name for path in tmp_path.iterdir()) == sorted(
+        ["test.hdf5", "config.json", "plots.json", "output.zip"]
+    )
+
+    names = unpack_bundle(tmp_path / "output.zip", tmp_path / "unpacked")
+
+    for name in [
+        "first.png",
+        "first_thumbnail.png",
+        "second.png",
+        "data.hdf5",
+        "index.html",
+        "index.json",
+        "mathjax.js",
+        "report.json",
+    ]:
+        assert name in names
+
+    with open(tmp_path / "unpacked" / "first.png", "rb") as handle:
+        assert handle.read(8) == b"\x89PNG\r\n\x1a\n"
+
+    serialized = SerializedData(filename=tmp_path / "unpacked" / "data.hdf5")
+    assert sorted(serialized.keys()) == ["first", "second"]
+
+
+def test_serve_bundle(tmp_path):
+    import threading
+    from http.server import HTTPServer
+    from urllib.error import HTTPError
+    from urllib.request import urlopen
+
+    data_file = tmp_path / "test.hdf5"
+
+    with h5py.File(data_file, "w") as handle:
+        handle.create_dataset("XDataset", data=np.random.rand(128))
+        handle.create_dataset("YDataset", data=np.random.rand(128))
+
+    with open(tmp_path / "config.json", "w") as handle:
+        json.dump({}, handle)
+
+    with open(tmp_path / "plots.json", "w") as handle:
+        json.dump(
+            {"stellar mass": {"x": "XDataset Solar_Mass", "y": "YDataset kpc"}},
+            handle,
+        )
+
+    with PagePlotRunner(
+        config_filename=tmp_path / "config.json",
+        data=IOHDF5(filename=data_file),
+        plot_filenames=[tmp_path / "plots.json"],
+        output_path=tmp_path,
+        bundle="output.zip",
+    ) as runner:
+        runner.create_figures()
+        runner.create_webpage()
+
+    with zipfile.ZipFile(tmp_path / "output.zip") as archive:
+        handler = bundle_request_handler(archive, tmp_path / "output.zip")
+
+        with HTTPServer(("localhost", 0), handler) as server:
+            thread = threading.Thread(target=server.serve_forever)
+            thread.start()
+
+            url = f"http://localhost:{server.server_address[1]}"
+
+            try:
+                # Names are percent-encoded by browsers.
+                with urlopen(f"{url}/stellar%20mass.png?v=1") as response:
+                    assert response.read(8) == b"\x89PNG\r\n\x1a\n"
+
+                with urlopen(f"{url}/") as response:
+                    assert response.headers["Content-Type"] == "text/html"
+
+                with pytest.raises(HTTPError):
+                    urlopen(f"{url}/missing.png")
+            finally:
+                server.shutdown()
+                thread.join()
@@ -0,0 +1,141 @@
+"""
+Tests running the same plots over many snapshots.
+"""
+
+import json
+
+import h5py
+import numpy as np
+
+from pageplot.io.h5py import IOHDF5
+from pageplot.sweep import (
+    PagePlotSweep,
+    expand_data_filenames,
+    snapshot_names,
+    worker_state,
+)
+
+
+def write_inputs(tmp_path, snapshots: int):
+    for index in range(snapshots):
+        with h5py.File(tmp_path / f"snap_{index:04d}.hdf5", "w") as handle:
+            handle.create_dataset("XDataset", data=np.random.rand(128))
+            handle.create_dataset("YDataset", data=np.random.rand(128))
+
+    with open(tmp_path / "config.json", "w") as handle:
+        json.dump({}, handle)
+
+    with open(tmp_path / "plots.json", "w") as handle:
+        json.dump(
+            {
+                name: {
+                    "x": "XDataset Solar_Mass",
+                    "y": "YDataset kpc",
+                    "scatter": {},
+                    "metadata": {"title": name, "section": "Tests"},
+                }
+                for name in ["first", "second"]
+            },
+            handle,
+        )
+
+
+def test_snapshot_names(tmp_path):
+    write_inputs(tmp_path, snapshots=3)
+
+    filenames = expand_data_filenames(str(tmp_path / "snap_*.hdf5"))
+
+    assert snapshot_names(filenames) == ["snap_0000", "snap_0001", "snap_0002"]
+    assert snapshot_names([tmp_path / "a/snap.hdf5", tmp_path / "b/snap.hdf5"]) == [
+        "0000_snap",
+        "0001_snap",
+    ]
+
+
+def test_sweep(tmp_path):
+    write_inputs(tmp_path, snapshots=5)
+
+    sweep = PagePlotSweep(
+        config_filename=tmp_path / "config.json",
+        data_filenames=str(tmp_path / "snap_*.hdf5"),
+        io="hdf5",
+        plot_filenames=[tmp_path / "plots.json"],
+        output_path=tmp_path / "output",
+        workers=2,
+    )
+
+    assert sweep.io is IOHDF5
+
+    results = sweep.run()
+
+    assert [result["error"] for result in results] == [None] * 5
+    assert [result["name"] for result in results] == list(sweep.snapshots())
+
+    # The workers are re-used across snapshots.
+    assert len({result["process"] for result in results}) <= 2
+
+    for name in sweep.snapshots():
+        for filename in ["first.png", "second.png", "index.html", "report.json"]:
+            assert (tmp_path / "output" / name / filename).exists()
+
+    with open(tmp_path / "output" / "index.json", "r") as handle:
+        index = json.load(handle)
+
+    assert [x["page"] for x in index["snapshots"]] == [
+        f"snap_{index:04d}/index.html" for index in range(5)
+    ]
+
+    with open(tmp_path / "output" / "index.html", "r") as handle:
+        page = handle.read()
+
+    assert 'href="snap_0004/index.html"' in page
+
+    # Specifications are shared, not consumed, by the snapshots.
+    assert sweep.plot_specifications["first"]["x"] == "XDataset Solar_Mass"
+
+
+def test_sweep_failures(tmp_path):
+    write_inputs(tmp_path, snapshots=2)
+
+    with h5py.File(tmp_path / "snap_0001.hdf5", "w") as handle:
+        handle.create_dataset("XDataset", data=np.random.rand(128))
+
+    results = PagePlotSweep(
+        config_filename=tmp_path / "config.json",
+        data_filenames=[tmp_path / "snap_0000.hdf5", tmp_path / "snap_0001.hdf5"],
+        io=IOHDF5,
+        plot_filenames=[tmp_path / "plots.json"],
+        output_path=tmp_path / "output",
+        workers=0,
+    ).run()
+
+    assert results[0]["error"] is None
+    assert "YDataset" in results[1]["error"]
+
+    with open(tmp_path / "output" / "index.html", "r") as handle:
+        assert "snap_0001" in handle.read()
+
+
+def test_sweeps_in_process(tmp_path):
+    write_inputs(tmp_path, snapshots=1)
+
+    with open(tmp_path / "thumbnails.json", "w") as handle:
+        json.dump({"thumbnail_width": 100}, handle)
+
+    # Each sweep uses its own configuration, even in the same process.
+    for config, thumbnails in [("thumbnails", True), ("config", False)]:
+        results = PagePlotSweep(
+            config_filename=tmp_path / f"{config}.json",
+            data_filenames=[tmp_path / "snap_0000.hdf5"],
+            io="hdf5",
+            plot_filenames=[tmp_path / "plots.json"],
+            output_path=tmp_path / config,
+            workers=0,
+        ).run()
+
+        assert results[0]["error"] is None
+        assert (
+            tmp_path / config / "snap_0000" / "first_thumbnail.png"
+        ).exists() == thumbnails
+
+    assert worker_state == {}
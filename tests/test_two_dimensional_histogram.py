@@ -0,0 +1,197 @@
+"""
+Tests for the drawing of two dimensional histograms.
+"""
+
+import io
+import os
+from pathlib import Path
+
+import numpy as np
+import unyt
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.collections import QuadMesh
+from matplotlib.figure import Figure
+from PIL import Image
+
+from pageplot.config import GlobalConfig
+from pageplot.extensions.two_dimensional_histogram import (
+    TwoDimensionalHistogramExtension,
+    coarsen,
+    histogram_counts,
+    regular_spacing,
+    tile_levels,
+)
+from pageplot.serialization import SerializedData, SerializedDataWriter
+
+
+def make_extension(**kwargs) -> TwoDimensionalHistogramExtension:
+    rng = np.random.default_rng(0)
+
+    return TwoDimensionalHistogramExtension(
+        name="histogram",
+        config=GlobalConfig(),
+        metadata=None,
+        x=unyt.unyt_array(10.0 ** rng.normal(0.0, 1.0, 10000), "Solar_Mass"),
+        y=unyt.unyt_array(rng.normal(0.0, 1.0, 10000), "kpc"),
+        x_units=unyt.unyt_quantity(1.0, "Solar_Mass"),
+        y_units=unyt.unyt_quantity(1.0, "kpc"),
+        limits_x=["1e-3 Solar_Mass", "1e3 Solar_Mass"],
+        limits_y=["-3 kpc", "3 kpc"],
+        spacing_x="log",
+        **kwargs,
+    )
+
+
+def draw(extension: TwoDimensionalHistogramExtension):
+    fig = Figure()
+    FigureCanvasAgg(fig)
+    axes = fig.add_subplot()
+
+    extension.preprocess()
+    extension.blit(fig=fig, axes=axes)
+    axes.set_xscale("log")
+    fig.canvas.draw()
+
+    return axes
+
+
+def test_log_norm_masks_empty_cells():
+    extension = make_extension(bins=32, norm="log")
+    axes = draw(extension)
+
+    # The tails of the distributions leave some of the cells empty.
+    assert (extension.grid == 0).any()
+
+    (mappable,) = [*axes.images, *axes.collections]
+
+    assert np.ma.count_masked(mappable.get_array()) == (extension.grid == 0).sum()
+    assert mappable.norm.vmin >= 1.0
+
+
+def test_regular_spacing():
+    assert regular_spacing(np.linspace(-1.0, 1.0, 10)) == "linear"
+    assert regular_spacing(np.logspace(-3.0, 3.0, 10)) == "log"
+    assert regular_spacing(np.array([0.0, 1.0, 3.0, 4.0])) is None
+
+
+def test_image_for_regular_edges():
+    axes = draw(make_extension(bins=32, norm="log"))
+
+    assert len(axes.images) == 1
+    assert not any(isinstance(c, QuadMesh) for c in axes.collections)
+    assert np.allclose(axes.get_xlim(), [1e-3, 1e3])
+    assert np.allclose(axes.get_ylim(), [-3.0, 3.0])
+
+
+def test_mesh_for_irregular_edges():
+    extension = make_extension(bins=32)
+    extension.preprocess()
+    extension.x_edges[5] *= 1.1
+
+    fig = Figure()
+    FigureCanvasAgg(fig)
+    axes = fig.add_subplot()
+    extension.blit(fig=fig, axes=axes)
+
+    assert len(axes.images) == 0
+    assert isinstance(axes.collections[0], QuadMesh)
+
+
+def test_histogram_counts_match_histogram2d():
+    rng = np.random.default_rng(2)
+
+    for spacing, edges in [
+        ("linear", np.linspace(-1.0, 1.0, 18)),
+        ("log", np.logspace(-2.0, 2.0, 31)),
+    ]:
+        x = np.concatenate(
+            [
+                rng.uniform(edges[0] * 1.2, edges[-1] * 1.2, 10000),
+                edges,
+                [np.nan, np.inf, -np.inf, 0.0],
+            ]
+        )
+        y = rng.permutation(x)
+        y_edges = np.linspace(y[np.isfinite(y)].min(), 0.9, 7)
+
+        counts = histogram_counts(x, y, edges, y_edges, spacing, "linear")
+        expected, *_ = np.histogram2d(x, y, bins=[edges, y_edges])
+
+        assert counts.dtype == np.uint32
+        assert counts.shape == (6, len(edges) - 1)
+        assert (counts == expected.T).all()
+
+
+def test_separate_bins_and_pyramid():
+    extension = make_extension(bins_x=33, bins_y=16, pyramid_levels=2)
+    extension.preprocess()
+
+    assert extension.grid.shape == (16, 33)
+    assert len(extension.x_edges) == 34
+
+    serialized = extension.serialize()
+
+    first, second = serialized["pyramid"]
+
+    assert first["grid"].shape == (8, 17)
+    assert second["grid"].shape == (4, 9)
+    assert second["grid"].sum() == extension.grid.sum()
+    assert second["x_edges"][-1] == extension.x_edges[-1]
+    assert len(second["x_edges"]) == 10
+
+    grid, *_ = coarsen(extension.grid.value, extension.x_edges, extension.y_edges)
+    assert (grid == first["grid"].value).all()
+
+    output_file = Path("test_pyramid.hdf5")
+
+    with SerializedDataWriter(filename=output_file) as writer:
+        writer.write_plot("histogram", {"two_dimensional_histogram": serialized})
+
+    with SerializedData(filename=output_file) as read:
+        pyramid = read["histogram"]["two_dimensional_histogram"]["pyramid"]
+
+        assert (pyramid[1]["grid"] == second["grid"]).all()
+        assert pyramid[1]["grid"].dtype == np.uint32
+
+    os.remove(output_file)
+
+
+def test_tile_pyramid(tmp_path):
+    extension = make_extension(bins_x=70, bins_y=40, norm="log", tile_size=16)
+    extension.preprocess()
+
+    # 70 x 40, 35 x 20, 18 x 10, and finally 9 x 5 cells in a single tile.
+    assert tile_levels(extension.grid.shape, 16) == 4
+
+    tiles = {
+        name: np.array(Image.open(io.BytesIO(data)))
+        for name, data in extension.additional_outputs()
+    }
+
+    assert len(tiles) == 5 * 3 + 3 * 2 + 2 * 1 + 1
+    assert tiles["tile_3_0_0.png"].shape == (5, 9, 4)
+    assert tiles["tile_0_4_2.png"].shape == (8, 6, 4)
+
+    # Images are stored from the top down, and empty cells are transparent.
+    filled = tiles["tile_0_1_0.png"][::-1, :, 3] > 0
+    assert (filled == (extension.grid.value[:16, 16:32] > 0)).all()
+
+    serialized = extension.serialize()
+
+    assert serialized["tiles"]["levels"] == 4
+    assert serialized["tiles"]["vmax"] == extension.grid.max()
+
+    # The tiles take the place of the grid, and any pyramid of it.
+    extension.pyramid_levels = 2
+    assert not {"grid", "pyramid"} & set(extension.serialize())
+
+    with SerializedDataWriter(filename=tmp_path / "tiles.hdf5") as writer:
+        writer.write_plot("histogram", {"two_dimensional_histogram": serialized})
+
+    with SerializedData(filename=tmp_path / "tiles.hdf5") as read:
+        histogram = read["histogram"]["two_dimensional_histogram"]
+
+        assert "grid" not in histogram
+        assert histogram["tiles"]["tile_size"] == 16
+
+    assert list(make_extension().additional_outputs()) == []
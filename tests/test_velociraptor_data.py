@@ -0,0 +1,118 @@
+"""
+Tests for the caching of velociraptor observational data.
+"""
+
+import json
+import os
+
+import pytest
+import unyt
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+from pageplot.config import GlobalConfig
+from pageplot.extensions.velociraptor_data import (
+    ObservationCache,
+    VelociraptorDataExtension,
+    observation_cache,
+)
+
+objects = pytest.importorskip("velociraptor.observations.objects")
+
+
+def write_observation(filename, redshift: float):
+    from astropy.cosmology import Planck18
+
+    observation = objects.ObservationalData()
+    observation.associate_x(
+        unyt.unyt_array([1e9, 1e10, 1e11], "Solar_Mass"),
+        scatter=None,
+        comoving=False,
+        description="Stellar Mass",
+    )
+    observation.associate_y(
+        unyt.unyt_array([1e-2, 1e-3, 1e-4], "Mpc**-3"),
+        scatter=unyt.unyt_array([1e-3, 1e-4, 1e-5], "Mpc**-3"),
+        comoving=True,
+        description="Mass Function",
+    )
+    observation.associate_citation("Test et al. (2021)", "2021Test")
+    observation.associate_name("Test")
+    observation.associate_comment("A test.")
+    observation.associate_redshift(redshift, redshift - 0.5, redshift + 0.5)
+    observation.associate_plot_as("points")
+    observation.associate_cosmology(Planck18)
+    observation.write(filename)
+
+
+def make_extension(tmp_path, redshift: float) -> VelociraptorDataExtension:
+    class Metadata:
+        a = 1.0 / (1.0 + redshift)
+
+    config = GlobalConfig(
+        extensions={"velociraptor_data": {"data_path": str(tmp_path)}}
+    )
+    config.run_extensions()
+
+    return VelociraptorDataExtension(
+        name="velociraptor_data",
+        config=config,
+        metadata=Metadata(),
+        x=None,
+        y=None,
+        x_units=unyt.unyt_quantity(1.0, "kg"),
+        y_units=unyt.unyt_quantity(1.0, "Gpc**-3"),
+        files=["low.hdf5", "high.hdf5"],
+    )
+
+
+def test_observation_cache(tmp_path):
+    write_observation(tmp_path / "low.hdf5", redshift=0.5)
+    write_observation(tmp_path / "high.hdf5", redshift=4.0)
+
+    observation_cache.clear()
+
+    extension = make_extension(tmp_path, redshift=0.5)
+    extension.preprocess()
+
+    (observation,) = extension.observations
+    assert observation.redshift == 0.5
+    assert not observation.x.flags.writeable
+
+    # Converted copies are drawn, leaving the shared data alone.
+    fig = Figure()
+    FigureCanvasAgg(fig)
+    extension.blit(fig=fig, axes=fig.add_subplot())
+
+    assert observation.x.units == unyt.Unit("Solar_Mass")
+    assert observation.y_scatter.units == unyt.Unit("Mpc**-3")
+
+    # The same plot for another snapshot reuses the files.
+    other = make_extension(tmp_path, redshift=0.5)
+    other.preprocess()
+
+    assert other.observations[0] is observation
+
+    # Both files are indexed; in a new process, files that can not overlap
+    # with the bracket are not even opened.
+    with open(tmp_path / ".pageplot_redshift_index.json", "r") as handle:
+        index = json.load(handle)
+
+    assert index["high.hdf5"]["redshifts"] == [[3.5, 4.5]]
+
+    cache = ObservationCache()
+    observations = cache.load(
+        [tmp_path / "low.hdf5", tmp_path / "high.hdf5"],
+        redshift_bracket=(3.9, 4.1),
+        index_filename=tmp_path / ".pageplot_redshift_index.json",
+    )
+
+    assert [x.redshift for x in observations] == [4.0]
+    assert [os.path.basename(key[0]) for key in cache.files] == ["high.hdf5"]
+
+    # Modified files are read again.
+    os.utime(tmp_path / "high.hdf5", ns=(0, 0))
+    assert cache.load([tmp_path / "high.hdf5"], (3.9, 4.1))[0] is not observations[0]
+    assert len(cache.files) == 1
+
+    observation_cache.clear()
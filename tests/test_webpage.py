@@ -0,0 +1,81 @@
+"""
+Tests the webpage creation.
+"""
+
+import json
+import time
+
+from pageplot.config import GlobalConfig
+from pageplot.plotcontainer import PlotContainer
+from pageplot.plotmodel import PlotModel
+from pageplot.webpage.html import WebpageCreator
+
+
+def create_container(number_of_plots: int, output_path) -> PlotContainer:
+    config = GlobalConfig()
+
+    plots = {
+        f"plot_{index}": PlotModel(
+            name=f"plot_{index}",
+            config=config,
+            plot_spec={
+                "metadata": {
+                    "title": f"Plot {index}",
+                    "caption": "A caption.",
+                    "section": f"Section {index % 10}",
+                }
+            },
+            x="XDataset Solar_Mass",
+        )
+        for index in range(number_of_plots)
+    }
+
+    return PlotContainer(data=None, plots=plots, output_path=output_path)
+
+
+def create_pages(container: PlotContainer) -> WebpageCreator:
+    webpage = WebpageCreator()
+    webpage.add_metadata("Test")
+    webpage.add_plots(plot_container=container)
+    webpage.save_pages(container.output_path)
+
+    return webpage
+
+
+def test_save_pages(tmp_path):
+    container = create_container(100, tmp_path)
+    webpage = create_pages(container)
+
+    with open(tmp_path / "index.json", "r") as handle:
+        index = json.load(handle)
+
+    assert len(index["sections"]) == 10
+    assert sum(len(section["plots"]) for section in index["sections"]) == 100
+
+    index_html = (tmp_path / "index.html").read_text()
+
+    for section in index["sections"]:
+        assert section["page"] in index_html
+
+        page = (tmp_path / section["page"]).read_text()
+
+        for plot in section["plots"]:
+            assert f'data-src="{plot["filename"]}"' in page
+
+        # Only the plots in this section are on its page.
+        assert page.count('class="lazy"') == len(section["plots"])
+
+    assert (tmp_path / "mathjax.js").exists()
+
+    # Identifiers are the same between runs (i.e. not from the salted hash).
+    assert create_pages(container).index() == webpage.index()
+    assert index["sections"][0]["id"] == "c9299c9c3ce4"
+
+
+def test_save_pages_scales(tmp_path):
+    container = create_container(5000, tmp_path)
+
+    start = time.perf_counter()
+    create_pages(container)
+
+    assert time.perf_counter() - start < 1.0